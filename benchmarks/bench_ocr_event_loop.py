@@ -0,0 +1,82 @@
+# benchmarks/bench_ocr_event_loop.py
+"""
+Lasttest für den Event-Loop während OCR: mehrere CPU-lastige Aufträge (Stellvertreter
+für Tesseract, gleiche Laufzeit pro Bild) laufen einmal direkt in der Coroutine
+(altes Verhalten) und einmal über OcrEngine im Prozess-Pool. Ein Mess-Task schläft
+dabei in kurzen Abständen und misst, wie viel zu spät er jeweils wieder drankommt
+(Event-Loop-Verzögerung: p50, p99, Maximum).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_ocr_event_loop [--jobs 4] [--job-seconds 0.5] [--workers 0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from utils.ocr import OcrEngine
+
+PROBE_INTERVAL = 0.005
+
+
+def burn_cpu(seconds: float) -> int:
+    """
+    Rechnet seconds Sekunden CPU-Zeit lang, wie Tesseract auf einem Screenshot.
+    """
+    end = time.process_time() + seconds
+    count = 0
+    while time.process_time() < end:
+        count += 1
+    return count
+
+
+async def probe_lag(stop: asyncio.Event, samples: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((loop.time() - start - PROBE_INTERVAL) * 1000)
+
+
+async def scenario(label: str, job, jobs: int):
+    stop = asyncio.Event()
+    samples = []
+    probe = asyncio.create_task(probe_lag(stop, samples))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(job() for _ in range(jobs)))
+    duration = time.perf_counter() - start
+    stop.set()
+    await probe
+    samples.sort()
+    p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+    print(f"{label:<26} {jobs} Aufträge in {duration:5.2f}s, Event-Loop-Verzögerung "
+          f"p50 {statistics.median(samples):6.2f} ms, p99 {p99:7.2f} ms, max {samples[-1]:7.1f} ms")
+
+
+async def main(jobs: int, job_seconds: float, workers: int):
+    async def inline():
+        return burn_cpu(job_seconds)
+
+    await scenario("direkt in der Coroutine", inline, jobs)
+
+    engine = OcrEngine(workers=workers or os.cpu_count() or 1, max_pending=jobs, timeout=60)
+    try:
+        async def pooled():
+            return await engine.run(burn_cpu, job_seconds, timeout=60)
+
+        await scenario("Prozess-Pool (Kaltstart)", pooled, 1)
+        await scenario(f"Prozess-Pool ({engine.workers} Worker)", pooled, jobs)
+    finally:
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--job-seconds", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=0, help="0 = alle CPU-Kerne")
+    args = parser.parse_args()
+    asyncio.run(main(args.jobs, args.job_seconds, args.workers))
@@ -0,0 +1,118 @@
+# benchmarks/bench_ocr_preprocess.py
+"""
+OCR-Benchmark Vorverarbeitung: Tesseract-Laufzeit und Texttreue je Screenshot, einmal
+auf dem Originalbild (altes Verhalten) und einmal nach preprocess_image (verkleinern,
+Graustufen, Binarisierung, optional Ausschnitte). Texttreue = Ähnlichkeit (difflib)
+zwischen erkanntem und erwartetem Text, Leerraum und Groß-/Kleinschreibung ignoriert.
+
+Ohne eigene Beispiele werden Discord-ähnliche Screenshots (Darkmode, Full HD und 4K)
+mit bekanntem Text erzeugt. Mit --samples DIR werden stattdessen alle Bilder aus DIR
+gelesen, zu jedem Bild gehört eine gleichnamige .txt-Datei mit dem erwarteten Text.
+Ohne tesseract im PATH wird der Benchmark übersprungen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_ocr_preprocess [--samples DIR] [--max-side 2000] [--regions "0,0.5,1,1"]
+"""
+
+import argparse
+import difflib
+import io
+import os
+import shutil
+import time
+
+from utils.ocr import OCR_LANG, preprocess_image
+
+SCREENSHOT_SIZES = ((1920, 1080), (3840, 2160))
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+CHAT_LINES = (
+    "Spieler123: Hallo, ich wurde gestern wegen Teamkill gebannt.",
+    "Sekretärin Siegrid: Bitte teile mir zuerst deine ID mit.",
+    "Spieler123: Meine ID ist 76561198012345678, das war keine Absicht.",
+    "Admin Max: Laut Log hast du drei Mitspieler in der Basis getötet.",
+    "Spieler123: Mein Squad Leader kann bestätigen, dass es ein Versehen war.",
+    "Admin Max: Wir schauen uns die Aufnahme an und melden uns.",
+)
+
+
+def synthetic_screenshots():
+    """
+    Liefert (Name, PNG-Bytes, erwarteter Text) für Discord-ähnliche Screenshots.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    for width, height in SCREENSHOT_SIZES:
+        img = Image.new("RGB", (width, height), (54, 57, 63))
+        draw = ImageDraw.Draw(img)
+        font = ImageFont.load_default(size=height // 40)
+        # Text nur im unteren linken Chatbereich, wie in einem echten Screenshot
+        for i, line in enumerate(CHAT_LINES):
+            draw.text((width // 20, height // 2 + i * height // 16), line, fill=(220, 221, 222), font=font)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        yield f"synthetisch {width}x{height}", buffer.getvalue(), "\n".join(CHAT_LINES)
+
+
+def sample_screenshots(directory: str):
+    for name in sorted(os.listdir(directory)):
+        base, extension = os.path.splitext(name)
+        truth = os.path.join(directory, base + ".txt")
+        if extension.lower() not in IMAGE_EXTENSIONS or not os.path.exists(truth):
+            continue
+        with open(os.path.join(directory, name), "rb") as f, open(truth, encoding="utf-8") as t:
+            yield name, f.read(), t.read()
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def similarity(expected: str, recognized: str) -> float:
+    return difflib.SequenceMatcher(None, normalize(expected), normalize(recognized)).ratio()
+
+
+def timed_ocr(images, lang: str):
+    import pytesseract
+
+    start = time.perf_counter()
+    text = "\n".join(pytesseract.image_to_string(img, lang=lang) for img in images)
+    return text, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", help="Ordner mit Screenshots und gleichnamigen .txt-Dateien")
+    parser.add_argument("--max-side", type=int, default=2000)
+    parser.add_argument("--regions", default="", help='z. B. "0,0.5,1,1" (relativ, mehrere mit ;)')
+    args = parser.parse_args()
+
+    if shutil.which("tesseract") is None:
+        print("[WARN] tesseract nicht im PATH gefunden, Benchmark übersprungen.")
+        return
+
+    import pytesseract
+    from PIL import Image
+
+    lang = OCR_LANG if OCR_LANG in pytesseract.get_languages() else "eng"
+    regions = [
+        tuple(float(value) for value in region.split(","))
+        for region in args.regions.split(";") if region.strip()
+    ]
+    samples = sample_screenshots(args.samples) if args.samples else synthetic_screenshots()
+
+    print(f"Sprache {lang}, max_side {args.max_side}, Ausschnitte {regions or 'keine'}")
+    print(f"{'Bild':<28}{'Tesseract vorher':>18}{'nachher':>10}{'Treue vorher':>15}{'nachher':>10}")
+    for name, data, expected in samples:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            before_text, before_time = timed_ocr([img], lang)
+            start = time.perf_counter()
+            parts = preprocess_image(img, args.max_side, regions)
+            prepare_time = time.perf_counter() - start
+        after_text, after_time = timed_ocr(parts, lang)
+        print(f"{name:<28}{before_time:16.2f} s{after_time + prepare_time:8.2f} s"
+              f"{similarity(expected, before_text):14.1%}{similarity(expected, after_text):10.1%}")
+
+
+if __name__ == "__main__":
+    main()
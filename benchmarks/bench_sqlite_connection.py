@@ -0,0 +1,81 @@
+# benchmarks/bench_sqlite_connection.py
+"""
+Mikro-Benchmark: eine Verbindung pro Aufruf (altes Muster: connect, commit, close)
+gegen die langlebige WAL-Verbindung von Database.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_sqlite_connection [--ops 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+
+from utils.database import Database
+
+
+def per_call_setup(path: str, ops: int):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE tickets (id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, channel_id TEXT NOT NULL, "
+            "created_at TEXT DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'open', claimed_by TEXT, user_name TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO tickets (id, user_id, channel_id) VALUES (?, ?, ?)",
+            [(i, "1", "1") for i in range(ops)]
+        )
+
+
+def per_call_claim(path: str, ticket_id: int):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("UPDATE tickets SET status = 'claimed', claimed_by = ? WHERE id = ?", (str(ticket_id), ticket_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def per_call_get_user(path: str, ticket_id: int):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT user_id FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def ops_per_second(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "per_call.sqlite")
+        per_call_setup(old_path, args.ops)
+        old_write = ops_per_second(lambda i: per_call_claim(old_path, i), args.ops)
+        old_read = ops_per_second(lambda i: per_call_get_user(old_path, i), args.ops)
+
+        db = Database(os.path.join(tmp, "shared.sqlite"))
+        # Database loggt jede Änderung mit print
+        with contextlib.redirect_stdout(io.StringIO()):
+            ticket_ids = [db.reserve_ticket(1, "user") for _ in range(args.ops)]
+            new_write = ops_per_second(lambda i: db.log_ticket_claimed(ticket_ids[i], i), args.ops)
+        new_read = ops_per_second(lambda i: db.get_ticket_user(ticket_ids[i]), args.ops)
+        db.close()
+
+    print(f"Schreiben (Ticket beanspruchen): {old_write:8.0f} -> {new_write:8.0f} ops/s (x{new_write / old_write:.1f})")
+    print(f"Lesen (get_ticket_user):         {old_read:8.0f} -> {new_read:8.0f} ops/s (x{new_read / old_read:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_transcript_backfill.py
+"""
+Backfill-Benchmark: ein synthetischer Kanal mit 50.000 Nachrichten wird einmal
+auf die alte Art (ganze History als Liste, ein Text-Blob als Snapshot) und
+einmal mit dem streamenden sync_transcript gespeichert. Gemessen werden Dauer
+und Spitzen-Speicher (tracemalloc).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_transcript_backfill [--messages 50000]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.database import AsyncDatabase
+from utils.transcript_builder import sync_transcript
+from utils.transcript_codec import CODEC_FULL, compress_text
+
+FIRST_MESSAGE_ID = 10 ** 17
+START = datetime.datetime(2024, 1, 1)
+
+
+class FakeAuthor:
+    def __init__(self, author_id: int):
+        self.id = author_id
+        self.display_name = f"User{author_id}"
+
+
+class FakeMessage:
+    def __init__(self, index: int):
+        self.id = FIRST_MESSAGE_ID + index
+        self.author = FakeAuthor(index % 7)
+        self.content = f"Das ist eine Testnachricht Nummer {index} mit etwas Inhalt dazu."
+        self.created_at = START + datetime.timedelta(seconds=index)
+
+
+class FakeChannel:
+    """
+    Liefert die Nachrichten erst beim Iterieren, wie discord.py es seitenweise tut.
+    """
+    def __init__(self, count: int):
+        self.count = count
+
+    def history(self, limit=None, after=None, oldest_first=True):
+        start = 0 if after is None else after.id - FIRST_MESSAGE_ID + 1
+        return self._iterate(start)
+
+    async def _iterate(self, start: int):
+        for index in range(start, self.count):
+            yield FakeMessage(index)
+
+
+def save_snapshot(db, ticket_id: int, text: str):
+    """
+    Früherer Schreibweg (Database.save_transcript): der ganze Text als ein komprimierter
+    Snapshot in transcripts. Der Bot schreibt dort nichts mehr, die Tabelle wird nur
+    noch für Alt-Tickets gelesen.
+    """
+    with db._transaction() as conn:
+        conn.execute(
+            "INSERT INTO transcripts (ticket_id, transcript_content, content_blob, codec) "
+            "VALUES (?, '', ?, ?)",
+            (ticket_id, compress_text(text), CODEC_FULL)
+        )
+
+
+async def save_as_blob(db, channel, ticket_id: int):
+    messages = [msg async for msg in channel.history(limit=None, oldest_first=True)]
+    lines = []
+    for msg in messages:
+        timestamp = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"[{timestamp}] {msg.author.display_name}: {msg.content}")
+    await db._write(save_snapshot, ticket_id, "\n".join(lines))
+
+
+async def measure(label: str, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await run()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<36} {duration:6.2f}s, Spitze {peak / 1e6:6.1f} MB")
+
+
+async def main(count: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = AsyncDatabase(os.path.join(tmp, "backfill.sqlite"))
+        await measure("alt: Liste + Blob als Snapshot", lambda: save_as_blob(db, FakeChannel(count), 1))
+        await measure("neu: sync_transcript (streamend)", lambda: sync_transcript(db, FakeChannel(count), 2))
+        stored = await db.get_transcript_by_ticket_id(2)
+        print(f"Gespeicherte Zeilen (neu): {len(stored.splitlines())}")
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000)
+    asyncio.run(main(parser.parse_args().messages))
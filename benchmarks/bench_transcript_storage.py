@@ -0,0 +1,124 @@
+# benchmarks/bench_transcript_storage.py
+"""
+Speicher-Benchmark für Alt-Snapshots: eine Datenbank im alten Format (Schema-Version 2,
+jeder Snapshot als Klartext in transcripts.transcript_content, mehrere fast gleiche
+Snapshots pro Ticket) wird angelegt, gemessen und dann mit Database auf den aktuellen
+Stand migriert (zlib mit Wörterbuch, Deltas zum Vorgänger, VACUUM).
+Gemessen werden Dateigröße, Nutzdaten in transcripts und die Lesezeit für den
+neuesten Snapshot eines Tickets.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_transcript_storage [--tickets 300] [--reads 3000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from utils import database
+
+WORDS = (
+    "ich habe gestern auf dem server gespielt und wurde wegen teamkill gebannt bitte "
+    "entbannen das war keine absicht mein squad leader hat"
+).split()
+AUTHORS = ("Spieler123", "Sekretärin Siegrid", "Admin Max")
+
+
+def make_lines(rng: random.Random, count: int) -> list:
+    return [
+        f"[2024-05-0{1 + i % 9} 12:{i % 60:02d}:{i % 60:02d}] {rng.choice(AUTHORS)}: "
+        + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+        for i in range(count)
+    ]
+
+
+def build_legacy_database(path: str, tickets: int) -> dict:
+    """
+    Legt eine Datenbank im Format vor Migration 3 an: drei Snapshots pro Ticket
+    (/ticket_transcript, schließen, löschen), jeder enthält den vorherigen vollständig.
+    Liefert {ticket_id: neuester Snapshot-Text}.
+    """
+    rng = random.Random(1)
+    latest = {}
+    conn = database.connect(path)
+    database._migration_base_schema(conn)
+    database._migration_hot_query_indexes(conn)
+    conn.execute("PRAGMA user_version=2")
+    for ticket_id in range(1, tickets + 1):
+        lines = make_lines(rng, rng.randint(20, 300))
+        for cut in (4, 1, 0):
+            text = "\n".join(lines[:len(lines) - cut])
+            conn.execute(
+                "INSERT INTO transcripts (ticket_id, transcript_content) VALUES (?, ?)",
+                (ticket_id, text)
+            )
+        latest[ticket_id] = text
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return latest
+
+
+def payload_bytes(conn) -> int:
+    """
+    Bytes in transcripts: Klartext plus (ab Migration 3) komprimierte Blobs.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transcripts)")]
+    blob = " + IFNULL(LENGTH(content_blob), 0)" if "content_blob" in columns else ""
+    return conn.execute(
+        f"SELECT SUM(LENGTH(CAST(transcript_content AS BLOB)){blob}) FROM transcripts"
+    ).fetchone()[0]
+
+
+def read_latency_us(read, tickets: int, reads: int) -> float:
+    start = time.perf_counter()
+    for i in range(reads):
+        read(1 + i % tickets)
+    return (time.perf_counter() - start) / reads * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "transcripts.sqlite")
+        latest = build_legacy_database(path, args.tickets)
+
+        conn = database.connect(path)
+        old_size = os.path.getsize(path)
+        old_payload = payload_bytes(conn)
+        old_read = read_latency_us(
+            lambda ticket_id: conn.execute(
+                "SELECT transcript_content FROM transcripts WHERE ticket_id=? "
+                "ORDER BY transcript_id DESC LIMIT 1",
+                (ticket_id,)
+            ).fetchone(),
+            args.tickets, args.reads
+        )
+        conn.close()
+
+        # Migrationen und VACUUM loggen per print
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = database.Database(path)
+        db._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        new_size = os.path.getsize(path)
+        new_payload = payload_bytes(db._conn)
+        new_read = read_latency_us(db.get_transcript_by_ticket_id, args.tickets, args.reads)
+        assert all(db.get_transcript_by_ticket_id(t) == text for t, text in latest.items())
+        db.close()
+
+    print(f"{'Dateigröße:':<26}{old_size / 1024:8.0f} -> {new_size / 1024:8.0f} KiB")
+    print(f"{'Nutzdaten transcripts:':<26}{old_payload / 1024:8.0f} -> {new_payload / 1024:8.0f} KiB")
+    print(f"{'Neuester Snapshot lesen:':<26}{old_read:8.1f} -> {new_read:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_webapp_caching.py
+"""
+Web-Panel-Benchmark (Flask-Testclient, synthetische Datenbank): pro Seite Antwortgröße
+und CPU-Zeit pro Request für
+  - unkomprimiert (Client ohne Accept-Encoding, entspricht dem alten Verhalten),
+  - gzip-komprimiert,
+  - erneuten Abruf mit If-None-Match (304, ohne Template).
+Dazu die Fingerprint-URL einer statischen Datei (gzip, Cache-Control).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_webapp_caching [--tickets 1000] [--messages 100] [--big 50000]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import tempfile
+import time
+
+# utils.config bricht ohne BOT_TOKEN ab; das Panel braucht ihn nicht
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+
+from utils.database import Database
+from webapp import app as webapp
+
+START = datetime.datetime(2024, 1, 1)
+PHRASES = (
+    "Hallo, ich wurde wegen Teamkill gebannt",
+    "Bitte teile mir zuerst deine ID mit",
+    "Das war keine Absicht, mein Squad Leader kann das bestätigen",
+    "Ein Supporter schaut sich das an",
+)
+
+
+def fill_database(path: str, tickets: int, messages: int, big: int) -> int:
+    """
+    Legt tickets Tickets mit je messages Nachrichten an, das letzte mit big Nachrichten.
+    Liefert die ID des großen Tickets.
+    """
+    db = Database(path)
+    message_id = 10 ** 17
+    ticket_id = None
+    for index in range(tickets):
+        ticket_id = db.reserve_ticket(1000 + index, f"Spieler{index}")
+        db.attach_ticket_channel(ticket_id, 5000 + index)
+        count = big if index == tickets - 1 else messages
+        rows = []
+        for i in range(count):
+            message_id += 1
+            created_at = (START + datetime.timedelta(minutes=index, seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append((message_id, i % 2, f"User{i % 2}", created_at, f"{PHRASES[i % len(PHRASES)]} ({i})"))
+        db.append_transcript_messages(ticket_id, rows, checkpoint=message_id)
+    db.close()
+    return ticket_id
+
+
+def measure(client, url: str, headers: dict, repeat: int):
+    """
+    CPU-Millisekunden pro Request (Prozesszeit) und Bytes der letzten Antwort.
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        response = client.get(url, headers=headers)
+        body = response.get_data()
+    return (time.process_time() - start) / repeat * 1000, len(body), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--big", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "panel.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()):
+            big_ticket = fill_database(path, args.tickets, args.messages, args.big)
+        # get_db() öffnet DATABASE_PATH erst beim ersten Zugriff
+        webapp.DATABASE_PATH = path
+
+        client = webapp.app.test_client()
+        with client.session_transaction() as session:
+            session["discord_id"] = "1"
+            session["roles_ok"] = True
+
+        pages = ("/", f"/transcript/{args.tickets // 2}", f"/transcript/{big_ticket}.txt", "/search?q=teamkill")
+        print(f"{'Seite':<30}{'Größe (ohne -> gzip)':<28}CPU pro Request (ohne -> gzip, 304)")
+        for url in pages:
+            client.get(url)  # Aufwärmen (Template-Kompilierung, Page-Cache)
+            plain_ms, plain_size, _ = measure(client, url, {}, args.repeat)
+            gzip_ms, gzip_size, response = measure(client, url, {"Accept-Encoding": "gzip"}, args.repeat)
+            revalidate = {"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]}
+            cached_ms, _, cached = measure(client, url, revalidate, args.repeat * 10)
+            assert cached.status_code == 304, url
+            print(f"{url:<30}{plain_size / 1024:9.1f} KB -> {gzip_size / 1024:7.1f} KB"
+                  f"{plain_ms:9.2f} ms -> {gzip_ms:7.2f} ms, {cached_ms:5.2f} ms")
+
+        with webapp.app.test_request_context():
+            static_url = webapp.url_for("static", filename="css/bootstrap.min.css")
+        plain = client.get(static_url)
+        gzipped = client.get(static_url, headers={"Accept-Encoding": "gzip"})
+        print(f"{static_url.split('?')[0]:<30}{len(plain.get_data()) / 1024:9.1f} KB -> "
+              f"{len(gzipped.get_data()) / 1024:7.1f} KB, Cache-Control: {gzipped.headers['Cache-Control']}")
+        webapp.get_db().close()
+
+
+if __name__ == "__main__":
+    main()
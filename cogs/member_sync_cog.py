@@ -0,0 +1,72 @@
+# cogs/member_sync_cog.py
+
+import discord
+from discord.ext import commands
+
+from utils import config, database
+
+
+def panel_roles(member: discord.Member) -> list:
+    """
+    Die Rollen des Mitglieds, die Zugriff auf das Web-Panel geben (als Strings).
+    """
+    return [str(role.id) for role in member.roles if str(role.id) in config.ALLOWED_ROLES]
+
+
+class MemberSyncCog(commands.Cog):
+    """
+    Hält die Tabelle member_roles aktuell, damit das Web-Panel Berechtigungen
+    lokal prüfen kann, statt bei jedem Login Discord zu fragen.
+    Beim Start wird komplett abgeglichen, danach nur noch einzelne Änderungen geschrieben.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.db = database.get_async_database()
+
+    async def resync(self, guild: discord.Guild):
+        if not guild.chunked:
+            await guild.chunk()
+        await self.db.replace_member_roles(
+            (member.id, panel_roles(member)) for member in guild.members
+        )
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready kommt auch nach einem Reconnect -> verpasste Änderungen werden nachgeholt
+        guild = self.bot.get_guild(config.GUILD_ID)
+        if guild is None:
+            print(f"[WARN] [MemberSyncCog] Guild {config.GUILD_ID} nicht gefunden, kein Rollen-Abgleich.")
+            return
+        try:
+            await self.resync(guild)
+        except discord.HTTPException as e:
+            print(f"[WARN] [MemberSyncCog] Rollen-Abgleich fehlgeschlagen: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if member.guild.id == config.GUILD_ID:
+            await self.db.set_member_roles(member.id, panel_roles(member))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if after.guild.id != config.GUILD_ID:
+            return
+        roles = panel_roles(after)
+        if roles != panel_roles(before):
+            await self.db.set_member_roles(after.id, roles)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if member.guild.id == config.GUILD_ID:
+            await self.db.set_member_roles(member.id, [])
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        # Für gelöschte Rollen schickt Discord kein on_member_update
+        if role.guild.id == config.GUILD_ID and str(role.id) in config.ALLOWED_ROLES:
+            await self.resync(role.guild)
+
+
+def setup(bot: commands.Bot):
+    bot.add_cog(MemberSyncCog(bot))
@@ -5,17 +5,19 @@ from discord.ext import commands
 import re
 import aiohttp
 import asyncio
+import contextlib
+import hashlib
+import json
 import unicodedata
-from collections import defaultdict
+from collections import Counter, defaultdict
 
-# OCR-Imports
-import pytesseract
-from PIL import Image
-import io
-
-from openai import OpenAI
-
-from utils import config, database
+from utils import config, database, ocr
+from utils.ban_details import BanDetailCache
+from utils.cooperation import LLM_SYSTEM_PROMPT, CooperationClassifier, parse_llm_label
+from utils.http import HttpClient
+from utils.llm import LlmGateway
+from utils.streaming import StreamingReply
+from utils.transcript_builder import format_transcript_time, message_to_transcript_row, sync_transcript
 
 ##############################################################################
 # Klassendefinitionen
@@ -56,10 +58,28 @@ class TicketAdminView(discord.ui.View):
     async def delete_ticket_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         await self.cog.delete_ticket(interaction)
 
+class TicketRequest:
+    """
+    Ein wartender Ticket-Wunsch: Interaktion, bereits reservierte Ticket-ID
+    und (falls angezeigt) die ephemere Nachricht mit der Warteschlangen-Position.
+    """
+    def __init__(self, interaction: discord.Interaction, ticket_id: int, user_name: str):
+        self.interaction = interaction
+        self.ticket_id = ticket_id
+        self.user_name = user_name
+        self.status_message = None
+        self.last_position = 0
+        self.last_update = 0.0
+
 ##############################################################################
 # Hilfsfunktionen
 ##############################################################################
 
+# Mindestabstand (Sekunden) zwischen zwei Positions-Updates für denselben Nutzer
+QUEUE_POSITION_UPDATE_INTERVAL = 5.0
+
+QUEUE_FULL_MESSAGE = "Gerade werden sehr viele Tickets erstellt. Bitte versuche es in ein paar Minuten erneut."
+
 def safe_truncate(text: str, max_chars: int) -> str:
     """
     Kürzt den Text auf max_chars Zeichen und fügt '... (gekürzt)' an, wenn zu lang.
@@ -87,11 +107,28 @@ def normalize_id_string(text: str) -> str:
 class TicketCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = database.Database()
+        self.db = database.get_async_database()
 
         # Um parallele /create-Klicks zu verhindern
         self.creating_tickets_for = set()
 
+        # Warteschlange für die Ticket-Erstellung (Ansturm z. B. nach einer Bannwelle)
+        self.ticket_queue = asyncio.Queue(maxsize=config.TICKET_QUEUE_MAX)
+        self.ticket_waiting = []
+        self.ticket_workers = []
+        self.ticket_busy_workers = 0
+        self.channel_create_lock = asyncio.Lock()
+        self.last_channel_create = 0.0
+
+        # Live-Mitschnitt: channel_id -> ticket_id (None = kein Ticket),
+        # Kanäle, deren Transkript seit dem Start lückenlos ist, und laufende Nachlade-Vorgänge.
+        # live_capture_epoch zählt Verbindungsabbrüche zum Gateway (siehe reset_live_capture).
+        self.ticket_ids_by_channel = {}
+        self.live_capture_channels = set()
+        self.live_capture_epoch = 0
+        self.backfilling_channels = set()
+        self.backfill_tasks = set()
+
         # KI pro Channel (an/aus)
         self.ai_enabled_for_channel = {}
 
@@ -104,16 +141,89 @@ class TicketCog(commands.Cog):
         # Zähler für uneinsichtiges Verhalten
         self.uncooperative_count = defaultdict(int)
 
-        # OpenAI Setup
-        self.openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
-        self.openai_model = config.OPENAI_MODEL or "gpt-3.5-turbo"
+        # Gesprächszüge: gesammelte, noch nicht bearbeitete Nachrichten, laufende Bearbeitung,
+        # Sperre pro Kanal und Züge (Tasks), die schon etwas gesendet haben (nicht mehr abbrechbar)
+        self.pending_turn_texts = defaultdict(list)
+        self.turn_tasks = {}
+        self.channel_locks = defaultdict(asyncio.Lock)
+        self.committed_turns = set()
+
+        # Lokale Vorstufe der Kooperations-Prüfung, das LLM nur bei Unsicherheit
+        self.cooperation = CooperationClassifier.load(config.COOPERATION_MODEL_PATH)
+
+        # OCR-Cache: Treffer über URL / Bildinhalt und Fehlschläge seit dem Start
+        self.ocr_cache_stats = Counter()
+
+        # Gestreamte Antworten: Anzahl, Zeit bis zum ersten sichtbaren Token, Bearbeitungen
+        self.stream_stats = Counter()
+
+        # Ein HTTP-Client (Verbindungspool) für Ban-API und Bild-Downloads, solange das Cog geladen ist
+        self.http = HttpClient(
+            connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+            read_timeout=config.HTTP_READ_TIMEOUT,
+            total_timeout=config.HTTP_TOTAL_TIMEOUT,
+            limit_per_host=config.HTTP_LIMIT_PER_HOST,
+            dns_ttl=config.HTTP_DNS_TTL
+        )
+
+        # Ban-Details: Speicher + SQLite, unbekannte IDs kürzer, parallele Abfragen gebündelt
+        self.ban_details = BanDetailCache(
+            self.db, self._fetch_detail_upstream,
+            ttl=config.BAN_DETAIL_TTL,
+            negative_ttl=config.BAN_DETAIL_NEGATIVE_TTL
+        )
+
+        # OpenAI Setup (asynchron, begrenzte Parallelität, Wiederholungen bei 429/5xx)
+        self.llm = LlmGateway(
+            api_key=config.OPENAI_API_KEY,
+            model=config.OPENAI_MODEL or "gpt-3.5-turbo",
+            base_url=config.OPENAI_BASE_URL,
+            max_concurrency=config.LLM_MAX_CONCURRENCY,
+            timeout=config.LLM_TIMEOUT,
+            max_retries=config.LLM_MAX_RETRIES,
+            max_retry_wait=config.LLM_MAX_RETRY_WAIT
+        )
         self.openai_temp = 0.7
         self.openai_max_tokens = 1000
 
     @commands.Cog.listener()
     async def on_ready(self):
+        # on_ready kommt auch nach einer neuen Gateway-Session (Reconnect ohne Resume)
+        self.reset_live_capture()
         print("[LOG] [TicketCog] Ticket-Cog ist bereit.")
 
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        self.reset_live_capture()
+
+    def reset_live_capture(self):
+        """
+        Ohne Gateway-Verbindung kommen keine Nachrichten an, kein Kanal ist danach noch
+        lückenlos erfasst. Die nächste Nachricht pro Kanal stößt daher wieder einen
+        Abgleich ab dem Checkpoint an. Laufende Abgleiche dürfen ihren Kanal danach
+        nicht mehr als live markieren (Epoche).
+        """
+        if self.live_capture_channels:
+            print(f"[LOG] [TicketCog] Gateway-Verbindung unterbrochen: {len(self.live_capture_channels)} "
+                  "Kanäle werden bei der nächsten Nachricht abgeglichen.")
+        self.live_capture_channels.clear()
+        self.live_capture_epoch += 1
+
+    def cog_unload(self):
+        for task in self.turn_tasks.values():
+            task.cancel()
+        for task in self.backfill_tasks:
+            task.cancel()
+        ocr.shutdown()
+        print(f"[LOG] [TicketCog] HTTP-Statistik:\n{self.http.format_stats()}")
+        print(f"[LOG] [TicketCog] Ban-Details: {self.ban_details.format_stats()}")
+        print(f"[LOG] [TicketCog] OpenAI: {self.llm.format_stats()}")
+        print(f"[LOG] [TicketCog] Gestreamte Antworten: {self.format_stream_stats()}")
+        stats = self.cooperation.stats
+        print(f"[LOG] [TicketCog] Kooperation: {stats['local']} lokal entschieden, {stats['escalated']} an das LLM")
+        self.bot.loop.create_task(self.http.close())
+        self.bot.loop.create_task(self.llm.close())
+
     # ------------------------------------------------------------------------
     # Slash-Befehl: /setup_ticket_button
     # ------------------------------------------------------------------------
@@ -140,8 +250,8 @@ class TicketCog(commands.Cog):
         view = CreateTicketView(self)
         msg = await ctx.channel.send(embed=embed, view=view)
 
-        self.db.save_bot_setting("TICKET_BUTTON_CHANNEL_ID", str(ctx.channel.id))
-        self.db.save_bot_setting("TICKET_BUTTON_MESSAGE_ID", str(msg.id))
+        await self.db.save_bot_setting("TICKET_BUTTON_CHANNEL_ID", str(ctx.channel.id))
+        await self.db.save_bot_setting("TICKET_BUTTON_MESSAGE_ID", str(msg.id))
 
         await ctx.respond("Ticket-Button wurde platziert und in der DB registriert.", ephemeral=True)
         print(f"[LOG] Ticket-Button im Kanal {ctx.channel.id}, Nachricht {msg.id} gespeichert.")
@@ -150,13 +260,16 @@ class TicketCog(commands.Cog):
     # create_ticket
     # ------------------------------------------------------------------------
     async def create_ticket(self, interaction: discord.Interaction):
+        """
+        Nimmt einen Klick auf "Ticket erstellen" an, reserviert sofort die Ticket-ID
+        und reiht die eigentliche Kanal-Erstellung in die Warteschlange ein.
+        """
         try:
             await interaction.response.defer(ephemeral=True)
         except discord.NotFound:
             return
 
         user = interaction.user
-        guild = interaction.guild
 
         if user.id in self.creating_tickets_for:
             await interaction.followup.send(
@@ -165,66 +278,180 @@ class TicketCog(commands.Cog):
             )
             return
 
+        if self.ticket_queue.full():
+            await interaction.followup.send(QUEUE_FULL_MESSAGE, ephemeral=True)
+            return
+
+        self._ensure_ticket_workers()
+
+        if isinstance(user, discord.Member) and user.nick:
+            user_name = user.nick
+        else:
+            user_name = user.name
+
         self.creating_tickets_for.add(user.id)
+        ticket_id = None
         try:
-            ticket_id = self.db.get_next_ticket_id()
-            category = guild.get_channel(config.CREATED_TICKETS_CATEGORY_ID)
-            if not category:
-                await interaction.followup.send("Fehler: Ticket-Kategorie nicht gefunden.", ephemeral=True)
+            ticket_id = await self.db.reserve_ticket(user.id, user_name)
+            request = TicketRequest(interaction, ticket_id, user_name)
+
+            # Alle Worker beschäftigt -> Position anzeigen statt stumm warten
+            position = len(self.ticket_waiting) + 1
+            if self.ticket_busy_workers + len(self.ticket_waiting) >= config.TICKET_CREATION_WORKERS:
+                request.status_message = await interaction.followup.send(
+                    f"Ticket #{ticket_id} ist reserviert. Du bist auf Position {position} der Warteschlange.",
+                    ephemeral=True
+                )
+                request.last_position = position
+
+            self.ticket_queue.put_nowait(request)
+            self.ticket_waiting.append(request)
+        except asyncio.QueueFull:
+            # Während der awaits oben von anderen Klicks gefüllt worden
+            self.creating_tickets_for.discard(user.id)
+            await self.db.release_ticket(ticket_id)
+            await self._finish_ticket_request(request, QUEUE_FULL_MESSAGE)
+        except Exception:
+            self.creating_tickets_for.discard(user.id)
+            if ticket_id is not None:
+                await self.db.release_ticket(ticket_id)
+            raise
+
+    def _ensure_ticket_workers(self):
+        """
+        Startet die Worker beim ersten Klick (erst dann gibt es einen laufenden Event-Loop).
+        """
+        self.ticket_workers = [task for task in self.ticket_workers if not task.done()]
+        while len(self.ticket_workers) < config.TICKET_CREATION_WORKERS:
+            self.ticket_workers.append(asyncio.create_task(self._ticket_worker()))
+
+    async def _ticket_worker(self):
+        while True:
+            request = await self.ticket_queue.get()
+            self.ticket_busy_workers += 1
+            try:
+                if request in self.ticket_waiting:
+                    self.ticket_waiting.remove(request)
+                await self._update_queue_positions()
+                await self._create_ticket_channel(request)
+            except Exception as e:
+                print(f"[ERROR] Ticket #{request.ticket_id} konnte nicht erstellt werden: {e}")
+                await self._finish_ticket_request(
+                    request, "Beim Erstellen deines Tickets ist ein Fehler aufgetreten. Bitte versuche es erneut."
+                )
+            finally:
+                self.ticket_busy_workers -= 1
+                self.creating_tickets_for.discard(request.interaction.user.id)
+                self.ticket_queue.task_done()
+
+    async def _update_queue_positions(self):
+        """
+        Aktualisiert die Positionsanzeige wartender Nutzer (höchstens alle paar Sekunden pro Nutzer).
+        """
+        now = asyncio.get_running_loop().time()
+        for position, request in enumerate(self.ticket_waiting, start=1):
+            if not request.status_message or position == request.last_position:
+                continue
+            if now - request.last_update < QUEUE_POSITION_UPDATE_INTERVAL:
+                continue
+            request.last_position = position
+            request.last_update = now
+            try:
+                await request.status_message.edit(
+                    content=f"Ticket #{request.ticket_id} ist reserviert. "
+                            f"Du bist auf Position {position} der Warteschlange."
+                )
+            except discord.HTTPException:
+                pass
+
+    async def _finish_ticket_request(self, request, text: str):
+        if request.status_message:
+            try:
+                await request.status_message.edit(content=text)
                 return
+            except discord.HTTPException:
+                pass
+        await request.interaction.followup.send(text, ephemeral=True)
 
-            if isinstance(user, discord.Member) and user.nick:
-                user_name = user.nick
-            else:
-                user_name = user.name
+    async def _wait_for_channel_slot(self):
+        """
+        Hält den Mindestabstand zwischen zwei Kanal-Erstellungen ein,
+        damit wir bei einem Ansturm nicht in Discords Rate-Limit laufen.
+        """
+        async with self.channel_create_lock:
+            loop = asyncio.get_running_loop()
+            wait = self.last_channel_create + config.TICKET_CREATION_INTERVAL - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.last_channel_create = loop.time()
+
+    async def _create_ticket_channel(self, request):
+        interaction = request.interaction
+        user = interaction.user
+        guild = interaction.guild
+        ticket_id = request.ticket_id
+        user_name = request.user_name
+
+        category = guild.get_channel(config.CREATED_TICKETS_CATEGORY_ID)
+        if not category:
+            await self.db.release_ticket(ticket_id)
+            await self._finish_ticket_request(request, "Fehler: Ticket-Kategorie nicht gefunden.")
+            return
 
-            channel_name = f"{user_name.replace(' ', '-')[:20]}-{ticket_id}"
+        await self._wait_for_channel_slot()
+        channel_name = f"{user_name.replace(' ', '-')[:20]}-{ticket_id}"
+        try:
             ticket_channel = await guild.create_text_channel(
                 name=channel_name,
                 category=category,
                 reason=f"Ticket #{ticket_id} erstellt"
             )
-            await ticket_channel.edit(sync_permissions=True)
-            await ticket_channel.set_permissions(user, view_channel=True, send_messages=True)
+        except Exception:
+            await self.db.release_ticket(ticket_id)
+            raise
+        await self.db.attach_ticket_channel(ticket_id, ticket_channel.id)
 
-            viewer_role = guild.get_role(config.VIEWER_ROLE_ID)
-            if viewer_role:
-                await ticket_channel.set_permissions(viewer_role, view_channel=True, send_messages=False)
+        # Neuer Kanal: ab jetzt wird jede Nachricht live mitgeschrieben
+        self.ticket_ids_by_channel[ticket_channel.id] = ticket_id
+        self.live_capture_channels.add(ticket_channel.id)
 
-            self.db.log_ticket_created(ticket_id, user.id, user_name, ticket_channel.id)
+        await ticket_channel.edit(sync_permissions=True)
+        await ticket_channel.set_permissions(user, view_channel=True, send_messages=True)
 
-            self.ai_enabled_for_channel[ticket_channel.id] = True
+        viewer_role = guild.get_role(config.VIEWER_ROLE_ID)
+        if viewer_role:
+            await ticket_channel.set_permissions(viewer_role, view_channel=True, send_messages=False)
 
-            embed = discord.Embed(
-                title=f"Ticket #{ticket_id}",
-                description=(
-                    f"Willkommen {user.mention}! Bitte schildere kurz dein Anliegen. "
-                    "Wenn du gebannt wurdest, teile uns **unbedingt** deine ID mit, "
-                    "damit wir den Banngrund prüfen können."
-                ),
-                color=discord.Color.blue()
-            )
+        self.ai_enabled_for_channel[ticket_channel.id] = True
+
+        embed = discord.Embed(
+            title=f"Ticket #{ticket_id}",
+            description=(
+                f"Willkommen {user.mention}! Bitte schildere kurz dein Anliegen. "
+                "Wenn du gebannt wurdest, teile uns **unbedingt** deine ID mit, "
+                "damit wir den Banngrund prüfen können."
+            ),
+            color=discord.Color.blue()
+        )
 
-            view = TicketAdminView(self)
-            admin_msg = await ticket_channel.send(content=user.mention, embed=embed, view=view)
+        view = TicketAdminView(self)
+        admin_msg = await ticket_channel.send(content=user.mention, embed=embed, view=view)
 
-            self.db.log_ticket_admin_message(ticket_id, admin_msg.id)
+        await self.db.log_ticket_admin_message(ticket_id, admin_msg.id)
 
-            print(f"[LOG] Ticket #{ticket_id} erstellt von {user.name} (ID: {user.id}).")
+        print(f"[LOG] Ticket #{ticket_id} erstellt von {user.name} (ID: {user.id}).")
 
-            first_text = (
-                "Hallo, ich bin Sekretärin Siegrid. "
-                "Bitte teile mir zuerst deine **ID** mit, damit ich deinen Banngrund nachschauen kann."
-            )
-            self.conversations[ticket_channel.id].append({
-                "role": "assistant",
-                "content": first_text
-            })
-            await ticket_channel.send(first_text)
+        first_text = (
+            "Hallo, ich bin Sekretärin Siegrid. "
+            "Bitte teile mir zuerst deine **ID** mit, damit ich deinen Banngrund nachschauen kann."
+        )
+        self.conversations[ticket_channel.id].append({
+            "role": "assistant",
+            "content": first_text
+        })
+        await ticket_channel.send(first_text)
 
-            await interaction.followup.send(f"Ticket erstellt: {ticket_channel.mention}", ephemeral=True)
-        finally:
-            self.creating_tickets_for.discard(user.id)
+        await self._finish_ticket_request(request, f"Ticket erstellt: {ticket_channel.mention}")
 
     # ------------------------------------------------------------------------
     # claim_ticket
@@ -263,7 +490,7 @@ class TicketCog(commands.Cog):
 
         await channel.set_permissions(interaction.user, view_channel=True, send_messages=True)
 
-        ticket_user_id = self.db.get_ticket_user(ticket_id)
+        ticket_user_id = await self.db.get_ticket_user(ticket_id)
         if ticket_user_id:
             ticket_user = guild.get_member(ticket_user_id)
             if ticket_user:
@@ -273,7 +500,7 @@ class TicketCog(commands.Cog):
         if viewer_role:
             await channel.set_permissions(viewer_role, view_channel=True, send_messages=False)
 
-        self.db.log_ticket_claimed(ticket_id, interaction.user.id)
+        await self.db.log_ticket_claimed(ticket_id, interaction.user.id)
 
         creator_name = "-".join(parts[:-1])
         claimer_name = interaction.user.name.replace(" ", "-")[:20]
@@ -313,16 +540,10 @@ class TicketCog(commands.Cog):
             await interaction.followup.send("Konnte Ticket-ID nicht bestimmen.", ephemeral=True)
             return
 
-        self.db.log_ticket_closed(ticket_id)
+        await self.db.log_ticket_closed(ticket_id)
         await channel.send("Ticket wird geschlossen. Bitte hier nichts mehr schreiben.")
 
-        messages = [msg async for msg in channel.history(limit=None, oldest_first=True)]
-        lines = []
-        for msg in messages:
-            ts = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            lines.append(f"[{ts}] {msg.author.display_name}: {msg.content}")
-        transcript_text = "\n".join(lines)
-        self.db.save_transcript(ticket_id, transcript_text)
+        await self.backfill_transcript(channel, ticket_id)
         await channel.send("Transkript wurde automatisch erstellt und gespeichert.")
 
         closed_cat = guild.get_channel(config.CLOSED_TICKETS_CATEGORY_ID)
@@ -370,19 +591,15 @@ class TicketCog(commands.Cog):
             ephemeral=True
         )
 
-        messages = [msg async for msg in channel.history(limit=None, oldest_first=True)]
-        lines = []
-        for msg in messages:
-            ts = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            lines.append(f"[{ts}] {msg.author.display_name}: {msg.content}")
-        transcript_text = "\n".join(lines)
-        self.db.save_transcript(ticket_id, transcript_text)
+        await self.backfill_transcript(channel, ticket_id)
 
-        self.db.log_ticket_deleted(ticket_id)
+        await self.db.log_ticket_deleted(ticket_id)
         await channel.send("Ticket-Kanal wird gelöscht...")
 
         self.ai_enabled_for_channel[channel.id] = False
         await channel.delete()
+        self.live_capture_channels.discard(channel.id)
+        self.ticket_ids_by_channel.pop(channel.id, None)
         print(f"[LOG] Ticket #{ticket_id} wurde von {interaction.user.name} gelöscht.")
 
     ############################################################################
@@ -390,11 +607,16 @@ class TicketCog(commands.Cog):
     ############################################################################
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
         if not message.guild:
             return
 
+        # Jede Nachricht in Ticket-Kanälen (auch vom Bot) direkt ins Transkript
+        if self.is_ticket_channel(message.channel):
+            await self.capture_message(message)
+
+        if message.author.bot:
+            return
+
         channel_id = message.channel.id
 
         # Wenn ein Supporter/Admin schreibt -> KI aus
@@ -416,9 +638,65 @@ class TicketCog(commands.Cog):
             return
 
         user_text = normalize_id_string(message.content)
-        self.conversations[channel_id].append({"role": "user", "content": user_text})
-
         print(f"[LOG] Neue Nachricht im Channel {channel_id} von {message.author.name}: {user_text}")
+        self.queue_turn(message, user_text)
+
+    def queue_turn(self, message: discord.Message, user_text: str):
+        """
+        Sammelt schnell aufeinanderfolgende Nachrichten eines Kanals zu einem Gesprächszug.
+        Jede neue Nachricht startet die Ruhezeit neu und bricht eine noch laufende,
+        überholte Bearbeitung ab, solange diese noch nichts gesendet hat.
+        """
+        channel_id = message.channel.id
+        self.pending_turn_texts[channel_id].append(user_text)
+
+        task = self.turn_tasks.get(channel_id)
+        if task and not task.done() and task not in self.committed_turns:
+            task.cancel()
+        self.turn_tasks[channel_id] = asyncio.create_task(self._run_turn(message))
+
+    async def _run_turn(self, message: discord.Message):
+        channel_id = message.channel.id
+        await asyncio.sleep(config.AI_TURN_QUIET_SECONDS)
+
+        # Pro Kanal immer nur ein Zug gleichzeitig -> conversations wird nie verschachtelt ergänzt
+        async with self.channel_locks[channel_id]:
+            texts = self.pending_turn_texts.pop(channel_id, [])
+            if not texts or not self.ai_enabled_for_channel.get(channel_id, False):
+                return
+            if len(texts) > 1:
+                print(f"[LOG] {len(texts)} Nachrichten im Channel {channel_id} zu einem Zug zusammengefasst.")
+
+            user_entry = {"role": "user", "content": "\n".join(texts)}
+            self.conversations[channel_id].append(user_entry)
+            try:
+                await self.process_turn(message, user_entry["content"])
+            except asyncio.CancelledError:
+                if asyncio.current_task() not in self.committed_turns:
+                    # Überholt, bevor etwas gesendet wurde: der nächste Zug übernimmt die Nachrichten
+                    conversation = self.conversations[channel_id]
+                    for i in range(len(conversation) - 1, -1, -1):
+                        if conversation[i] is user_entry:
+                            del conversation[i]
+                            break
+                    self.pending_turn_texts[channel_id][:0] = texts
+                raise
+            finally:
+                self.committed_turns.discard(asyncio.current_task())
+
+    def _commit_turn(self):
+        """
+        Ab hier hat der laufende Zug sichtbare Folgen (Nachricht, Zähler) und wird nicht mehr abgebrochen.
+        """
+        self.committed_turns.add(asyncio.current_task())
+
+    async def process_turn(self, message: discord.Message, user_text: str):
+        """
+        Bearbeitet einen Gesprächszug (eine oder mehrere zusammengefasste Nachrichten).
+        Vor jeder sichtbaren Aktion steht _commit_turn; bis dahin darf ein neuerer
+        Zug diesen abbrechen.
+        """
+        channel_id = message.channel.id
 
         # 1) Entschuldigung?
         apology_keywords = [
@@ -426,6 +704,7 @@ class TicketCog(commands.Cog):
             "schreibe mir eine entschuldigung", "schreibe mir ein statement"
         ]
         if any(kw in user_text.lower() for kw in apology_keywords):
+            self._commit_turn()
             await message.channel.send(
                 "Es tut mir leid, aber ich kann dir nicht helfen, eine Entschuldigung oder Stellungnahme zu verfassen. "
                 "Bitte erkläre mit eigenen Worten, was passiert ist."
@@ -435,6 +714,7 @@ class TicketCog(commands.Cog):
         # 2) Kooperativ?
         is_cooperative = await self.classify_cooperative(channel_id)
         if not is_cooperative:
+            self._commit_turn()
             self.uncooperative_count[channel_id] += 1
             if self.uncooperative_count[channel_id] >= 3:
                 await message.channel.send(
@@ -451,6 +731,7 @@ class TicketCog(commands.Cog):
         if not has_id:
             possible_ids = re.findall(r"\b[a-zA-Z0-9]{16,}\b", user_text)
             if not possible_ids:
+                self._commit_turn()
                 await message.channel.send(
                     "Bitte teile mir zuerst deine **ID** mit, damit ich deinen Banngrund prüfen kann."
                 )
@@ -465,20 +746,8 @@ class TicketCog(commands.Cog):
                     # OCR => attachments
                     attachments = data.get("attachments", [])
                     if attachments and isinstance(attachments, list):
-                        summaries = []
-                        for attachment_url in attachments:
-                            print(f"[LOG] Starte OCR für Anhang: {attachment_url}")
-                            full_ocr_text = await self._ocr_from_url(attachment_url)
-                            print(f"[LOG] OCR beendet. Länge des erkannten Textes: {len(full_ocr_text)} Zeichen.")
-
-                            if full_ocr_text.strip():
-                                print("[LOG] Starte Zusammenfassung des OCR-Texts...")
-                                summary = await self.summarize_ocr_text(full_ocr_text)
-                                print(f"[LOG] Zusammenfassung erstellt: {summary}")
-                                summaries.append(summary)
-                            else:
-                                print("[LOG] Kein Text erkannt (OCR-Ergebnis leer).")
-                                summaries.append("")
+                        async with message.channel.typing():
+                            summaries = await self.describe_attachments(attachments)
 
                         # Zusammenfassungen ins eigentliche reason einfließen lassen,
                         # ohne sie einzeln aufzuzählen
@@ -487,22 +756,27 @@ class TicketCog(commands.Cog):
                             if combined_summaries:
                                 reason += f" {combined_summaries}"
 
-                    # Banngrund durch die KI elaborieren
-                    expanded_reason = await self.elaborate_ban_reason(player_name, reason)
-
-                    # Endgültige Nachricht an den Spieler (ohne Bild-für-Bild-Erklärungen):
-                    ban_reply = (
-                        f"Hallo **{player_name}**,\n\n"
-                        f"{expanded_reason}\n\n"
-                        "Bitte gib jetzt deinen **Entbannungsantrag** dazu ab: "
-                        "Warum möchtest du entbannt werden und wie siehst du dein Verhalten?"
-                    )
-
-                    self.channel_has_id[channel_id] = (True, found_id)
-                    self.conversations[channel_id].append({"role": "assistant", "content": ban_reply})
-                    await message.channel.send(ban_reply)
+                    # Banngrund durch die KI elaborieren, direkt in die Antwort gestreamt
+                    greeting = f"Hallo **{player_name}**,\n\n"
+                    async with StreamingReply(message.channel, config.AI_STREAM_EDIT_INTERVAL, greeting) as reply:
+                        expanded_reason = await self.elaborate_ban_reason(player_name, reason, reply)
+
+                        # Endgültige Nachricht an den Spieler (ohne Bild-für-Bild-Erklärungen):
+                        ban_reply = (
+                            f"{greeting}"
+                            f"{expanded_reason}\n\n"
+                            "Bitte gib jetzt deinen **Entbannungsantrag** dazu ab: "
+                            "Warum möchtest du entbannt werden und wie siehst du dein Verhalten?"
+                        )
+
+                        self._commit_turn()
+                        self.channel_has_id[channel_id] = (True, found_id)
+                        self.conversations[channel_id].append({"role": "assistant", "content": ban_reply})
+                        await reply.finish(ban_reply)
+                    self._count_stream(reply)
                     return
                 else:
+                    self._commit_turn()
                     await message.channel.send(
                         "Diese ID ist mir nicht bekannt. Bitte überprüfe sie oder nenne mir eine andere ID."
                     )
@@ -510,6 +784,7 @@ class TicketCog(commands.Cog):
         else:
             # 4) Stellungnahme ausreichend?
             if self.is_sufficient_explanation(user_text, message.guild):
+                self._commit_turn()
                 admin_role = message.guild.get_role(config.ADMIN_ROLE_ID)
                 support_role = message.guild.get_role(config.SUPPORT_ROLE_ID)
 
@@ -526,126 +801,318 @@ class TicketCog(commands.Cog):
                 self.ai_enabled_for_channel[channel_id] = False
                 return
 
-            # Sonst -> KI fragt weiter
-            await asyncio.sleep(2)
-            try:
-                ai_reply = await self.generate_ai_response(channel_id)
-                if ai_reply:
-                    await message.channel.send(ai_reply)
-            except Exception as e:
-                print("[AI-Fehler]", e)
-                await message.channel.send("Entschuldige, es ist ein Fehler bei der KI-Anfrage aufgetreten.")
+            # Sonst -> KI fragt weiter (Antwort erscheint schrittweise)
+            async with StreamingReply(message.channel, config.AI_STREAM_EDIT_INTERVAL) as reply:
+                try:
+                    ai_reply = await self.generate_ai_response(channel_id, reply)
+                    self._commit_turn()
+                    if ai_reply:
+                        await reply.finish(ai_reply)
+                    else:
+                        await reply.discard()
+                except Exception as e:
+                    print("[AI-Fehler]", e)
+                    self._commit_turn()
+                    if reply.visible:
+                        # Abbruch mitten im Stream: Bisheriges stehen lassen, nur den Cursor entfernen
+                        await reply.finish(reply.text.rstrip() + " …")
+                    else:
+                        await reply.finish("Entschuldige, es ist ein Fehler bei der KI-Anfrage aufgetreten.")
+            self._count_stream(reply)
+
+    # ------------------------------------------------------------------------
+    # Live-Mitschnitt der Ticket-Kanäle
+    # ------------------------------------------------------------------------
+    async def get_ticket_id_for_channel(self, channel) -> int:
+        if channel.id not in self.ticket_ids_by_channel:
+            self.ticket_ids_by_channel[channel.id] = await self.db.get_ticket_id_by_channel(channel.id)
+        return self.ticket_ids_by_channel[channel.id]
+
+    async def capture_message(self, message: discord.Message):
+        """
+        Schreibt eine neue Nachricht sofort ins Transkript. Ist der Kanal seit dem
+        Bot-Start lückenlos erfasst, rückt zusätzlich der Checkpoint nach.
+        Andernfalls wird die Lücke seit dem letzten Checkpoint einmalig im Hintergrund geschlossen.
+        """
+        ticket_id = await self.get_ticket_id_for_channel(message.channel)
+        if ticket_id is None:
+            return
+
+        channel_id = message.channel.id
+        is_live = channel_id in self.live_capture_channels
+        await self.db.append_transcript_messages(
+            ticket_id,
+            [message_to_transcript_row(message)],
+            checkpoint=message.id if is_live else None
+        )
+        if not is_live and channel_id not in self.backfilling_channels:
+            # Referenz halten, sonst kann der Task mitten im Lauf eingesammelt werden
+            task = asyncio.create_task(self.backfill_transcript(message.channel, ticket_id))
+            self.backfill_tasks.add(task)
+            task.add_done_callback(self._backfill_done)
+
+    def _backfill_done(self, task: asyncio.Task):
+        self.backfill_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[ERROR] [TicketCog] Transkript-Abgleich fehlgeschlagen: {task.exception()!r}")
+
+    async def backfill_transcript(self, channel: discord.TextChannel, ticket_id: int):
+        """
+        Lädt nur die Kanal-History nach dem letzten Checkpoint nach.
+        Für Kanäle, die seit dem Start live erfasst werden, gibt es keine Lücke -> kein REST-Aufruf.
+        """
+        if channel.id in self.live_capture_channels:
+            return
+        epoch = self.live_capture_epoch
+        self.backfilling_channels.add(channel.id)
+        try:
+            _, complete = await sync_transcript(self.db, channel, ticket_id)
+            if complete and epoch == self.live_capture_epoch:
+                self.live_capture_channels.add(channel.id)
+        finally:
+            self.backfilling_channels.discard(channel.id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if "content" not in payload.data:
+            return
+        channel = self.bot.get_channel(payload.channel_id)
+        if not channel or not self.is_ticket_channel(channel):
+            return
+        edited_at = format_transcript_time(payload.data.get("edited_timestamp"))
+        await self.db.update_transcript_message(payload.message_id, payload.data["content"], edited_at)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        channel = self.bot.get_channel(payload.channel_id)
+        if not channel or not self.is_ticket_channel(channel):
+            return
+        await self.db.mark_transcript_messages_deleted(
+            [payload.message_id], format_transcript_time()
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        channel = self.bot.get_channel(payload.channel_id)
+        if not channel or not self.is_ticket_channel(channel):
+            return
+        await self.db.mark_transcript_messages_deleted(
+            payload.message_ids, format_transcript_time()
+        )
 
     # ------------------------------------------------------------------------
     # OCR-Methoden
     # ------------------------------------------------------------------------
-    async def _ocr_from_url(self, image_url: str) -> str:
+    async def _download_image(self, image_url: str):
         """
-        Lädt das Bild, führt OCR via pytesseract aus und gibt den erkannten Text zurück.
+        Lädt ein Bild herunter. Liefert die Bytes oder None.
+        Gelesen wird in Blöcken; größere Dateien als OCR_MAX_DOWNLOAD_BYTES werden
+        abgebrochen, ohne sie vollständig in den Speicher zu laden.
         """
         print(f"[LOG] [OCR] Versuche, Bild herunterzuladen: {image_url}")
+        limit = config.OCR_MAX_DOWNLOAD_BYTES
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as resp:
-                    if resp.status == 200:
-                        image_bytes = await resp.read()
-                        img = Image.open(io.BytesIO(image_bytes))
-                        print("[LOG] [OCR] Bild erfolgreich geladen, starte Tesseract...")
-                        text = pytesseract.image_to_string(img, lang="deu")
-                        print("[LOG] [OCR] Tesseract fertig.")
-                        return text
-                    else:
-                        print(f"[ERROR] [OCR] Download fehlgeschlagen, Status: {resp.status}")
-                        return ""
-        except Exception as e:
+            async with self.http.get(image_url) as resp:
+                if resp.status != 200:
+                    print(f"[ERROR] [OCR] Download fehlgeschlagen, Status: {resp.status}")
+                    return None
+                if (resp.content_length or 0) > limit:
+                    print(f"[WARN] [OCR] {image_url} ist {resp.content_length} Bytes groß, Limit {limit}.")
+                    return None
+                data = bytearray()
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    data += chunk
+                    if len(data) > limit:
+                        print(f"[WARN] [OCR] {image_url} überschreitet {limit} Bytes, Download abgebrochen.")
+                        return None
+                return bytes(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] [OCR] Download von {image_url} fehlgeschlagen: {e}")
+        return None
+
+    async def _read_attachment(self, image_url: str):
+        """
+        Stufe 1 der Anhang-Pipeline: Download + OCR, beides möglichst aus dem OCR-Cache:
+        1) URL schon bekannt -> kein Download, kein Tesseract
+        2) gleicher Bildinhalt (SHA-256) unter anderer URL -> kein Tesseract
+        3) sonst Tesseract
+
+        Liefert [sha256, ocr_text, summary] oder None, wenn das Bild nicht lesbar war.
+        summary ist None, solange es noch keine (erfolgreiche) Zusammenfassung gibt.
+        """
+        cached = await self.db.get_ocr_cache(url=image_url)
+        if cached:
+            sha256, hit = cached["sha256"], "url_hits"
+        else:
+            image_bytes = await self._download_image(image_url)
+            if image_bytes is None:
+                return None
+            sha256, hit = hashlib.sha256(image_bytes).hexdigest(), "content_hits"
+            cached = await self.db.get_ocr_cache(sha256=sha256)
+
+        if cached and cached["summary"] is not None:
+            await self.db.touch_ocr_cache(sha256, url=image_url)
+            self._count_ocr_cache(hit, image_url)
+            return [sha256, cached["ocr_text"], cached["summary"]]
+        self._count_ocr_cache("misses", image_url)
+
+        if cached:
+            # Text ist bekannt, nur die Zusammenfassung war beim letzten Mal fehlgeschlagen
+            return [sha256, cached["ocr_text"], None]
+
+        print("[LOG] [OCR] Bild erfolgreich geladen, starte Tesseract...")
+        try:
+            ocr_text = await ocr.extract(image_bytes)
+        except ocr.OcrError as e:
             print(f"[ERROR] [OCR] Fehler bei OCR von {image_url}: {e}")
-            return ""
+            return None
+        print(f"[LOG] [OCR] Tesseract fertig, {len(ocr_text)} Zeichen erkannt.")
+        return [sha256, ocr_text, None]
+
+    async def describe_attachments(self, image_urls: list) -> list:
+        """
+        Liefert die Zusammenfassungen der Beweis-Screenshots (Reihenfolge wie image_urls,
+        nicht lesbare Anhänge fehlen).
+        - Download + OCR laufen parallel, höchstens ATTACHMENT_CONCURRENCY gleichzeitig.
+        - Was nach ATTACHMENT_TIMEOUT nicht fertig ist, wird abgebrochen und weggelassen,
+          damit ein hängender Anhang nicht die ganze Antwort aufhält.
+        - Alle noch fehlenden Zusammenfassungen kommen aus einem einzigen OpenAI-Request.
+        - Wird der Zug überholt (abgebrochen), werden laufende Downloads/OCR-Jobs abgebrochen
+          und schon gelesene Texte trotzdem gecacht.
+        """
+        slots = asyncio.Semaphore(config.ATTACHMENT_CONCURRENCY)
+
+        async def read(image_url):
+            async with slots:
+                return await self._read_attachment(image_url)
+
+        tasks = [asyncio.create_task(read(url)) for url in image_urls]
+        superseded = False
+        try:
+            await asyncio.wait(tasks, timeout=config.ATTACHMENT_TIMEOUT)
+        except asyncio.CancelledError:
+            # Zug von einer neueren Nachricht überholt: Fertiges noch cachen, dann abbrechen
+            superseded = True
+        # Hängende (Zeitlimit) bzw. alle Anhänge (überholt) abbrechen - keine verwaisten Downloads/OCR-Jobs
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending and not superseded:
+            print(
+                f"[WARN] [OCR] {len(pending)} von {len(tasks)} Anhängen nach "
+                f"{config.ATTACHMENT_TIMEOUT:.0f}s abgebrochen, fahre ohne sie fort."
+            )
 
-    async def summarize_ocr_text(self, ocr_text: str) -> str:
+        results = []
+        for image_url, task in zip(image_urls, tasks):
+            if task in pending:
+                continue
+            if task.exception() is not None:
+                print(f"[ERROR] [OCR] Anhang {image_url} fehlgeschlagen: {task.exception()!r}")
+            elif task.result() is not None:
+                results.append([image_url] + task.result())
+
+        new = [r for r in results if r[3] is None]
+        to_summarize = [r for r in new if r[2].strip()]
+        if to_summarize and not superseded:
+            try:
+                summaries = await self.summarize_ocr_texts([r[2] for r in to_summarize])
+                for result, summary in zip(to_summarize, summaries):
+                    result[3] = summary
+            except asyncio.CancelledError:
+                superseded = True
+        for result in new:
+            if not result[2].strip():
+                result[3] = ""
+
+        # summary None = OpenAI-Fehler oder Zug überholt -> OCR-Text trotzdem cachen,
+        # Zusammenfassung beim nächsten Mal erneut (shield: auch bei erneutem Abbruch zu Ende schreiben)
+        await asyncio.shield(asyncio.gather(*(
+            self.db.put_ocr_cache(image_url, sha256, ocr_text, summary, config.OCR_CACHE_MAX_CHARS)
+            for image_url, sha256, ocr_text, summary in new
+        )))
+        if superseded:
+            raise asyncio.CancelledError
+        return [summary for _, _, _, summary in results if summary]
+
+    def _count_ocr_cache(self, outcome: str, image_url: str):
+        self.ocr_cache_stats[outcome] += 1
+        stats = self.ocr_cache_stats
+        print(
+            f"[LOG] [OCR-Cache] {outcome}: {image_url} "
+            f"(URL-Treffer {stats['url_hits']}, Inhalts-Treffer {stats['content_hits']}, "
+            f"Fehlschläge {stats['misses']})"
+        )
+
+    async def summarize_ocr_texts(self, ocr_texts: list) -> list:
         """
-        Erstellt via GPT eine kurze Zusammenfassung des OCR-Textes,
-        ohne diesen 1:1 zu wiederholen.
+        Erstellt via GPT in einem einzigen Request je eine kurze Zusammenfassung
+        pro OCR-Text, ohne diese 1:1 zu wiederholen.
+        Liefert eine Liste gleicher Länge; None steht für eine fehlgeschlagene Zusammenfassung.
         """
-        print("[LOG] [OCR] Starte Zusammenfassungs-Request an OpenAI.")
+        print(f"[LOG] [OCR] Starte Zusammenfassungs-Request an OpenAI ({len(ocr_texts)} Texte).")
         system_prompt = (
-            "Du bist ein Assistent, der aus dem folgenden OCR-Text "
-            "eine kurze, deutsche Zusammenfassung erstellt. "
+            "Du bist ein Assistent, der aus OCR-Texten von Screenshots "
+            "jeweils eine kurze, deutsche Zusammenfassung erstellt. "
             "Bitte verwende Du-Formulierung falls angemessen. "
-            "Verzichte auf exaktes Zitieren langer Passagen."
+            "Verzichte auf exaktes Zitieren langer Passagen. "
+            'Antworte nur mit JSON der Form {"summaries": ["...", "..."]}, '
+            "genau eine Zusammenfassung pro OCR-Text in derselben Reihenfolge."
         )
-        user_prompt = f"OCR-Text:\n{ocr_text}\n\nErstelle eine kurze Zusammenfassung:"
+        user_prompt = "\n\n".join(
+            f"OCR-Text {i}:\n{text}" for i, text in enumerate(ocr_texts, 1)
+        )
+        user_prompt += f"\n\nErstelle {len(ocr_texts)} kurze Zusammenfassungen:"
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
 
-        loop = asyncio.get_running_loop()
-
-        def sync_call():
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=messages,
-                max_tokens=200,
-                temperature=0.7
-            )
-            return response
-
         try:
-            response = await loop.run_in_executor(None, sync_call)
-            summary = response.choices[0].message.content.strip()
-            print("[LOG] [OCR] Zusammenfassung erfolgreich erhalten.")
-            return summary
+            content = await self.llm.complete(
+                messages,
+                max_tokens=200 * len(ocr_texts),
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
+            summaries = json.loads(content)["summaries"]
+            if not isinstance(summaries, list) or len(summaries) != len(ocr_texts):
+                raise ValueError(f"{len(ocr_texts)} Zusammenfassungen erwartet, Antwort: {summaries!r}")
+            print("[LOG] [OCR] Zusammenfassungen erfolgreich erhalten.")
+            return [str(summary).strip() or None for summary in summaries]
         except Exception as e:
-            print("[Fehler bei summarize_ocr_text]", e)
-            return ""
+            print("[Fehler bei summarize_ocr_texts]", e)
+            return [None] * len(ocr_texts)
 
     # ------------------------------------------------------------------------
     # KI-Hilfsmethoden
     # ------------------------------------------------------------------------
     async def classify_cooperative(self, channel_id: int) -> bool:
         recent_messages = self.conversations[channel_id][-6:]
-        system_prompt = {
-            "role": "system",
-            "content": (
-                "Du bist ein Evaluations-Assistent. Prüfe die folgenden Nachrichten kurz "
-                "und entscheide, ob der Nutzer 'unkooperativ' ist oder nicht. "
-                "Beleidigungen, aggressives Verhalten, ignoriert alle Fragen => unkooperativ. "
-                "Wenn der Nutzer einigermaßen höflich/sachlich ist => cooperative. "
-                "Antworte nur mit 'uncooperative' oder 'cooperative'."
-            )
-        }
 
-        messages_for_ai = [system_prompt] + recent_messages
-        loop = asyncio.get_running_loop()
+        # Meist reicht der lokale Klassifikator (Mikrosekunden statt eines OpenAI-Aufrufs)
+        cooperative, p = self.cooperation.decide(recent_messages, config.COOPERATION_CONFIDENCE)
+        if cooperative is not None:
+            print(f"[LOG] Kooperation lokal entschieden (p_unkooperativ={p:.2f}, Channel: {channel_id})")
+            return cooperative
+        print(f"[LOG] Kooperation unsicher (p_unkooperativ={p:.2f}), frage das LLM (Channel: {channel_id})")
 
-        def sync_call():
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=messages_for_ai,
-                max_tokens=5,
-                temperature=0.0
-            )
-            return response
+        messages_for_ai = [{"role": "system", "content": LLM_SYSTEM_PROMPT}] + recent_messages
 
         try:
-            response = await loop.run_in_executor(None, sync_call)
-            classification = response.choices[0].message.content.strip().lower()
-
-            if "uncooperative" in classification:
-                return False
-            elif "cooperative" in classification:
-                return True
-            elif classification.startswith("un"):
-                return False
-            else:
-                return True
+            return parse_llm_label(await self.llm.complete(
+                messages_for_ai,
+                max_tokens=5,
+                temperature=0.0
+            ))
         except Exception as e:
             print("[Fehler in classify_cooperative]", e)
             return True
 
-    async def elaborate_ban_reason(self, player_name: str, reason: str) -> str:
+    async def elaborate_ban_reason(self, player_name: str, reason: str, reply: StreamingReply = None) -> str:
         """
         Spreche den Spieler direkt in Du-Form an, ohne weitere Begrüßung.
+        Mit reply wird der Text schon während der Erzeugung angezeigt.
         """
         prompt_messages = [
             {
@@ -668,21 +1135,19 @@ class TicketCog(commands.Cog):
             }
         ]
 
-        loop = asyncio.get_running_loop()
-
-        def sync_call():
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=prompt_messages,
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response
-
+        elaboration = ""
         try:
-            response = await loop.run_in_executor(None, sync_call)
-            elaboration = response.choices[0].message.content.strip()
-            return elaboration
+            # aclosing: bei Abbruch wird der Stream (und sein LLM-Platz) sofort freigegeben
+            async with contextlib.aclosing(
+                self.llm.stream(prompt_messages, max_tokens=1000, temperature=0.7)
+            ) as stream:
+                async for delta in stream:
+                    if reply is not None:
+                        if not reply.visible:
+                            self._commit_turn()
+                        await reply.feed(delta)
+                    elaboration += delta
+            return elaboration.strip()
         except Exception as e:
             print("[Fehler bei elaborate_ban_reason]", e)
             return (
@@ -690,7 +1155,11 @@ class TicketCog(commands.Cog):
                 "Bitte erkläre, warum es aus deiner Sicht dazu kam."
             )
 
-    async def generate_ai_response(self, channel_id: int) -> str:
+    async def generate_ai_response(self, channel_id: int, reply: StreamingReply) -> str:
+        """
+        Nächste Antwort von Siegrid; wird während der Erzeugung in reply angezeigt.
+        Ab dem ersten sichtbaren Token ist der Zug nicht mehr abbrechbar.
+        """
         conversation = self.conversations[channel_id]
         system_msg = {
             "role": "system",
@@ -703,19 +1172,19 @@ class TicketCog(commands.Cog):
 
         recent = conversation[-10:]
         messages_for_openai = [system_msg] + recent
-        loop = asyncio.get_running_loop()
-
-        def sync_call():
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=messages_for_openai,
-                max_tokens=self.openai_max_tokens,
-                temperature=self.openai_temp
-            )
-            return response
 
-        response = await loop.run_in_executor(None, sync_call)
-        ai_text = response.choices[0].message.content.strip()
+        ai_text = ""
+        async with contextlib.aclosing(self.llm.stream(
+            messages_for_openai,
+            max_tokens=self.openai_max_tokens,
+            temperature=self.openai_temp
+        )) as stream:
+            async for delta in stream:
+                if not reply.visible:
+                    self._commit_turn()
+                await reply.feed(delta)
+                ai_text += delta
+        ai_text = ai_text.strip()
 
         self.conversations[channel_id].append({
             "role": "assistant",
@@ -723,6 +1192,30 @@ class TicketCog(commands.Cog):
         })
         return ai_text
 
+    def _count_stream(self, reply: StreamingReply):
+        if not reply.visible:
+            return
+        stats = self.stream_stats
+        first_ms = int(reply.first_visible * 1000)
+        stats["replies"] += 1
+        stats["first_visible_ms"] += first_ms
+        stats["max_first_visible_ms"] = max(stats["max_first_visible_ms"], first_ms)
+        stats["messages"] += len(reply.messages)
+        stats["edits"] += reply.edits
+        print(
+            f"[LOG] KI-Antwort gestreamt: erstes Token nach {first_ms}ms sichtbar, "
+            f"{len(reply.messages)} Nachricht(en), {reply.edits} Bearbeitungen."
+        )
+
+    def format_stream_stats(self) -> str:
+        stats = self.stream_stats
+        replies = stats["replies"] or 1
+        return (
+            f"{stats['replies']} Antworten, erstes Token Ø {stats['first_visible_ms'] / replies:.0f}ms "
+            f"(max {stats['max_first_visible_ms']}ms), {stats['messages']} Nachrichten, "
+            f"Ø {stats['edits'] / replies:.1f} Bearbeitungen"
+        )
+
     # ------------------------------------------------------------------------
     # Hilfsprüfungen
     # ------------------------------------------------------------------------
@@ -746,12 +1239,18 @@ class TicketCog(commands.Cog):
         ]
 
     async def fetch_detail_data(self, pid: str):
-        url = f"http://api.hackletloose.eu/detail/{pid}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    return await resp.json()
+        """
+        Ban-Details zu einer Spieler-ID (None = unbekannt oder API nicht erreichbar).
+        """
+        return await self.ban_details.get(pid)
+
+    async def _fetch_detail_upstream(self, pid: str):
+        # 404 = unbekannte ID (wird kurz gecacht), andere Fehlerstatus werfen und werden nicht gecacht
+        async with self.http.get(f"{config.BAN_API_BASE}/detail/{pid}") as resp:
+            if resp.status == 404:
                 return None
+            resp.raise_for_status()
+            return await resp.json()
 
 
 def setup(bot: commands.Bot):
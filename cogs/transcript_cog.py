@@ -4,11 +4,12 @@ import discord
 from discord.ext import commands
 
 from utils import config, database
+from utils.transcript_builder import sync_transcript
 
 class TranscriptCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = database.Database()
+        self.db = database.get_async_database()
 
     @commands.slash_command(
         name="ticket_transcript",
@@ -29,17 +30,15 @@ class TranscriptCog(commands.Cog):
             await ctx.respond("Konnte keine Ticket-ID erkennen.", ephemeral=True)
             return
 
-        messages = [msg async for msg in channel.history(limit=None, oldest_first=True)]
+        # Nachladen kann bei langen Tickets dauern -> Interaktion nicht verfallen lassen
+        await ctx.defer()
 
-        transcript_lines = []
-        for msg in messages:
-            timestamp = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            transcript_lines.append(f"[{timestamp}] {msg.author.display_name}: {msg.content}")
-
-        transcript_text = "\n".join(transcript_lines)
-        
-        # NEU: in DB speichern
-        self.db.save_transcript(ticket_id, transcript_text)
+        # Der TicketCog schreibt Nachrichten live mit, hier wird nur eine evtl. Lücke geschlossen
+        ticket_cog = self.bot.get_cog("TicketCog")
+        if ticket_cog:
+            await ticket_cog.backfill_transcript(channel, ticket_id)
+        else:
+            await sync_transcript(self.db, channel, ticket_id)
 
         await ctx.respond(f"Transkript für Ticket #{ticket_id} wurde erstellt und in der DB gespeichert.")
 
@@ -4,7 +4,7 @@ import discord
 from discord.ext import commands
 
 from utils import config
-from utils.database import Database
+from utils.database import get_async_database
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -17,7 +17,8 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 # Unsere Cogs
 initial_cogs = [
     "cogs.ticket_cog",
-    "cogs.transcript_cog"
+    "cogs.transcript_cog",
+    "cogs.member_sync_cog"
 ]
 
 @bot.event
@@ -107,9 +108,9 @@ async def on_ready():
         print(f"[ERROR] Fehler beim Syncen der Slash-Befehle: {e}")
 
     # 3) Falls wir schon eine Ticket-Button-Nachricht in der DB haben, View erneut dranheften
-    db = Database()
-    channel_id = db.get_bot_setting("TICKET_BUTTON_CHANNEL_ID")
-    message_id = db.get_bot_setting("TICKET_BUTTON_MESSAGE_ID")
+    db = get_async_database()
+    channel_id = await db.get_bot_setting("TICKET_BUTTON_CHANNEL_ID")
+    message_id = await db.get_bot_setting("TICKET_BUTTON_MESSAGE_ID")
 
     if channel_id and message_id:
         try:
@@ -137,7 +138,7 @@ async def on_ready():
 
     # 4) Admin-Buttons bei offenen Tickets wiederherstellen
     try:
-        open_tickets = db.get_open_or_claimed_tickets()
+        open_tickets = await db.get_open_or_claimed_tickets()
         if not open_tickets:
             print("[LOG] Keine offenen/claimed Tickets zu aktualisieren.")
         else:
@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# utils.config bricht ohne BOT_TOKEN ab; für Tests reicht ein Platzhalter
+os.environ.setdefault("BOT_TOKEN", "test-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,106 @@
+# tests/test_attachments.py
+
+import asyncio
+import contextlib
+import io
+import json
+from collections import Counter
+
+import pytest
+
+from cogs import ticket_cog
+from utils import database, ocr
+
+
+class FakeLlm:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        count = messages[1]["content"].count("OCR-Text ")
+        return json.dumps({"summaries": [f"Zusammenfassung {i}" for i in range(count)]})
+
+
+class AttachmentCog(ticket_cog.TicketCog):
+    """
+    Nur was describe_attachments braucht: DB, OCR-Cache-Statistik, LLM und ein Download ohne Netz.
+    """
+
+    def __init__(self, path: str, llm_delay: float):
+        self.db = database.AsyncDatabase(path)
+        self.ocr_cache_stats = Counter()
+        self.llm = FakeLlm(llm_delay)
+        self.downloads = 0
+
+    async def _download_image(self, url):
+        self.downloads += 1
+        return url.encode()
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    state = Counter()
+
+    async def extract(image_bytes):
+        state["calls"] += 1
+        state["running"] += 1
+        try:
+            await asyncio.sleep(5 if b"slow" in image_bytes else 0.05)
+            return "Text " + image_bytes.decode()
+        finally:
+            state["running"] -= 1
+
+    monkeypatch.setattr(ocr, "extract", extract)
+    return state
+
+
+async def cancel_after(coro, delay: float):
+    task = asyncio.create_task(coro)
+    await asyncio.sleep(delay)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_superseded_turn_cancels_ocr_and_caches_finished_texts(tmp_path, fake_ocr):
+    urls = ["https://cdn/a.png", "https://cdn/b.png", "https://cdn/slow1.png", "https://cdn/slow2.png"]
+
+    async def scenario():
+        cog = AttachmentCog(str(tmp_path / "ocr.sqlite"), llm_delay=0.05)
+        await cancel_after(cog.describe_attachments(urls), 0.5)
+        await asyncio.sleep(0.05)
+        # Keine verwaisten OCR-Jobs mehr
+        assert fake_ocr["running"] == 0
+
+        cog.downloads = 0
+        fake_ocr["calls"] = 0
+        summaries = await cog.describe_attachments(urls[:2])
+        # Schon gelesene Anhänge kommen aus dem Cache, nur die Zusammenfassung fehlt noch
+        assert summaries == ["Zusammenfassung 0", "Zusammenfassung 1"]
+        assert cog.downloads == 0
+        assert fake_ocr["calls"] == 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(scenario())
+
+
+def test_superseded_during_summary_still_caches_ocr(tmp_path, fake_ocr):
+    urls = ["https://cdn/c.png", "https://cdn/d.png"]
+
+    async def scenario():
+        cog = AttachmentCog(str(tmp_path / "ocr.sqlite"), llm_delay=2)
+        await cancel_after(cog.describe_attachments(urls), 0.5)
+        assert cog.llm.calls == 1
+
+        cog.downloads = 0
+        fake_ocr["calls"] = 0
+        cog.llm.delay = 0.05
+        assert await cog.describe_attachments(urls) == ["Zusammenfassung 0", "Zusammenfassung 1"]
+        assert cog.downloads == 0
+        assert fake_ocr["calls"] == 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(scenario())
@@ -0,0 +1,78 @@
+# tests/test_ban_details.py
+
+import asyncio
+import contextlib
+import io
+import time
+
+from utils import database
+from utils.ban_details import BanDetailCache
+
+MAX_ENTRIES = 4
+
+
+class FakeBanApi:
+    """
+    Bekannt sind alle IDs außer "unbekannt-*"; calls zählt die Abfragen.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    async def fetch(self, pid: str):
+        self.calls.append(pid)
+        if pid.startswith("unbekannt"):
+            return None
+        return {"reason": f"Teamkill {pid}", "player_name": pid}
+
+
+def run_with_cache(tmp_path, test, negative_ttl: float = 3600):
+    async def main():
+        db = database.AsyncDatabase(str(tmp_path / "bans.sqlite"))
+        api = FakeBanApi()
+        cache = BanDetailCache(db, api.fetch, ttl=3600, negative_ttl=negative_ttl, max_entries=MAX_ENTRIES)
+        try:
+            await test(cache, api)
+        finally:
+            db.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(main())
+
+
+def test_full_memory_evicts_least_recently_used(tmp_path):
+    async def test(cache, api):
+        for i in range(MAX_ENTRIES):
+            await cache.get(f"id-{i}")
+        # id-0 wird wieder abgefragt und ist damit nicht mehr der älteste Eintrag
+        await cache.get("id-0")
+        for i in range(MAX_ENTRIES, MAX_ENTRIES + 2):
+            await cache.get(f"id-{i}")
+
+        assert list(cache._memory) == ["id-3", "id-0", "id-4", "id-5"]
+        cache.stats.clear()
+        for pid in ("id-0", "id-3", "id-4", "id-5"):
+            assert (await cache.get(pid))["player_name"] == pid
+        assert cache.stats["memory_hits"] == MAX_ENTRIES
+
+        # Verdrängte Einträge kommen aus SQLite, nicht erneut von der API
+        assert (await cache.get("id-1"))["player_name"] == "id-1"
+        assert cache.stats["db_hits"] == 1
+        assert len(api.calls) == MAX_ENTRIES + 2
+
+    run_with_cache(tmp_path, test)
+
+
+def test_full_memory_drops_expired_entries_first(tmp_path):
+    async def test(cache, api):
+        await cache.get("id-0")
+        await cache.get("unbekannt-1")
+        for i in range(2, MAX_ENTRIES):
+            await cache.get(f"id-{i}")
+        time.sleep(0.1)
+
+        await cache.get("id-9")
+        # Der älteste gültige Eintrag bleibt, das abgelaufene Negativergebnis fliegt
+        assert list(cache._memory) == ["id-0", "id-2", "id-3", "id-9"]
+
+    run_with_cache(tmp_path, test, negative_ttl=0.05)
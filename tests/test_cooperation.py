@@ -0,0 +1,41 @@
+# tests/test_cooperation.py
+
+import pytest
+
+from utils.cooperation import CooperationClassifier, extract_features
+
+THRESHOLD = 0.85
+
+
+def history(text: str) -> list:
+    return [{"role": "assistant", "content": "Bitte nenne deine ID."}, {"role": "user", "content": text}]
+
+
+@pytest.mark.parametrize("text", [
+    # Unkooperativ laut Prompt, aber ohne Schimpfwort -> die Wortliste weiß es nicht
+    "Was soll der Mist? Ich antworte nicht auf eure Fragen.",
+    "Gib mir sofort meinen Account zurück, das ist Betrug",
+    "Hallo, ich habe leider einen Teamkill gemacht, tut mir leid.",
+    # Ein einzelner Treffer reicht nicht für eine sichere Entscheidung
+    "du idiot",
+])
+def test_lexicon_only_never_decides_cooperative_locally(text):
+    classifier = CooperationClassifier()
+    cooperative, _ = classifier.decide(history(text), THRESHOLD)
+    assert cooperative is None
+    assert classifier.stats["escalated"] == 1
+
+
+def test_lexicon_only_decides_clear_hostility_locally():
+    classifier = CooperationClassifier()
+    cooperative, p = classifier.decide(history("Halt die Fresse du Penner, ist mir egal"), THRESHOLD)
+    assert cooperative is False
+    assert p >= THRESHOLD
+    assert classifier.stats["local"] == 1
+
+
+def test_trained_model_decides_both_ways():
+    messages = history("Hallo, ich habe leider einen Teamkill gemacht, tut mir leid.")
+    weights = {i: -1.0 for i in extract_features(messages)}
+    classifier = CooperationClassifier(bias=-1.0, weights=weights, trained=True)
+    assert classifier.decide(messages, THRESHOLD)[0] is True
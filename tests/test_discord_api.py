@@ -0,0 +1,146 @@
+# tests/test_discord_api.py
+"""
+discord_api gegen einen lokalen Stand-in für die Discord-API (http.server im Thread):
+Wiederholungen bei 429/5xx, Retry-After-Obergrenze, kein Retry des OAuth-Codes
+nach 5xx, Verbindungswiederverwendung und Zeitlimits.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import config
+from webapp import discord_api
+
+
+class DiscordStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        # Pfad -> Liste geplanter Antworten (status, headers, delay); danach immer 200
+        self.script = defaultdict(list)
+        self.requests = []
+        self.client_ports = set()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei Discord
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        path = self.path[len("/api"):]
+        self.server.requests.append((self.command, path))
+        self.server.client_ports.add(self.client_address[1])
+        script = self.server.script[path]
+        status, headers, delay = script.pop(0) if script else (200, {}, 0)
+        time.sleep(delay)
+        body = json.dumps({"id": "42"}).encode()
+        try:
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = DiscordStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(config, "DISCORD_API_BASE", server.base_url)
+    monkeypatch.setattr(config, "DISCORD_CONNECT_TIMEOUT", 1.0)
+    monkeypatch.setattr(config, "DISCORD_READ_TIMEOUT", 1.0)
+    # Frische Session, damit die Adapter für die Stub-URL gemountet werden
+    monkeypatch.setattr(discord_api, "_session", None)
+    yield server
+    session = discord_api._session
+    if session is not None:
+        session.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_retries_after_rate_limit(stub):
+    stub.script["/users/@me"] = [(429, {"Retry-After": "0.2"}, 0)]
+    start = time.perf_counter()
+    response = discord_api.fetch_user("Bearer x")
+    assert response.status_code == 200
+    assert stub.requests == [("GET", "/users/@me")] * 2
+    # Sekundenbruchteile aus Retry-After werden eingehalten
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_get_gives_up_after_two_retries(stub):
+    stub.script["/users/@me"] = [(503, {}, 0)] * 5
+    response = discord_api.fetch_user("Bearer x")
+    assert response.status_code == 503
+    assert len(stub.requests) == 3
+
+
+def test_retry_after_is_capped(stub, monkeypatch):
+    monkeypatch.setattr(discord_api, "MAX_RETRY_AFTER", 0.2)
+    stub.script["/users/@me"] = [(429, {"Retry-After": "60"}, 0)]
+    start = time.perf_counter()
+    assert discord_api.fetch_user("Bearer x").status_code == 200
+    assert time.perf_counter() - start < 2
+
+
+def test_code_exchange_is_not_retried_after_server_error(stub):
+    stub.script["/oauth2/token"] = [(502, {}, 0)]
+    assert discord_api.exchange_code("code").status_code == 502
+    assert stub.requests == [("POST", "/oauth2/token")]
+
+
+def test_code_exchange_is_retried_after_rate_limit(stub):
+    stub.script["/oauth2/token"] = [(429, {"Retry-After": "0.1"}, 0)]
+    assert discord_api.exchange_code("code").status_code == 200
+    assert stub.requests == [("POST", "/oauth2/token")] * 2
+
+
+def test_session_reuses_connections(stub):
+    for _ in range(5):
+        assert discord_api.fetch_user("Bearer x").status_code == 200
+    assert len(stub.requests) == 5
+    assert len(stub.client_ports) == 1
+
+
+def test_user_and_member_are_fetched_in_parallel(stub):
+    stub.script["/users/@me"] = [(200, {}, 0.3)]
+    stub.script["/users/@me/guilds/7/member"] = [(200, {}, 0.3)]
+    start = time.perf_counter()
+    user, member = discord_api.fetch_user_and_member("Bearer x", 7)
+    assert (user.status_code, member.status_code) == (200, 200)
+    assert time.perf_counter() - start < 0.55
+
+
+def test_code_exchange_read_timeout_is_not_retried(stub, monkeypatch):
+    monkeypatch.setattr(config, "DISCORD_READ_TIMEOUT", 0.2)
+    stub.script["/oauth2/token"] = [(200, {}, 1.0)]
+    start = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException, match="Read timed out"):
+        discord_api.exchange_code("code")
+    assert time.perf_counter() - start < 0.9
+    assert stub.requests == [("POST", "/oauth2/token")]
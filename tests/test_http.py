@@ -0,0 +1,116 @@
+# tests/test_http.py
+"""
+HttpClient gegen einen lokalen aiohttp-Stub-Server: Keep-Alive, Limit pro Host,
+Zeitlimits und Statistik.
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http import HttpClient
+
+
+class Stub:
+    def __init__(self):
+        self.peers = set()
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(float(request.query.get("delay", 0)))
+            return web.Response(status=int(request.query.get("status", 200)), text="ok")
+        finally:
+            self.active -= 1
+
+
+def run_with_stub(test):
+    """
+    Startet den Stub, führt test(stub, base_url) aus und räumt danach auf.
+    """
+    async def main():
+        stub = Stub()
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", stub.handle)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            await test(stub, str(server.make_url("/")))
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def make_client(**kwargs):
+    options = dict(connect_timeout=1, read_timeout=1, total_timeout=5)
+    options.update(kwargs)
+    return HttpClient(**options)
+
+
+def test_requests_share_one_connection():
+    async def test(stub, base_url):
+        client = make_client()
+        try:
+            for _ in range(20):
+                async with client.get(base_url) as resp:
+                    assert await resp.text() == "ok"
+        finally:
+            await client.close()
+        assert len(stub.peers) == 1
+        stats = client.stats["127.0.0.1"]
+        assert stats["requests"] == 20
+        assert stats["status_2xx"] == 20
+    run_with_stub(test)
+
+
+def test_limit_per_host_bounds_parallel_connections():
+    async def test(stub, base_url):
+        client = make_client(limit_per_host=2)
+
+        async def fetch():
+            async with client.get(f"{base_url}?delay=0.05") as resp:
+                await resp.read()
+        try:
+            await asyncio.gather(*(fetch() for _ in range(10)))
+        finally:
+            await client.close()
+        assert stub.max_active == 2
+        assert len(stub.peers) == 2
+    run_with_stub(test)
+
+
+def test_read_timeout_is_counted():
+    async def test(stub, base_url):
+        client = make_client(read_timeout=0.2)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                async with client.get(f"{base_url}?delay=1") as resp:
+                    await resp.read()
+        finally:
+            await client.close()
+        assert client.stats["127.0.0.1"]["timeouts"] == 1
+    run_with_stub(test)
+
+
+def test_status_classes_are_counted_and_session_recreated_after_close():
+    async def test(stub, base_url):
+        client = make_client()
+        try:
+            async with client.get(f"{base_url}?status=404") as resp:
+                assert resp.status == 404
+            await client.close()
+            # Nach close() legt der nächste Aufruf eine neue Session an
+            async with client.get(base_url) as resp:
+                assert resp.status == 200
+        finally:
+            await client.close()
+        stats = client.stats["127.0.0.1"]
+        assert (stats["status_4xx"], stats["status_2xx"]) == (1, 1)
+        assert "127.0.0.1: " in client.format_stats()
+    run_with_stub(test)
@@ -0,0 +1,126 @@
+# tests/test_live_capture.py
+
+import asyncio
+import contextlib
+import datetime
+import io
+
+from cogs import ticket_cog
+from utils import database
+
+FIRST_MESSAGE_ID = 10 ** 17
+CHANNEL_ID = 10
+
+
+class FakeAuthor:
+    id = 5
+    display_name = "anna"
+
+
+class FakeMessage:
+    def __init__(self, channel, index: int):
+        self.id = FIRST_MESSAGE_ID + index
+        self.channel = channel
+        self.author = FakeAuthor()
+        self.content = f"Nachricht {index}"
+        self.created_at = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=index)
+
+
+class FakeChannel:
+    """
+    Kanal mit History; history_calls zählt REST-Abfragen (after = Startpunkt).
+    """
+
+    def __init__(self):
+        self.id = CHANNEL_ID
+        self.messages = []
+        self.history_calls = []
+
+    def post(self) -> FakeMessage:
+        message = FakeMessage(self, len(self.messages))
+        self.messages.append(message)
+        return message
+
+    def history(self, limit=None, after=None, oldest_first=True):
+        self.history_calls.append(after.id if after else None)
+        return self._iterate(after.id if after else 0)
+
+    async def _iterate(self, after: int):
+        for message in list(self.messages):
+            if message.id > after:
+                yield message
+
+
+class CaptureCog(ticket_cog.TicketCog):
+    """
+    Nur der Zustand, den capture_message/backfill_transcript brauchen.
+    """
+
+    def __init__(self, path: str):
+        self.db = database.AsyncDatabase(path)
+        self.ticket_ids_by_channel = {}
+        self.live_capture_channels = set()
+        self.live_capture_epoch = 0
+        self.backfilling_channels = set()
+        self.backfill_tasks = set()
+
+
+async def drain(cog):
+    while cog.backfill_tasks:
+        await asyncio.gather(*cog.backfill_tasks)
+
+
+def test_reconnect_backfills_messages_missed_during_outage(tmp_path):
+    async def scenario():
+        cog = CaptureCog(str(tmp_path / "capture.sqlite"))
+        ticket_id = await cog.db.reserve_ticket(5, "anna")
+        await cog.db.attach_ticket_channel(ticket_id, CHANNEL_ID)
+        channel = FakeChannel()
+
+        # Erste Nachricht: einmaliger Abgleich, danach ist der Kanal live
+        await cog.capture_message(channel.post())
+        await drain(cog)
+        assert CHANNEL_ID in cog.live_capture_channels
+        await cog.capture_message(channel.post())
+        assert len(channel.history_calls) == 1
+
+        # Verbindungsabbruch: zwei Nachrichten kommen nie als Event an
+        await cog.on_disconnect()
+        missed = [channel.post(), channel.post()]
+        await cog.on_ready()
+        await cog.capture_message(channel.post())
+        await drain(cog)
+
+        # Der Abgleich startet am Checkpoint vor der Lücke
+        assert channel.history_calls[-1] == FIRST_MESSAGE_ID + 1
+        stored = await cog.db.get_transcript_by_ticket_id(ticket_id)
+        assert [line.rsplit(": ", 1)[1] for line in stored.splitlines()] == [
+            message.content for message in channel.messages
+        ]
+        assert all(message.content in stored for message in missed)
+        assert await cog.db.get_transcript_checkpoint(ticket_id) == channel.messages[-1].id
+        assert CHANNEL_ID in cog.live_capture_channels
+        cog.db.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(scenario())
+
+
+def test_backfill_started_before_disconnect_does_not_mark_live(tmp_path):
+    async def scenario():
+        cog = CaptureCog(str(tmp_path / "capture.sqlite"))
+        ticket_id = await cog.db.reserve_ticket(5, "anna")
+        await cog.db.attach_ticket_channel(ticket_id, CHANNEL_ID)
+        channel = FakeChannel()
+
+        await cog.capture_message(channel.post())
+        # Abgleich läuft schon (wartet auf die DB), dann bricht die Verbindung ab
+        await asyncio.sleep(0)
+        assert CHANNEL_ID in cog.backfilling_channels
+        await cog.on_disconnect()
+        await drain(cog)
+        assert CHANNEL_ID not in cog.live_capture_channels
+        cog.db.close()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(scenario())
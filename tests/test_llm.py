@@ -0,0 +1,237 @@
+# tests/test_llm.py
+"""
+LlmGateway gegen einen lokalen OpenAI-kompatiblen Stub: begrenzte Parallelität
+und Wiederholungen bei 429/5xx.
+"""
+
+import asyncio
+import contextlib
+import email.utils
+import json
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from openai import APIStatusError
+
+from utils.llm import LlmGateway, parse_retry_after
+
+
+class OpenAIStub:
+    def __init__(self, delay: float = 0.0, stream_delay: float = 0.0):
+        self.delay = delay
+        # Streams: Pause nach dem ersten (leeren) Stück, bevor Text kommt
+        self.stream_delay = stream_delay
+        # Geplante Fehlerantworten (status, headers), danach immer eine normale Antwort
+        self.script = []
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def chat(self, request):
+        body = await request.json()
+        self.requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.script:
+                status, headers = self.script.pop(0)
+                return web.json_response({"error": {"message": "stub"}}, status=status, headers=headers)
+            if body.get("stream"):
+                return await self.stream(request)
+            return web.json_response({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "  antwort \n"}}]
+            })
+        finally:
+            self.active -= 1
+
+    async def stream(self, request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, content in enumerate(["", "ant", "wort"]):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": None, "delta": {"role": "assistant", "content": content}}]
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            if i == 0:
+                await asyncio.sleep(self.stream_delay)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+
+def run_with_stub(stub, test, **gateway_options):
+    """
+    Startet den Stub, führt test(gateway) aus und räumt danach auf.
+    """
+    async def main():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", stub.chat)
+        server = TestServer(app)
+        await server.start_server()
+        options = dict(max_retries=3, backoff_base=0.01, max_retry_wait=2)
+        options.update(gateway_options)
+        gateway = LlmGateway("test-key", "stub", base_url=str(server.make_url("/v1")), **options)
+        try:
+            await test(gateway)
+        finally:
+            await gateway.close()
+            await server.close()
+    asyncio.run(main())
+
+
+MESSAGES = [{"role": "user", "content": "hallo"}]
+
+
+def test_semaphore_bounds_concurrency():
+    stub = OpenAIStub(delay=0.05)
+
+    async def test(gateway):
+        replies = await asyncio.gather(*(gateway.complete(MESSAGES) for _ in range(12)))
+        assert replies == ["antwort"] * 12
+        assert gateway.stats["wait_ms"] > 0
+
+    run_with_stub(stub, test, max_concurrency=3)
+    assert stub.max_active == 3
+    assert stub.requests == 12
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503])
+def test_retries_on_rate_limit_and_server_errors(status):
+    stub = OpenAIStub()
+    stub.script = [(status, {}), (status, {})]
+
+    async def test(gateway):
+        assert await gateway.complete(MESSAGES) == "antwort"
+        assert gateway.stats["retries"] == 2
+        assert gateway.stats["errors"] == 0
+
+    run_with_stub(stub, test)
+    assert stub.requests == 3
+
+
+def test_retry_after_is_honoured():
+    stub = OpenAIStub()
+    stub.script = [(429, {"Retry-After": "0.3"})]
+
+    async def test(gateway):
+        start = time.perf_counter()
+        assert await gateway.complete(MESSAGES) == "antwort"
+        assert time.perf_counter() - start >= 0.3
+
+    run_with_stub(stub, test)
+
+
+def test_gives_up_when_retry_after_exceeds_limit():
+    stub = OpenAIStub()
+    stub.script = [(429, {"Retry-After": "30"})]
+
+    async def test(gateway):
+        start = time.perf_counter()
+        with pytest.raises(APIStatusError):
+            await gateway.complete(MESSAGES)
+        assert time.perf_counter() - start < 1
+        assert gateway.stats["errors"] == 1
+
+    run_with_stub(stub, test, max_retry_wait=2)
+    assert stub.requests == 1
+
+
+def http_date(seconds_from_now: float) -> str:
+    return email.utils.formatdate(time.time() + seconds_from_now, usegmt=True)
+
+
+def test_retry_after_as_http_date_is_honoured():
+    stub = OpenAIStub()
+    # HTTP-Datum hat nur Sekundenauflösung: gewartet wird 1 bis 2 Sekunden
+    stub.script = [(429, {"Retry-After": http_date(2)})]
+
+    async def test(gateway):
+        start = time.perf_counter()
+        assert await gateway.complete(MESSAGES) == "antwort"
+        assert time.perf_counter() - start >= 1
+        assert gateway.stats["retries"] == 1
+
+    run_with_stub(stub, test, max_retry_wait=3)
+    assert stub.requests == 2
+
+
+def test_gives_up_when_retry_after_date_exceeds_limit():
+    stub = OpenAIStub()
+    stub.script = [(503, {"Retry-After": http_date(60)})]
+
+    async def test(gateway):
+        start = time.perf_counter()
+        with pytest.raises(APIStatusError):
+            await gateway.complete(MESSAGES)
+        assert time.perf_counter() - start < 1
+        assert gateway.stats["errors"] == 1
+
+    run_with_stub(stub, test, max_retry_wait=2)
+    assert stub.requests == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("1.5") == 1.5
+    assert parse_retry_after("-3") == 0
+    assert parse_retry_after(http_date(-60)) == 0
+    assert 29 <= parse_retry_after(http_date(30)) <= 30
+    # RFC-850- und asctime-Format sind laut RFC 9110 ebenfalls erlaubt
+    assert parse_retry_after("Sunday, 06-Nov-94 08:49:37 GMT") == 0
+    assert parse_retry_after("Sun Nov  6 08:49:37 1994") == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("bald") is None
+
+
+def test_client_errors_are_not_retried():
+    stub = OpenAIStub()
+    stub.script = [(400, {})]
+
+    async def test(gateway):
+        with pytest.raises(APIStatusError):
+            await gateway.complete(MESSAGES)
+        assert gateway.stats["retries"] == 0
+
+    run_with_stub(stub, test)
+    assert stub.requests == 1
+
+
+def test_retries_stop_after_max_retries():
+    stub = OpenAIStub()
+    stub.script = [(503, {})] * 10
+
+    async def test(gateway):
+        with pytest.raises(APIStatusError):
+            await gateway.complete(MESSAGES)
+
+    run_with_stub(stub, test, max_retries=2)
+    assert stub.requests == 3
+
+
+def test_stream_yields_text_and_frees_its_slot():
+    stub = OpenAIStub()
+
+    async def test(gateway):
+        async with contextlib.aclosing(gateway.stream(MESSAGES)) as stream:
+            assert [delta async for delta in stream] == ["ant", "wort"]
+        assert gateway._slots._value == 2
+
+    run_with_stub(stub, test, max_concurrency=2)
+
+
+def test_stream_left_early_frees_its_slot_immediately():
+    stub = OpenAIStub()
+
+    async def test(gateway):
+        with pytest.raises(RuntimeError):
+            async with contextlib.aclosing(gateway.stream(MESSAGES)) as stream:
+                async for delta in stream:
+                    raise RuntimeError(delta)
+        # Nicht erst bei der Garbage Collection des Generators
+        assert gateway._slots._value == 2
+
+    run_with_stub(stub, test, max_concurrency=2)
@@ -0,0 +1,180 @@
+# tests/test_ocr.py
+"""
+OcrEngine mit CPU-lastigen Stellvertretern statt Tesseract (die Funktionen liegen auf
+Modulebene, damit die Worker-Prozesse per spawn sie importieren können) sowie
+Vorverarbeitung und Größenschutz mit synthetischen Bildern.
+"""
+
+import asyncio
+import io
+import os
+import time
+
+import pytest
+
+from utils.ocr import (
+    ImageTooLarge, OcrEngine, OcrError, OcrQueueFull, OcrTimeout, _ocr_worker, preprocess_image
+)
+
+# Höchste erlaubte Verzögerung des Event-Loops, während OCR-Aufträge laufen
+MAX_LOOP_LAG = 0.05
+
+
+def burn_cpu(seconds: float) -> int:
+    end = time.process_time() + seconds
+    count = 0
+    while time.process_time() < end:
+        count += 1
+    return count
+
+
+def sleep_for(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def crash_worker():
+    os._exit(1)
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - start - interval)
+    return worst
+
+
+@pytest.fixture
+def engine():
+    engine = OcrEngine(workers=2, max_pending=4, timeout=30)
+    yield engine
+    engine.shutdown()
+
+
+def test_event_loop_stays_responsive_during_ocr(engine):
+    async def scenario():
+        # Pool-Start (Prozesse anlegen) gehört nicht zur Messung
+        await engine.run(burn_cpu, 0.01, timeout=30)
+        stop = asyncio.Event()
+        probe = asyncio.create_task(measure_loop_lag(stop))
+        results = await asyncio.gather(*(engine.run(burn_cpu, 0.3, timeout=30) for _ in range(4)))
+        stop.set()
+        return results, await probe
+
+    results, worst_lag = asyncio.run(scenario())
+    assert all(count > 0 for count in results)
+    assert worst_lag < MAX_LOOP_LAG, f"Event-Loop {worst_lag * 1000:.1f} ms blockiert"
+
+
+def test_jobs_over_the_pending_cap_are_rejected(engine):
+    async def scenario():
+        jobs = [asyncio.create_task(engine.run(sleep_for, 0.5, timeout=30)) for _ in range(engine.max_pending)]
+        await asyncio.sleep(0)
+        with pytest.raises(OcrQueueFull):
+            await engine.run(sleep_for, 0, timeout=30)
+        assert await asyncio.gather(*jobs) == [0.5] * engine.max_pending
+        # Danach ist wieder Platz
+        assert await engine.run(sleep_for, 0, timeout=30) == 0
+
+    asyncio.run(scenario())
+
+
+def test_job_over_the_timeout_is_abandoned(engine):
+    async def scenario():
+        start = time.perf_counter()
+        with pytest.raises(OcrTimeout):
+            await engine.run(sleep_for, 5, timeout=0.5)
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) < 3
+
+
+def test_pool_is_rebuilt_after_a_worker_dies(engine):
+    async def scenario():
+        with pytest.raises(OcrError, match="abgestürzt"):
+            await engine.run(crash_worker, timeout=30)
+        assert await engine.run(sleep_for, 0, timeout=30) == 0
+
+        # Worker stirbt im Leerlauf: der nächste Auftrag bekommt trotzdem einen Pool
+        for process in list(engine._pool._processes.values()):
+            process.kill()
+            process.join()
+        await asyncio.sleep(0.2)
+        assert await engine.run(sleep_for, 0, timeout=30) == 0
+
+    asyncio.run(scenario())
+
+
+def dark_screenshot(width: int, height: int):
+    """
+    Discord-Darkmode: heller Text (hier Balken) auf dunklem Grund.
+    """
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+    img = Image.new("RGB", (width, height), (54, 57, 63))
+    draw = ImageDraw.Draw(img)
+    for y in range(height // 10, height, height // 5):
+        draw.rectangle((width // 10, y, width // 2, y + height // 40), fill=(220, 221, 222))
+    return img
+
+
+def png_bytes(img) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_preprocess_downscales_and_binarizes_oversized_image():
+    parts = preprocess_image(dark_screenshot(4000, 1000), max_side=2000)
+
+    assert len(parts) == 1
+    part = parts[0]
+    assert part.size == (2000, 500)
+    assert part.mode == "1"
+    # Dunkler Hintergrund wird invertiert: Tesseract bekommt dunklen Text auf Weiß
+    histogram = part.convert("L").histogram()
+    assert histogram[255] > histogram[0] > 0
+    assert sum(histogram[1:255]) == 0
+
+
+def test_preprocess_crops_regions_and_keeps_small_images():
+    parts = preprocess_image(dark_screenshot(800, 600), max_side=2000, regions=[(0, 0, 0.5, 0.5), (0.5, 0.5, 1, 1)])
+    assert [part.size for part in parts] == [(400, 300), (400, 300)]
+
+
+def test_preprocess_reads_only_the_first_animation_frame():
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+    # Nur das erste Bild hat Inhalt, die übrigen sind einfarbig
+    frames = [Image.new("L", (300, 200), 20 * i) for i in range(5)]
+    ImageDraw.Draw(frames[0]).rectangle((0, 0, 150, 200), fill=255)
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:])
+    with Image.open(io.BytesIO(buffer.getvalue())) as img:
+        assert img.n_frames == 5
+        img.seek(3)
+        parts = preprocess_image(img, max_side=2000)
+    assert len(parts) == 1
+    assert parts[0].convert("L").getextrema() == (0, 255)
+
+
+@pytest.mark.parametrize("width, height", [
+    (1200, 1000),   # knapp über dem Limit: eigene Prüfung nach dem Header
+    (3000, 3000),   # weit darüber: Pillow bricht schon beim Öffnen ab (Dekompressionsbombe)
+])
+def test_images_over_the_pixel_limit_are_rejected_before_ocr(monkeypatch, width, height):
+    pytesseract = pytest.importorskip("pytesseract")
+    Image = pytest.importorskip("PIL.Image")
+    # _ocr_worker setzt das Pillow-Limit prozessweit; nach dem Test wiederherstellen
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS)
+
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("Tesseract darf gar nicht erst laufen")
+
+    monkeypatch.setattr(pytesseract, "image_to_string", no_ocr)
+    data = png_bytes(Image.new("1", (width, height)))
+    with pytest.raises(ImageTooLarge):
+        _ocr_worker(data, "deu", 5, 1_000_000, 2000, ())
@@ -0,0 +1,77 @@
+# tests/test_query_plans.py
+"""
+Regressionstest für die Indizes der heißen Abfragen: Die SQL-Anweisungen werden
+beim Aufruf der echten Database-Methoden mitgeschnitten und per EXPLAIN QUERY PLAN
+geprüft. Schlägt fehl, sobald eine davon auf einen Tabellen-Scan oder eine
+nachträgliche Sortierung zurückfällt - auch wenn die Abfrage später umgeschrieben wird.
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from utils.database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Migrationen und Schreibmethoden loggen per print
+    with contextlib.redirect_stdout(io.StringIO()):
+        database = Database(str(tmp_path / "plans.sqlite"))
+        for user_id, user_name, channel_id in ((5, "anna", 10), (6, "bernd", 11)):
+            database.attach_ticket_channel(database.reserve_ticket(user_id, user_name), channel_id)
+        database.append_transcript_messages(
+            1, [(100, 5, "anna", "2024-01-01 10:00:00", "hallo")], checkpoint=100
+        )
+    yield database
+    database.close()
+
+
+def traced_plans(db, call):
+    """
+    Führt call() aus und liefert {SQL: [Plan-Schritte]} für alle dabei gelesenen SELECTs.
+    """
+    statements = []
+    db._conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        db._conn.set_trace_callback(None)
+    plans = {}
+    for sql in statements:
+        if sql.lstrip().upper().startswith("SELECT"):
+            plans[sql] = [row[3] for row in db._conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    assert plans, "keine SELECT-Anweisung mitgeschnitten"
+    return plans
+
+
+def assert_indexed(plans):
+    for sql, steps in plans.items():
+        for step in steps:
+            assert not step.startswith("SCAN"), f"Tabellen-Scan: {step}\n{sql}"
+            assert "TEMP B-TREE" not in step, f"Sortierung ohne Index: {step}\n{sql}"
+
+
+def test_transcript_lookup_uses_index(db):
+    assert_indexed(traced_plans(db, lambda: db.get_transcript_by_ticket_id(1)))
+    assert_indexed(traced_plans(db, lambda: list(db.iter_transcript_lines(1, start=1, stop=10))))
+    # Ticket ohne Einzelnachrichten: Rückfall auf den letzten Snapshot
+    assert_indexed(traced_plans(db, lambda: db.get_transcript_by_ticket_id(2)))
+
+
+def test_open_or_claimed_tickets_use_index(db):
+    assert_indexed(traced_plans(db, db.get_open_or_claimed_tickets))
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"status": "open"},
+    {"user": "5"},
+    {"user": "ann"},
+    {"date_from": "2024-01-01 00:00:00", "date_to": "2024-02-01 00:00:00"},
+    {"before": ("2024-01-01 10:00:00", 1)},
+    {"status": "closed", "before": ("2024-01-01 10:00:00", 1)},
+])
+def test_ticket_overview_uses_index(db, filters):
+    assert_indexed(traced_plans(db, lambda: db.list_tickets(**filters)))
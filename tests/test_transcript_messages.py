@@ -0,0 +1,26 @@
+# tests/test_transcript_messages.py
+
+import contextlib
+import io
+
+from utils.database import Database
+
+
+def make_rows(message_ids):
+    return [(message_id, 5, "anna", f"2024-01-01 10:00:{message_id % 60:02d}", f"Nachricht {message_id}")
+            for message_id in message_ids]
+
+
+def test_append_counts_only_new_messages(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = Database(str(tmp_path / "append.sqlite"))
+        ticket_id = db.reserve_ticket(5, "anna")
+        db.attach_ticket_channel(ticket_id, 10)
+    try:
+        # FTS- und updated_at-Trigger schreiben zusätzliche Zeilen, die nicht mitzählen dürfen
+        assert db.append_transcript_messages(ticket_id, make_rows(range(100, 105)), checkpoint=104) == 5
+        assert db.append_transcript_messages(ticket_id, make_rows([103, 104, 105]), checkpoint=105) == 1
+        assert db.get_transcript_checkpoint(ticket_id) == 105
+        assert len(db.get_transcript_by_ticket_id(ticket_id).splitlines()) == 6
+    finally:
+        db.close()
@@ -0,0 +1,127 @@
+# tests/test_transcript_search.py
+
+import contextlib
+import io
+import os
+import random
+
+import pytest
+
+from utils import database
+from utils.database import SEARCH_MARK_END, SEARCH_MARK_START, build_fts_query, build_snippet
+
+WORDS = "ich wurde wegen teamkill gebannt bitte entbannen das war keine absicht squad leader".split()
+
+
+def build_legacy_database(path: str, tickets: int = 100):
+    """
+    Datenbank im Format vor Migration 3: Klartext-Snapshots, drei pro Ticket.
+    """
+    rng = random.Random(1)
+    conn = database.connect(path)
+    database._migration_base_schema(conn)
+    database._migration_hot_query_indexes(conn)
+    conn.execute("PRAGMA user_version=2")
+    for ticket_id in range(1, tickets + 1):
+        conn.execute(
+            "INSERT INTO tickets (id, user_id, user_name, channel_id, status) VALUES (?, '5', 'anna', '10', 'closed')",
+            (ticket_id,)
+        )
+        lines = [
+            f"[2023-05-01 12:00:{i % 60:02d}] Spieler: " + " ".join(rng.choice(WORDS) for _ in range(12))
+            for i in range(200)
+        ]
+        lines[100] = f"[2023-05-01 12:01:40] Spieler: Meine ID ist Spieler-{1000 + ticket_id} auf dem Server Élan"
+        for cut in (4, 1, 0):
+            conn.execute(
+                "INSERT INTO transcripts (ticket_id, transcript_content) VALUES (?, ?)",
+                (ticket_id, "\n".join(lines[:len(lines) - cut]))
+            )
+    conn.commit()
+    conn.close()
+
+
+def open_database(path: str) -> database.Database:
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = database.Database(path)
+    return db
+
+
+def file_size(db: database.Database) -> int:
+    db._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(db.path)
+
+
+@pytest.fixture
+def fresh_migrations(monkeypatch):
+    # ensure_migrated merkt sich migrierte Pfade prozessweit
+    monkeypatch.setattr(database, "_migrated_paths", set())
+
+
+def test_snapshot_search_index_keeps_file_size(tmp_path, monkeypatch, fresh_migrations):
+    path = str(tmp_path / "legacy.sqlite")
+    build_legacy_database(path)
+
+    # Bis einschließlich Migration 5: Snapshots komprimiert, noch kein Suchindex
+    with monkeypatch.context() as patch:
+        patch.setattr(database, "MIGRATIONS", database.MIGRATIONS[:5])
+        db = open_database(path)
+        db._conn.execute("VACUUM")
+        before = file_size(db)
+        db.close()
+
+    database._migrated_paths.clear()
+    db = open_database(path)
+    try:
+        after = file_size(db)
+        # Eine Textkopie pro Alt-Ticket wäre ein Vielfaches der komprimierten Snapshots
+        assert after < before * 1.3, (before, after)
+
+        results, has_more, _ = db.search_transcripts("spieler-1042 elan")
+        assert [row["ticket_id"] for row in results] == [42] and not has_more
+        snippet = results[0]["snippet"]
+        assert f"{SEARCH_MARK_START}Spieler{SEARCH_MARK_END}-{SEARCH_MARK_START}1042{SEARCH_MARK_END}" in snippet
+        assert f"{SEARCH_MARK_START}Élan{SEARCH_MARK_END}" in snippet
+    finally:
+        db.close()
+
+
+def test_old_snapshot_index_is_rebuilt_contentless(tmp_path, fresh_migrations):
+    path = str(tmp_path / "old_index.sqlite")
+    build_legacy_database(path, tickets=30)
+    db = open_database(path)
+    # Stand vor Migration 13: Index mit eigener Textkopie
+    with db._transaction() as conn:
+        conn.execute("DROP TABLE transcript_snapshot_fts")
+        conn.execute("CREATE VIRTUAL TABLE transcript_snapshot_fts USING fts5(content)")
+        conn.execute(
+            "INSERT INTO transcript_snapshot_fts (rowid, content) "
+            "SELECT ticket_id, 'Spieler ' || (1000 + ticket_id) FROM transcripts GROUP BY ticket_id"
+        )
+        conn.execute("PRAGMA user_version=12")
+    db.close()
+
+    database._migrated_paths.clear()
+    db = open_database(path)
+    try:
+        sql = db._fetchone("SELECT sql FROM sqlite_master WHERE name='transcript_snapshot_fts'")[0]
+        assert "content=''" in sql
+        results, _, _ = db.search_transcripts("teamkill Spieler-1007")
+        assert [row["ticket_id"] for row in results] == [7]
+    finally:
+        db.close()
+
+
+def test_build_fts_query_without_phrases():
+    assert build_fts_query('Spieler-7 "x" abc*') == '"Spieler-7" """x""" "abc"*'
+    assert build_fts_query("Spieler-7 abc-de*", phrases=False) == '"Spieler" "7" "abc" "de"*'
+    assert build_fts_query("--- *", phrases=False) == ""
+
+
+def test_build_snippet_marks_hits_around_first_match():
+    text = " ".join(f"wort{i}" for i in range(40)) + " Über den Bann wurde entschieden"
+    snippet = build_snippet(text, "uber ban*", tokens=8)
+    assert snippet.startswith("…") and not snippet.endswith("…")
+    assert f"{SEARCH_MARK_START}Über{SEARCH_MARK_END}" in snippet
+    assert f"{SEARCH_MARK_START}Bann{SEARCH_MARK_END}" in snippet
+    assert build_snippet("kurz und knapp", "fehlt") == "kurz und knapp"
@@ -0,0 +1,111 @@
+# tests/test_turns.py
+"""
+Gesprächszüge mit gestreamter Antwort (LlmGateway gegen den OpenAI-Stub aus test_llm):
+ein überholter Zug hinterlässt keinen Platzhalter und keinen belegten LLM-Platz.
+"""
+
+import asyncio
+import contextlib
+import io
+from collections import Counter, defaultdict
+
+import discord
+
+from cogs import ticket_cog
+from test_llm import OpenAIStub, run_with_stub
+from utils import config
+from utils.streaming import PLACEHOLDER
+
+CHANNEL_ID = 10
+MAX_CONCURRENCY = 2
+
+
+class FakeMessage:
+    guild = None
+
+    def __init__(self, channel, content: str):
+        self.channel = channel
+        self.content = content
+        self.deleted = False
+
+    async def edit(self, content):
+        self.content = content
+
+    async def delete(self):
+        await asyncio.sleep(self.channel.delay)
+        self.deleted = True
+
+
+class FakeChannel:
+    """
+    Kanal, in dem Senden und Löschen etwas dauern (wie ein REST-Aufruf).
+    """
+
+    def __init__(self, delay: float):
+        self.id = CHANNEL_ID
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, content):
+        await asyncio.sleep(self.delay)
+        message = FakeMessage(self, content)
+        self.sent.append(message)
+        return message
+
+    def visible(self) -> list:
+        return [message.content for message in self.sent if not message.deleted]
+
+
+class TurnCog(ticket_cog.TicketCog):
+    """
+    Nur der Zustand für queue_turn/process_turn; die ID ist schon bekannt, die
+    Stellungnahme reicht nie -> jeder Zug endet in einer gestreamten KI-Antwort.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.openai_max_tokens = 100
+        self.openai_temp = 0.7
+        self.ai_enabled_for_channel = {CHANNEL_ID: True}
+        self.conversations = defaultdict(list)
+        self.channel_has_id = defaultdict(lambda: (True, "76561198012345678"))
+        self.pending_turn_texts = defaultdict(list)
+        self.turn_tasks = {}
+        self.channel_locks = defaultdict(asyncio.Lock)
+        self.committed_turns = set()
+        self.stream_stats = Counter()
+
+    async def classify_cooperative(self, channel_id: int) -> bool:
+        return True
+
+    def is_sufficient_explanation(self, user_text: str, guild: discord.Guild) -> bool:
+        return False
+
+
+def test_superseded_turn_removes_its_placeholder_and_frees_the_llm(monkeypatch):
+    monkeypatch.setattr(config, "AI_TURN_QUIET_SECONDS", 0)
+    stub = OpenAIStub(stream_delay=0.5)
+
+    async def test(gateway):
+        cog = TurnCog(gateway)
+        channel = FakeChannel(delay=0.1)
+
+        cog.queue_turn(FakeMessage(channel, "erste"), "erste")
+        first = cog.turn_tasks[CHANNEL_ID]
+        # Erster Zug wartet auf das erste Token, der Platzhalter steht schon im Kanal
+        await asyncio.sleep(0.2)
+        cog.queue_turn(FakeMessage(channel, "zweite"), "zweite")
+        # Noch ein Abbruch (z. B. cog_unload), während der Platzhalter gerade gelöscht wird
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await cog.turn_tasks[CHANNEL_ID]
+        await asyncio.sleep(0.2)
+
+        assert first.cancelled()
+        assert channel.visible() == ["antwort"]
+        assert [message.content for message in channel.sent] == [PLACEHOLDER, "antwort"]
+        assert [entry["content"] for entry in cog.conversations[CHANNEL_ID]] == ["erste\nzweite", "antwort"]
+        assert gateway._slots._value == MAX_CONCURRENCY
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_with_stub(stub, test, max_concurrency=MAX_CONCURRENCY)
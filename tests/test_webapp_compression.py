@@ -0,0 +1,58 @@
+# tests/test_webapp_compression.py
+
+import pytest
+from flask import url_for
+
+from webapp.app import STATIC_MAX_AGE, app, static_fingerprint
+
+STATIC_FILE = "/static/css/bootstrap.min.css"
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_compressed_static_file_has_weak_etag(client):
+    plain = client.get(STATIC_FILE)
+    gzipped = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip"})
+
+    assert plain.headers.get("Content-Encoding") is None
+    assert not plain.headers["ETag"].startswith("W/")
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    # Gleicher Validator-Wert, aber schwach: die Bytes unterscheiden sich
+    assert gzipped.headers["ETag"] == "W/" + plain.headers["ETag"]
+
+
+def test_revalidation_keeps_the_same_validator(client):
+    etag = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    not_modified = client.get(STATIC_FILE, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    # Der schwache Validator passt auch für die unkomprimierte Variante
+    assert client.get(STATIC_FILE, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_fingerprinted_static_url_is_immutable(client):
+    fingerprint = static_fingerprint("css/bootstrap.min.css")
+    with app.test_request_context():
+        assert url_for("static", filename="css/bootstrap.min.css") == f"{STATIC_FILE}?v={fingerprint}"
+
+    response = client.get(f"{STATIC_FILE}?v={fingerprint}")
+    assert response.status_code == 200
+    assert response.cache_control.public
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == STATIC_MAX_AGE
+
+
+def test_stale_fingerprint_still_serves_the_file(client):
+    current = client.get(STATIC_FILE).get_data()
+
+    # Z. B. eine im Browser noch offene Seite von vor dem Update
+    response = client.get(f"{STATIC_FILE}?v=000000000000")
+    assert response.status_code == 200
+    assert response.get_data() == current
+    assert not response.cache_control.immutable
+    assert response.cache_control.max_age != STATIC_MAX_AGE
@@ -0,0 +1,102 @@
+# utils/ban_details.py
+
+import asyncio
+import time
+from collections import Counter, OrderedDict
+
+import aiohttp
+
+
+class BanDetailCache:
+    """
+    Ban-Details pro Spieler-ID, zwischengespeichert im Speicher und in SQLite
+    (überlebt Neustarts), damit der ID-Schritt meist ohne Netzwerk auskommt.
+
+    - Bekannte IDs gelten ttl Sekunden, unbekannte (negatives Ergebnis) negative_ttl.
+    - Fragen mehrere Tickets gleichzeitig dieselbe ID ab, teilen sie sich eine
+      einzige Anfrage (Single-Flight).
+    - Netzwerkfehler werden nicht gecacht.
+    - Im Speicher höchstens max_entries IDs; ist er voll, fliegen zuerst abgelaufene
+      Einträge, dann die am längsten nicht mehr abgefragten (LRU).
+    - stats zählt Treffer je Stufe, gebündelte Anfragen, API-Aufrufe, Fehler
+      und die Gesamtdauer der API-Aufrufe.
+
+    fetch(pid) fragt die API: liefert die Daten oder None (unbekannte ID) und
+    wirft aiohttp.ClientError / asyncio.TimeoutError bei Fehlern.
+    """
+
+    def __init__(self, db, fetch, ttl: float, negative_ttl: float, max_entries: int = 1024):
+        self.db = db
+        self.fetch = fetch
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.stats = Counter()
+        self._memory = OrderedDict()
+        self._in_flight = {}
+
+    async def get(self, pid: str):
+        self.stats["lookups"] += 1
+        cached = self._memory.get(pid)
+        if cached:
+            if cached[0] > time.monotonic():
+                self.stats["memory_hits"] += 1
+                self._memory.move_to_end(pid)
+                return cached[1]
+            del self._memory[pid]
+
+        task = self._in_flight.get(pid)
+        if task is None:
+            task = asyncio.ensure_future(self._load(pid))
+            self._in_flight[pid] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(pid, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: bricht ein Wartender ab, läuft die Anfrage für die anderen weiter
+        return await asyncio.shield(task)
+
+    async def _load(self, pid: str):
+        cached = await self.db.get_ban_detail(pid)
+        if cached is not None:
+            self.stats["db_hits"] += 1
+            data, remaining = cached
+            self._remember(pid, data, remaining)
+            return data
+
+        self.stats["upstream_requests"] += 1
+        start = time.perf_counter()
+        try:
+            data = await self.fetch(pid)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["upstream_errors"] += 1
+            print(f"[ERROR] Ban-API: Abfrage von {pid} fehlgeschlagen: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.stats["upstream_ms"] += int((time.perf_counter() - start) * 1000)
+
+        ttl = self.ttl if data and data.get("reason") else self.negative_ttl
+        await self.db.put_ban_detail(pid, data, ttl)
+        self._remember(pid, data, ttl)
+        print(f"[LOG] Ban-API: {pid} abgefragt. {self.format_stats()}")
+        return data
+
+    def _remember(self, pid: str, data, ttl: float):
+        now = time.monotonic()
+        self._memory.pop(pid, None)
+        if len(self._memory) >= self.max_entries:
+            for key in [key for key, (expires, _) in self._memory.items() if expires <= now]:
+                del self._memory[key]
+        while len(self._memory) >= self.max_entries:
+            self._memory.popitem(last=False)
+        self._memory[pid] = (now + ttl, data)
+
+    def format_stats(self) -> str:
+        stats = self.stats
+        hits = stats["memory_hits"] + stats["db_hits"] + stats["coalesced"]
+        hit_rate = hits / stats["lookups"] * 100 if stats["lookups"] else 0
+        upstream_avg = stats["upstream_ms"] / stats["upstream_requests"] if stats["upstream_requests"] else 0
+        return (
+            f"Trefferquote {hit_rate:.0f}% (Speicher {stats['memory_hits']}, DB {stats['db_hits']}, "
+            f"gebündelt {stats['coalesced']}), API-Aufrufe {stats['upstream_requests']} "
+            f"(Fehler {stats['upstream_errors']}, Ø {upstream_avg:.0f}ms)"
+        )
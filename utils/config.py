@@ -25,11 +25,75 @@ TICKET_LOG_CHANNEL_ID = int(os.getenv("TICKET_LOG_CHANNEL_ID", "0"))
 MAX_TICKETS_PER_SUPPORTER = int(os.getenv("MAX_TICKETS_PER_SUPPORTER", "3"))
 TICKET_CLEANUP_DAYS = int(os.getenv("TICKET_CLEANUP_DAYS", "7"))
 
+# Ticket-Erstellung bei Ansturm: parallele Worker, Mindestabstand zwischen
+# zwei Kanal-Erstellungen (Sekunden) und maximale Länge der Warteschlange
+TICKET_CREATION_WORKERS = int(os.getenv("TICKET_CREATION_WORKERS", "2"))
+TICKET_CREATION_INTERVAL = float(os.getenv("TICKET_CREATION_INTERVAL", "1.0"))
+TICKET_QUEUE_MAX = int(os.getenv("TICKET_QUEUE_MAX", "100"))
+
+# OCR (Tesseract) in eigenen Prozessen: Anzahl Worker (Standard: alle CPU-Kerne),
+# maximal wartende Aufträge und Zeitlimit pro Bild (Sekunden)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+OCR_QUEUE_MAX = int(os.getenv("OCR_QUEUE_MAX", "16"))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "30"))
+# Größenschutz und Vorverarbeitung vor der OCR: max. Download-Größe (Bytes),
+# max. Pixelzahl (Schutz vor Dekompressionsbomben), längste Bildseite nach dem Verkleinern
+OCR_MAX_DOWNLOAD_BYTES = int(os.getenv("OCR_MAX_DOWNLOAD_BYTES", "10000000"))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "40000000"))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "2000"))
+# Optional nur bestimmte Bildbereiche lesen, relativ zur Bildgröße:
+# "x0,y0,x1,y1;x0,y0,x1,y1" (z. B. "0,0.6,0.45,1" = Chat unten links). Leer = ganzes Bild.
+OCR_REGIONS = [
+    tuple(float(v) for v in region.split(","))
+    for region in os.getenv("OCR_REGIONS", "").split(";") if region.strip()
+]
+# Beweis-Screenshots eines Banns: gleichzeitige Downloads/OCR-Aufträge und Gesamtzeitlimit in Sekunden
+ATTACHMENT_CONCURRENCY = int(os.getenv("ATTACHMENT_CONCURRENCY", "4"))
+ATTACHMENT_TIMEOUT = float(os.getenv("ATTACHMENT_TIMEOUT", "45"))
+# Obergrenze für den OCR-Cache in der Datenbank (Zeichen Text + Zusammenfassung)
+OCR_CACHE_MAX_CHARS = int(os.getenv("OCR_CACHE_MAX_CHARS", "20000000"))
+
+# Ban-API mit den Detaildaten zu einer Spieler-ID (für Tests auf einen lokalen Ersatz umstellbar)
+BAN_API_BASE = os.getenv("BAN_API_BASE", "http://api.hackletloose.eu").rstrip("/")
+# Cache der Ban-Details (Sekunden): bekannte IDs / unbekannte IDs
+BAN_DETAIL_TTL = float(os.getenv("BAN_DETAIL_TTL", "3600"))
+BAN_DETAIL_NEGATIVE_TTL = float(os.getenv("BAN_DETAIL_NEGATIVE_TTL", "300"))
+
+# Ausgehende HTTP-Anfragen des Bots (Ban-API, Bild-Downloads): Zeitlimits in Sekunden
+# für Verbindungsaufbau / jedes Lesen / die ganze Anfrage, Verbindungen pro Host, DNS-Cache
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "60"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "8"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     print("Warnung: OPENAI_API_KEY ist nicht gesetzt. Die KI-Funktion kann nicht verwendet werden.")
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+# Optional: andere OpenAI-kompatible Basis-URL (z. B. lokaler Ersatz für Tests), leer = api.openai.com
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# Anfragen an OpenAI: gleichzeitige Anfragen, Zeitlimit pro Versuch (Sekunden),
+# Wiederholungen bei 429/5xx und längste akzeptierte Wartezeit (Retry-After) in Sekunden
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_RETRY_WAIT = float(os.getenv("LLM_MAX_RETRY_WAIT", "20"))
+
+# KI im Ticket: so lange (Sekunden) nach der letzten Nachricht warten, bevor geantwortet wird;
+# schnell nacheinander geschickte Nachrichten werden zu einem Gesprächszug zusammengefasst
+AI_TURN_QUIET_SECONDS = float(os.getenv("AI_TURN_QUIET_SECONDS", "2.0"))
+
+# KI-Antworten werden gestreamt: Mindestabstand (Sekunden) zwischen zwei Bearbeitungen
+# der Antwortnachricht (Discord erlaubt nur wenige Bearbeitungen pro Kanal und Sekunde)
+AI_STREAM_EDIT_INTERVAL = float(os.getenv("AI_STREAM_EDIT_INTERVAL", "1.2"))
+
+# Lokaler Kooperations-Klassifikator (python -m utils.cooperation): Modell- und Label-Datei,
+# Mindest-Sicherheit für eine lokale Entscheidung - darunter wird das LLM gefragt
+COOPERATION_MODEL_PATH = os.getenv("COOPERATION_MODEL_PATH", "cooperation_model.json")
+COOPERATION_LABELS_PATH = os.getenv("COOPERATION_LABELS_PATH", "cooperation_labels.jsonl")
+COOPERATION_CONFIDENCE = float(os.getenv("COOPERATION_CONFIDENCE", "0.85"))
 
 # Neu: Flask-Secret
 FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "CHANGEME")
@@ -38,6 +102,11 @@ FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "CHANGEME")
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID", "")
 DISCORD_CLIENT_SECRET = os.getenv("DISCORD_CLIENT_SECRET", "")
 DISCORD_REDIRECT_URI = os.getenv("DISCORD_REDIRECT_URI", "")
+# Basis-URL der Discord-API (für Tests auf einen lokalen Ersatz umstellbar)
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE", "https://discord.com/api").rstrip("/")
+# Timeouts für Aufrufe des Web-Panels an Discord (Sekunden): Verbindungsaufbau / Antwort
+DISCORD_CONNECT_TIMEOUT = float(os.getenv("DISCORD_CONNECT_TIMEOUT", "3"))
+DISCORD_READ_TIMEOUT = float(os.getenv("DISCORD_READ_TIMEOUT", "5"))
 
 # Für die FLASK-Webapp werden die Rollennamen/IDs als Strings verglichen.
 # Daher konvertieren wir HIER die integer-IDs nochmal zu Strings.
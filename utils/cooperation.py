@@ -0,0 +1,354 @@
+# utils/cooperation.py
+#
+# Lokale Vorstufe für TicketCog.classify_cooperative: Lexikon-Merkmale plus ein kleines
+# lineares Modell (logistische Regression auf gehashten Wort-/Wortpaar-Merkmalen).
+# Nur wenn das Modell unsicher ist, wird noch das LLM gefragt.
+#
+# Offline-Werkzeuge (aus dem Projektverzeichnis, .env wie beim Bot):
+#   python -m utils.cooperation label      gespeicherte Transkripte vom LLM bewerten lassen
+#   python -m utils.cooperation train      Modell aus den Bewertungen trainieren
+#   python -m utils.cooperation evaluate   Übereinstimmung mit dem LLM und eingesparte Latenz
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import Counter
+
+# Gleicher Prompt wie für die Entscheidung durch das LLM, damit Labels und Bot übereinstimmen
+LLM_SYSTEM_PROMPT = (
+    "Du bist ein Evaluations-Assistent. Prüfe die folgenden Nachrichten kurz "
+    "und entscheide, ob der Nutzer 'unkooperativ' ist oder nicht. "
+    "Beleidigungen, aggressives Verhalten, ignoriert alle Fragen => unkooperativ. "
+    "Wenn der Nutzer einigermaßen höflich/sachlich ist => cooperative. "
+    "Antworte nur mit 'uncooperative' oder 'cooperative'."
+)
+# Das LLM bekommt die letzten WINDOW Nachrichten des Verlaufs
+WINDOW = 6
+
+# Wortanfänge bzw. Wendungen für die Lexikon-Merkmale
+INSULTS = (
+    "idiot", "vollidiot", "hurensohn", "hure", "wichser", "arschloch", "fick", "fresse",
+    "spast", "behindert", "missgeburt", "bastard", "penner", "trottel", "depp", "schlampe",
+    "opfer", "lappen", "kacke", "scheiß", "scheiss", "fuck", "stupid", "moron", "bitch"
+)
+DEFIANCE = (
+    "ist mir egal", "mir doch egal", "kein bock", "keinen bock", "interessiert mich nicht",
+    "juckt mich nicht", "leck mich", "halt die fresse", "halts maul", "verpiss", "scheiß drauf",
+    "scheiss drauf", "ihr seid", "lächerlich", "don't care", "dont care"
+)
+POLITE = (
+    "bitte", "danke", "entschuldigung", "entschuldige", "sorry", "tut mir leid", "verstehe",
+    "ich habe", "weil", "gerne", "hallo", "guten tag", "please", "thank", "i understand"
+)
+LEXICON_FEATURES = ("insults", "defiance", "polite", "shouting", "exclamations")
+# Gehashte Merkmale belegen die Indizes ab len(LEXICON_FEATURES)
+HASH_DIM = 1 << 16
+
+# Startwerte ohne trainiertes Modell: nur Lexikon. Damit wird nie lokal "kooperativ"
+# entschieden (siehe CooperationClassifier.local_decision), die Werte ordnen nur ein.
+DEFAULT_BIAS = -2.0
+DEFAULT_LEXICON_WEIGHTS = {"insults": 3.0, "defiance": 2.0, "polite": -1.0,
+                           "shouting": 1.0, "exclamations": 0.5}
+
+TOKEN_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _hash_index(feature: str) -> int:
+    # crc32 statt hash(): muss über Prozesse/Neustarts hinweg stabil sein
+    return len(LEXICON_FEATURES) + zlib.crc32(feature.encode("utf-8")) % HASH_DIM
+
+
+def extract_features(messages: list) -> dict:
+    """
+    Merkmale aus den Nutzer-Nachrichten eines Verlaufs ({"role", "content"}):
+    {index: wert}, Lexikon-Zähler (gedeckelt) plus Wörter und Wortpaare (binär).
+    """
+    texts = [m["content"] for m in messages if m["role"] == "user" and m["content"]]
+    raw = " ".join(texts)
+    tokens = TOKEN_RE.findall(raw.lower())
+    joined = " ".join(tokens)
+
+    letters = [c for c in raw if c.isalpha()]
+    shouting = len(letters) >= 12 and sum(c.isupper() for c in letters) / len(letters) > 0.6
+    lexicon = {
+        "insults": sum(1 for t in tokens if t.startswith(INSULTS)),
+        "defiance": sum(1 for phrase in DEFIANCE if phrase in joined),
+        "polite": sum(1 for phrase in POLITE if phrase in joined),
+        "shouting": 1 if shouting else 0,
+        "exclamations": 1 if "!!!" in raw or "???" in raw else 0,
+    }
+    features = {i: float(min(lexicon[name], 3)) for i, name in enumerate(LEXICON_FEATURES) if lexicon[name]}
+    for token in tokens:
+        features[_hash_index(token)] = 1.0
+    for first, second in zip(tokens, tokens[1:]):
+        features[_hash_index(f"{first} {second}")] = 1.0
+    return features
+
+
+def _sigmoid(z: float) -> float:
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class CooperationClassifier:
+    """
+    Liefert die Wahrscheinlichkeit, dass ein Verlauf unkooperativ ist, und entscheidet
+    lokal nur, wenn sie weit genug von 50 % entfernt ist.
+    """
+
+    def __init__(self, bias: float = DEFAULT_BIAS, weights: dict = None, trained: bool = False):
+        self.bias = bias
+        if weights is None:
+            weights = {LEXICON_FEATURES.index(name): w for name, w in DEFAULT_LEXICON_WEIGHTS.items()}
+        self.weights = weights
+        self.trained = trained
+        self.stats = Counter()
+
+    @classmethod
+    def load(cls, path: str) -> "CooperationClassifier":
+        """
+        Lädt ein trainiertes Modell; ohne Modelldatei nur mit den Lexikon-Startwerten.
+        """
+        if not os.path.exists(path):
+            print(f"[WARN] Kein Kooperations-Modell unter {path}, nutze nur das Lexikon.")
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        weights = {int(i): w for i, w in data["weights"].items()}
+        print(f"[LOG] Kooperations-Modell geladen ({len(weights)} Gewichte, {data.get('examples')} Beispiele).")
+        return cls(data["bias"], weights, trained=True)
+
+    def save(self, path: str, examples: int):
+        # Sehr kleine Gewichte weglassen, die Datei bleibt so klein und schnell geladen
+        weights = {str(i): round(w, 4) for i, w in self.weights.items() if abs(w) >= 1e-3}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"bias": self.bias, "weights": weights, "examples": examples}, f)
+
+    def _score(self, features: dict) -> float:
+        z = self.bias
+        for i, value in features.items():
+            z += self.weights.get(i, 0.0) * value
+        return _sigmoid(z)
+
+    def probability(self, messages: list) -> float:
+        """
+        P(unkooperativ) für die letzten Nachrichten eines Verlaufs.
+        """
+        return self._score(extract_features(messages[-WINDOW:]))
+
+    def local_decision(self, messages: list, threshold: float):
+        """
+        (kooperativ, p): kooperativ ist True/False, wenn lokal entschieden werden darf,
+        sonst None (-> LLM fragen).
+
+        Ein trainiertes Modell entscheidet, sobald es mindestens mit threshold sicher ist.
+        Nur mit der Wortliste beweist ein fehlender Treffer nichts (ignorierte Fragen,
+        Forderungen ohne Schimpfwort): dann lokal nur "unkooperativ", und nur bei
+        sicheren Treffern für Beleidigungen oder Trotz-Wendungen.
+        """
+        features = extract_features(messages[-WINDOW:])
+        p = self._score(features)
+        if max(p, 1 - p) < threshold:
+            return None, p
+        if not self.trained:
+            hostile = any(features.get(LEXICON_FEATURES.index(name)) for name in ("insults", "defiance"))
+            if p < 0.5 or not hostile:
+                return None, p
+        return p < 0.5, p
+
+    def decide(self, messages: list, threshold: float):
+        """
+        Wie local_decision, zählt aber lokal entschiedene und eskalierte Nachrichten.
+        """
+        cooperative, p = self.local_decision(messages, threshold)
+        self.stats["escalated" if cooperative is None else "local"] += 1
+        return cooperative, p
+
+    def fit(self, examples: list, epochs: int = 10, learning_rate: float = 0.2, l2: float = 1e-5):
+        """
+        Logistische Regression per SGD. examples: [(features, unkooperativ als 0/1), ...].
+        Die seltene Klasse wird höher gewichtet, damit das Modell nicht einfach
+        immer "kooperativ" sagt.
+        """
+        positives = sum(label for _, label in examples) or 1
+        negatives = len(examples) - positives or 1
+        class_weight = {1: len(examples) / (2 * positives), 0: len(examples) / (2 * negatives)}
+        rng = random.Random(0)
+        examples = list(examples)
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            rate = learning_rate / (1 + epoch)
+            for features, label in examples:
+                z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in features.items())
+                gradient = (_sigmoid(z) - label) * class_weight[label]
+                self.bias -= rate * gradient
+                for i, value in features.items():
+                    weight = self.weights.get(i, 0.0)
+                    self.weights[i] = weight - rate * (gradient * value + l2 * weight)
+        self.trained = True
+
+
+def parse_llm_label(answer: str) -> bool:
+    """
+    Antwort des LLM -> kooperativ (True/False), wie bisher in classify_cooperative.
+    """
+    answer = answer.strip().lower()
+    if "uncooperative" in answer:
+        return False
+    if "cooperative" in answer:
+        return True
+    return not answer.startswith("un")
+
+
+def _is_held_out(example: dict) -> bool:
+    # Feste Aufteilung pro Ticket (nicht pro Nachricht), sonst landen fast gleiche
+    # Verlaufsfenster eines Tickets in Training und Auswertung
+    return zlib.crc32(str(example["ticket_id"]).encode()) % 5 == 0
+
+
+def _read_labels(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+########################################################################
+# Offline-Werkzeuge
+########################################################################
+async def _label(args):
+    from utils import config
+    from utils.database import Database
+    from utils.llm import LlmGateway
+
+    windows = []
+    for ticket_id, messages in Database(args.db).iter_ticket_conversations():
+        for i, message in enumerate(messages):
+            if message["role"] == "user" and message["content"].strip():
+                windows.append((ticket_id, messages[max(0, i - WINDOW + 1):i + 1]))
+    random.Random(0).shuffle(windows)
+    windows = windows[:args.limit]
+    print(f"[LOG] {len(windows)} Verlaufsfenster werden vom LLM bewertet...")
+
+    llm = LlmGateway(
+        api_key=config.OPENAI_API_KEY,
+        model=config.OPENAI_MODEL,
+        base_url=config.OPENAI_BASE_URL,
+        max_concurrency=config.LLM_MAX_CONCURRENCY,
+        timeout=config.LLM_TIMEOUT,
+        max_retries=config.LLM_MAX_RETRIES,
+        max_retry_wait=config.LLM_MAX_RETRY_WAIT
+    )
+
+    # Eigene Begrenzung, damit llm_ms nur die Anfrage misst und nicht das Warten in der Schlange
+    slots = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+
+    async def label(ticket_id, window):
+        async with slots:
+            start = time.perf_counter()
+            try:
+                answer = await llm.complete(
+                    [{"role": "system", "content": LLM_SYSTEM_PROMPT}] + window,
+                    max_tokens=5,
+                    temperature=0.0
+                )
+            except Exception as e:
+                print(f"[WARN] Ticket #{ticket_id}: keine Bewertung ({type(e).__name__}: {e})")
+                return None
+        return {
+            "ticket_id": ticket_id,
+            "messages": window,
+            "cooperative": parse_llm_label(answer),
+            "llm_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    results = await asyncio.gather(*(label(ticket_id, window) for ticket_id, window in windows))
+    await llm.close()
+    labeled = [r for r in results if r is not None]
+    with open(args.labels, "w", encoding="utf-8") as f:
+        for row in labeled:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"[LOG] {len(labeled)} Bewertungen nach {args.labels} geschrieben. {llm.format_stats()}")
+
+
+def _train(args):
+    rows = [row for row in _read_labels(args.labels) if not _is_held_out(row)]
+    examples = [(extract_features(row["messages"]), 0 if row["cooperative"] else 1) for row in rows]
+    classifier = CooperationClassifier()
+    classifier.fit(examples, epochs=args.epochs)
+    classifier.save(args.model, len(examples))
+    uncooperative = sum(label for _, label in examples)
+    print(f"[LOG] Modell aus {len(examples)} Beispielen ({uncooperative} unkooperativ) nach {args.model} geschrieben.")
+
+
+def _evaluate(args):
+    rows = [row for row in _read_labels(args.labels) if _is_held_out(row)]
+    if not rows:
+        print("Keine Auswertungsbeispiele (Ticket-Aufteilung 1/5) in den Bewertungen.")
+        return
+    classifier = CooperationClassifier.load(args.model)
+
+    start = time.perf_counter()
+    probabilities = [classifier.probability(row["messages"]) for row in rows]
+    local_us = (time.perf_counter() - start) / len(rows) * 1e6
+    llm_ms = sum(row["llm_ms"] for row in rows) / len(rows)
+    labels = [row["cooperative"] for row in rows]
+
+    agreement = sum((p < 0.5) == label for p, label in zip(probabilities, labels)) / len(rows)
+    print(f"Auswertung auf {len(rows)} zurückgehaltenen Beispielen "
+          f"({labels.count(False)} laut LLM unkooperativ), Modell: {'trainiert' if classifier.trained else 'nur Lexikon'}")
+    print(f"Lokal: {local_us:.0f} µs pro Entscheidung, LLM: {llm_ms:.0f} ms im Mittel")
+    print(f"Übereinstimmung mit dem LLM, immer lokal entschieden: {agreement:.1%}")
+    print()
+    print("Schwelle  lokal entschieden  Übereinstimmung lokal  Gesamt  übersehen unkoop.  gesparte Latenz/Nachricht")
+    for threshold in sorted({0.6, 0.7, 0.8, 0.85, 0.9, 0.95, args.threshold}):
+        decided = []
+        for row, label in zip(rows, labels):
+            local = classifier.local_decision(row["messages"], threshold)[0]
+            if local is not None:
+                decided.append((local, label))
+        agree = sum(local == label for local, label in decided)
+        missed = sum(local and not label for local, label in decided)
+        coverage = len(decided) / len(rows)
+        # Eskalierte Nachrichten entscheidet das LLM selbst -> stimmen per Definition überein
+        total = (agree + len(rows) - len(decided)) / len(rows)
+        local_agreement = agree / len(decided) if decided else 1.0
+        marker = " <- aktuell" if threshold == args.threshold else ""
+        print(f"{threshold:>8.2f}  {coverage:>17.1%}  {local_agreement:>21.1%}  {total:>6.1%}  "
+              f"{missed:>17}  {coverage * llm_ms:>22.0f} ms{marker}")
+
+
+def main():
+    from utils import config
+
+    parser = argparse.ArgumentParser(prog="python -m utils.cooperation", description="Kooperations-Klassifikator")
+    parser.add_argument("--labels", default=config.COOPERATION_LABELS_PATH, help="JSONL mit LLM-Bewertungen")
+    parser.add_argument("--model", default=config.COOPERATION_MODEL_PATH, help="Modelldatei (JSON)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    label = commands.add_parser("label", help="Transkripte vom LLM bewerten lassen")
+    label.add_argument("--db", default="tickets.sqlite")
+    label.add_argument("--limit", type=int, default=2000, help="max. Anzahl Verlaufsfenster")
+
+    train = commands.add_parser("train", help="Modell trainieren (4/5 der Tickets)")
+    train.add_argument("--epochs", type=int, default=10)
+
+    evaluate = commands.add_parser("evaluate", help="Übereinstimmung mit dem LLM (1/5 der Tickets)")
+    evaluate.add_argument("--threshold", type=float, default=config.COOPERATION_CONFIDENCE)
+
+    args = parser.parse_args()
+    if args.command == "label":
+        asyncio.run(_label(args))
+    elif args.command == "train":
+        _train(args)
+    else:
+        _evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,171 +1,1270 @@
 # utils/database.py
 
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import queue
+import re
 import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils.transcript_codec import (
+    CODEC_DELTA, CODEC_FULL, decompress_text, encode_snapshot, iter_lines, iter_snapshot_text
+)
+
+DB_PATH = "tickets.sqlite"
+
+# Pragmas für jede langlebige Verbindung.
+# WAL sorgt dafür, dass sich Bot (Schreiber) und Web-Panel (Leser)
+# nicht mehr gegenseitig mit "database is locked" blockieren.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",    # im WAL-Modus sicher, spart ein fsync pro Commit
+    "PRAGMA cache_size=-16000",     # ~16 MB Page-Cache pro Verbindung
+    "PRAGMA mmap_size=268435456",   # bis zu 256 MB memory-mapped lesen
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Anzahl vorbereiteter Statements, die sqlite3 pro Verbindung zwischenspeichert
+STATEMENT_CACHE_SIZE = 256
+
+# Aktueller Zeitpunkt in SQL, millisekundengenau (für tickets.updated_at)
+_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Maximale Anzahl Schreibaufträge, die der Writer-Thread in einer Transaktion bündelt
+MAX_GROUP_COMMIT = 128
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Öffnet eine langlebige Verbindung mit den oben definierten Pragmas.
+    Die Verbindung darf von mehreren Threads benutzt werden,
+    der Aufrufer muss den Zugriff aber selbst serialisieren.
+    """
+    conn = sqlite3.connect(
+        path,
+        timeout=5.0,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+########################################################################
+# Schema-Migrationen (versioniert über PRAGMA user_version)
+########################################################################
+def _migration_base_schema(conn: sqlite3.Connection):
+    """Basistabellen tickets, transcripts, bot_settings"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'open',
+            claimed_by TEXT,
+            user_name TEXT,
+            admin_message_id TEXT
+        );
+    """)
+
+    # Ältere Datenbanken kennen admin_message_id noch nicht
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(tickets)")]
+    if "admin_message_id" not in columns:
+        conn.execute("ALTER TABLE tickets ADD COLUMN admin_message_id TEXT")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transcripts (
+            transcript_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id INTEGER NOT NULL,
+            transcript_content TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bot_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """)
+
+
+def _migration_hot_query_indexes(conn: sqlite3.Connection):
+    """Indizes für Transkript-Lookup, Web-Panel-JOIN und offene Tickets"""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transcripts_ticket
+        ON transcripts (ticket_id, transcript_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_status
+        ON tickets (status)
+    """)
+
+
+def _migration_compressed_transcripts(conn: sqlite3.Connection):
+    """Transkripte komprimiert und als Delta zum Vorgänger speichern"""
+    conn.execute("ALTER TABLE transcripts ADD COLUMN content_blob BLOB")
+    conn.execute("ALTER TABLE transcripts ADD COLUMN codec TEXT")
+    conn.execute("ALTER TABLE transcripts ADD COLUMN base_transcript_id INTEGER")
+    conn.execute("ALTER TABLE transcripts ADD COLUMN prefix_len INTEGER")
+
+    # Bestehende Klartext-Snapshots umkodieren (pro Ticket in Reihenfolge,
+    # damit spätere Snapshots als Delta auf frühere zeigen können). Die Tabelle
+    # kann sehr groß sein: es liegen nie mehr als zwei Snapshot-Texte im Speicher.
+    ticket_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT ticket_id FROM transcripts ORDER BY ticket_id"
+    )]
+    rewritten = 0
+    for ticket_id in ticket_ids:
+        transcript_ids = [row[0] for row in conn.execute(
+            "SELECT transcript_id FROM transcripts WHERE ticket_id=? ORDER BY transcript_id",
+            (ticket_id,)
+        )]
+        previous_id, previous_text, previous_depth = None, None, 0
+        for transcript_id in transcript_ids:
+            text = conn.execute(
+                "SELECT transcript_content FROM transcripts WHERE transcript_id=?", (transcript_id,)
+            ).fetchone()[0]
+            codec, blob, prefix_len, depth = encode_snapshot(text, previous_text, previous_depth)
+            conn.execute(
+                "UPDATE transcripts SET transcript_content='', content_blob=?, codec=?, "
+                "base_transcript_id=?, prefix_len=? WHERE transcript_id=?",
+                (blob, codec, previous_id if codec == CODEC_DELTA else None, prefix_len, transcript_id)
+            )
+            previous_id, previous_text, previous_depth = transcript_id, text, depth
+            rewritten += 1
+
+    # Umschreiben allein verkleinert die Datei nicht (freie Seiten bleiben) -> VACUUM danach
+    return rewritten > 0
+
+
+def _migration_transcript_messages(conn: sqlite3.Connection):
+    """Transkripte pro Nachricht (transcript_messages) statt als Text-Blob"""
+    # message_id ist die Discord-Snowflake: global eindeutig und zeitlich sortiert,
+    # daher direkt als Rowid - neue Nachrichten landen immer am Ende der Tabelle.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transcript_messages (
+            message_id INTEGER PRIMARY KEY,
+            ticket_id INTEGER NOT NULL,
+            author_id TEXT,
+            author_name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            content TEXT NOT NULL
+        );
+    """)
+    # Deckt "letzte gespeicherte Nachricht" und seitenweises Lesen pro Ticket ab
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transcript_messages_ticket
+        ON transcript_messages (ticket_id, message_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transcript_messages_author
+        ON transcript_messages (ticket_id, author_id, message_id)
+    """)
+    # Alte Textform "[ts] name: inhalt" als View über die Einzelnachrichten
+    conn.execute("""
+        CREATE VIEW IF NOT EXISTS transcript_lines AS
+        SELECT ticket_id, message_id,
+               '[' || created_at || '] ' || author_name || ': ' || content AS line
+        FROM transcript_messages
+    """)
+
+
+def _migration_live_capture(conn: sqlite3.Connection):
+    """Live-Mitschnitt: Checkpoint pro Ticket, Bearbeitungen und Löschungen pro Nachricht"""
+    # Bis zu dieser message_id ist das Transkript lückenlos gespeichert
+    conn.execute("ALTER TABLE tickets ADD COLUMN transcript_checkpoint INTEGER")
+    conn.execute("ALTER TABLE transcript_messages ADD COLUMN edited_at TEXT")
+    conn.execute("ALTER TABLE transcript_messages ADD COLUMN deleted_at TEXT")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_channel
+        ON tickets (channel_id)
+    """)
+    # Bisherige Transkripte wurden immer lückenlos per History nachgeladen
+    conn.execute("""
+        UPDATE tickets SET transcript_checkpoint = (
+            SELECT MAX(m.message_id) FROM transcript_messages m WHERE m.ticket_id = tickets.id
+        )
+    """)
+    # Gelöschte Nachrichten tauchen (wie bisher in der History) nicht mehr im Text auf
+    conn.execute("DROP VIEW IF EXISTS transcript_lines")
+    conn.execute("""
+        CREATE VIEW transcript_lines AS
+        SELECT ticket_id, message_id,
+               '[' || created_at || '] ' || author_name || ': ' || content AS line
+        FROM transcript_messages
+        WHERE deleted_at IS NULL
+    """)
+
+
+def _migration_transcript_search(conn: sqlite3.Connection):
+    """Volltextsuche (FTS5) über Transkript-Nachrichten und Alt-Snapshots"""
+    # Externer Content: der Index speichert den Text nicht doppelt,
+    # sondern liest ihn für Snippets aus transcript_messages.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+            content, author_name,
+            content='transcript_messages', content_rowid='message_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    # Trigger halten den Index bei jedem Schreibzugriff inkrementell aktuell
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS transcript_messages_fts_insert
+        AFTER INSERT ON transcript_messages BEGIN
+            INSERT INTO transcript_fts (rowid, content, author_name)
+            VALUES (new.message_id, new.content, new.author_name);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS transcript_messages_fts_delete
+        AFTER DELETE ON transcript_messages BEGIN
+            INSERT INTO transcript_fts (transcript_fts, rowid, content, author_name)
+            VALUES ('delete', old.message_id, old.content, old.author_name);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS transcript_messages_fts_update
+        AFTER UPDATE OF content, author_name ON transcript_messages BEGIN
+            INSERT INTO transcript_fts (transcript_fts, rowid, content, author_name)
+            VALUES ('delete', old.message_id, old.content, old.author_name);
+            INSERT INTO transcript_fts (rowid, content, author_name)
+            VALUES (new.message_id, new.content, new.author_name);
+        END
+    """)
+    conn.execute("INSERT INTO transcript_fts (transcript_fts) VALUES ('rebuild')")
+    _create_snapshot_search(conn)
+
+
+def _create_snapshot_search(conn: sqlite3.Connection):
+    """
+    Suchindex für Tickets aus der Zeit vor transcript_messages: ein Dokument pro Ticket
+    (rowid = ticket_id) mit dem Text des neuesten Snapshots.
+    """
+    # Contentless: der Index speichert den Text nicht (der liegt komprimiert in transcripts),
+    # Snippets baut search_transcripts selbst. detail=column verzichtet auf Wortpositionen
+    # (also keine Phrasen, siehe build_fts_query), damit ist der Index nur ein Bruchteil
+    # der komprimierten Snapshots groß.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transcript_snapshot_fts USING fts5(
+            content,
+            content='', detail=column,
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    rows = conn.execute("""
+        SELECT ticket_id, MAX(transcript_id)
+        FROM transcripts
+        WHERE ticket_id NOT IN (SELECT DISTINCT ticket_id FROM transcript_messages)
+        GROUP BY ticket_id
+    """).fetchall()
+    for ticket_id, transcript_id in rows:
+        text, _ = _load_snapshot(conn, transcript_id)
+        conn.execute(
+            "INSERT INTO transcript_snapshot_fts (rowid, content) VALUES (?, ?)",
+            (ticket_id, text)
+        )
 
-class Database:
-    def __init__(self):
-        # Erstelle Tabellen (falls nicht vorhanden)
-        self._create_tables()
-        self._ensure_admin_message_id_column()
-
-    def _create_tables(self):
-        with sqlite3.connect("tickets.sqlite") as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS tickets (
-                    id INTEGER PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    channel_id TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    status TEXT DEFAULT 'open',
-                    claimed_by TEXT,
-                    user_name TEXT
-                    -- admin_message_id kommt via _ensure_admin_message_id_column
-                );
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS transcripts (
-                    transcript_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ticket_id INTEGER NOT NULL,
-                    transcript_content TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS bot_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                );
-            """)
 
+def _migration_overview_pagination(conn: sqlite3.Connection):
+    """Denormalisiertes tickets.last_transcript_at für die seitenweise Ticket-Übersicht"""
+    conn.execute("ALTER TABLE tickets ADD COLUMN last_transcript_at TEXT")
+    conn.execute("""
+        UPDATE tickets SET last_transcript_at = (
+            SELECT MAX(created_at) FROM (
+                SELECT created_at FROM transcripts WHERE ticket_id = tickets.id
+                UNION ALL
+                SELECT created_at FROM transcript_messages WHERE ticket_id = tickets.id
+            )
+        )
+    """)
+    # Partielle Indizes: nur Tickets mit Transkript erscheinen in der Übersicht.
+    # Jede Filter-Variante ist damit ein Index-Range-Scan in Sortierreihenfolge.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_overview
+        ON tickets (last_transcript_at, id)
+        WHERE last_transcript_at IS NOT NULL
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_overview_status
+        ON tickets (status, last_transcript_at, id)
+        WHERE last_transcript_at IS NOT NULL
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_overview_user
+        ON tickets (user_id, last_transcript_at, id)
+        WHERE last_transcript_at IS NOT NULL
+    """)
+
+
+def _migration_change_tracking(conn: sqlite3.Connection):
+    """tickets.updated_at (Millisekunden) als Grundlage für HTTP-Caching im Web-Panel"""
+    conn.execute("ALTER TABLE tickets ADD COLUMN updated_at TEXT")
+    conn.execute(f"UPDATE tickets SET updated_at = {_NOW_MS}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_updated ON tickets (updated_at)")
+    # Jede Änderung am Ticket oder an seinen Nachrichten zieht updated_at nach.
+    # Die WHEN-Bedingung verhindert, dass sich der Trigger selbst erneut auslöst.
+    for name, event, ticket_column in (
+        ("tickets_touch_insert", "AFTER INSERT ON tickets", "id"),
+        ("transcript_messages_touch_insert", "AFTER INSERT ON transcript_messages", "ticket_id"),
+        ("transcript_messages_touch_update", "AFTER UPDATE ON transcript_messages", "ticket_id"),
+        ("transcripts_touch_insert", "AFTER INSERT ON transcripts", "ticket_id"),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN
+                UPDATE tickets SET updated_at = {_NOW_MS} WHERE id = new.{ticket_column};
+            END
+        """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_touch_update
+        AFTER UPDATE ON tickets WHEN new.updated_at IS old.updated_at BEGIN
+            UPDATE tickets SET updated_at = {_NOW_MS} WHERE id = new.id;
+        END
+    """)
+
+
+def _migration_member_roles(conn: sqlite3.Connection):
+    """member_roles: vom Bot gepflegter Auszug der Panel-Rollen aller Server-Mitglieder"""
+    # Nur Mitglieder mit mindestens einer Rolle aus ALLOWED_ROLES, roles kommagetrennt
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS member_roles (
+            user_id TEXT PRIMARY KEY,
+            roles TEXT NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+
+def _migration_ocr_cache(conn: sqlite3.Connection):
+    """OCR-Cache: erkannter Text und Zusammenfassung pro Bildinhalt (SHA-256) und URL"""
+    # size = Länge von Text + Zusammenfassung, Grundlage für die Größenbegrenzung
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            sha256 TEXT PRIMARY KEY,
+            ocr_text TEXT NOT NULL,
+            summary TEXT,
+            size INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_lru ON ocr_cache (last_used_at)")
+    # Mehrere URLs können auf denselben Bildinhalt zeigen
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_cache_urls (
+            url TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_urls_sha ON ocr_cache_urls (sha256)")
+
+
+def _migration_ban_details(conn: sqlite3.Connection):
+    """Cache für Ban-Details der Ban-API (auch unbekannte IDs), mit Ablaufzeit"""
+    # data = JSON der API-Antwort, NULL = ID ist der API unbekannt
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ban_details (
+            pid TEXT PRIMARY KEY,
+            data TEXT,
+            expires_at TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ban_details_expires ON ban_details (expires_at)")
+
+
+def _migration_transcript_time_format(conn: sqlite3.Connection):
+    """edited_at im selben Format wie created_at/deleted_at (statt ISO 8601)"""
+    conn.execute("""
+        UPDATE transcript_messages
+        SET edited_at = strftime('%Y-%m-%d %H:%M:%S', edited_at)
+        WHERE edited_at LIKE '%T%'
+    """)
+
+
+def _migration_contentless_snapshot_search(conn: sqlite3.Connection):
+    """Suchindex der Alt-Snapshots ohne eigene Textkopie (contentless)"""
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name='transcript_snapshot_fts'"
+    ).fetchone()[0]
+    if "content=''" in sql:
+        return False
+    # Bis Migration 6 neu war, lag hier der entpackte Text jedes Alt-Tickets noch einmal
+    conn.execute("DROP TABLE transcript_snapshot_fts")
+    _create_snapshot_search(conn)
+    return True
+
+
+# transcripts (Snapshots) wird seit transcript_messages nicht mehr beschrieben,
+# sondern nur noch für Tickets aus der Zeit davor gelesen.
+def _load_snapshot_chain(conn: sqlite3.Connection, transcript_id: int):
+    """
+    Liest die Delta-Kette eines Snapshots (noch komprimiert), ältester zuerst:
+    [(transcript_content, content_blob, codec, prefix_len), ...]
+    """
+    chain = []
+    current = transcript_id
+    while current is not None:
+        row = conn.execute(
+            "SELECT transcript_content, content_blob, codec, base_transcript_id, prefix_len "
+            "FROM transcripts WHERE transcript_id=?",
+            (current,)
+        ).fetchone()
+        content, blob, codec, base_id, prefix_len = row
+        chain.append((content, blob, codec, prefix_len))
+        current = base_id if codec == CODEC_DELTA else None
+    chain.reverse()
+    return chain
+
+
+def _load_snapshot(conn: sqlite3.Connection, transcript_id: int):
+    """
+    Setzt einen Snapshot aus seiner Delta-Kette zusammen.
+    Liefert (text, depth), depth = Anzahl Deltas bis zum letzten vollständigen Snapshot.
+    """
+    chain = _load_snapshot_chain(conn, transcript_id)
+    text = ""
+    for content, blob, codec, prefix_len in chain:
+        if codec is None:
+            text = content
+        elif codec == CODEC_FULL:
+            text = decompress_text(blob)
+        else:
+            text = text[:prefix_len] + decompress_text(blob)
+    return text, len(chain) - 1
+
+
+# (Version, Migration) - neue Migrationen immer hinten anhängen, nie umnummerieren
+MIGRATIONS = [
+    (1, _migration_base_schema),
+    (2, _migration_hot_query_indexes),
+    (3, _migration_compressed_transcripts),
+    (4, _migration_transcript_messages),
+    (5, _migration_live_capture),
+    (6, _migration_transcript_search),
+    (7, _migration_overview_pagination),
+    (8, _migration_change_tracking),
+    (9, _migration_member_roles),
+    (10, _migration_ocr_cache),
+    (11, _migration_ban_details),
+    (12, _migration_transcript_time_format),
+    (13, _migration_contentless_snapshot_search),
+]
+
+_migrated_paths = set()
+_migration_lock = threading.Lock()
+
+
+def migrate(conn: sqlite3.Connection):
+    """
+    Spielt alle Migrationen ein, deren Version über PRAGMA user_version liegt.
+    Jede Migration läuft in einer eigenen BEGIN IMMEDIATE-Transaktion,
+    damit Bot und Web-Panel nicht gleichzeitig dieselbe Migration ausführen.
+    Liefert eine Migration True (viele Zeilen umgeschrieben), wird die Datei
+    zum Schluss per VACUUM verkleinert - das geht nur außerhalb einer Transaktion.
+    """
+    needs_vacuum = False
+    for version, migration in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version <= current:
+                conn.rollback()
+                continue
+            if migration(conn):
+                needs_vacuum = True
+            conn.execute(f"PRAGMA user_version={version}")
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        print(f"[DB] Migration {version} angewendet: {migration.__doc__}")
+
+    if needs_vacuum:
+        print("[DB] VACUUM nach Migration (gibt den freigewordenen Platz an das Dateisystem zurück) ...")
+        conn.execute("VACUUM")
+
+
+def ensure_migrated(conn: sqlite3.Connection, path: str = DB_PATH):
+    """
+    Führt migrate() höchstens einmal pro Prozess und Datenbankdatei aus.
+    """
+    key = os.path.abspath(path)
+    with _migration_lock:
+        if key in _migrated_paths:
+            return
+        migrate(conn)
+        _migrated_paths.add(key)
+
+
+########################################################################
+# Volltextsuche
+########################################################################
+# Steuerzeichen als Treffer-Markierung im Snippet (kommen in Discord-Nachrichten nicht vor)
+SEARCH_MARK_START = "\x02"
+SEARCH_MARK_END = "\x03"
+
+# Ab so vielen Treffern wird nach Aktualität statt nach Relevanz sortiert
+SEARCH_RANK_LIMIT = 10000
+
+# bot_settings-Schlüssel: Zeitpunkt des letzten vollständigen member_roles-Abgleichs
+MEMBER_ROLES_SYNCED_KEY = "MEMBER_ROLES_SYNCED_AT"
 
-    def _ensure_admin_message_id_column(self):
+# Zeilen pro Lesezugriff beim gestreamten Ausliefern von Transkripten
+TRANSCRIPT_LINE_BATCH = 1000
+
+
+# Wortzeichen wie beim FTS5-Tokenizer unicode61: Buchstaben und Ziffern, alles andere trennt
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def build_fts_query(text: str, phrases: bool = True) -> str:
+    """
+    Macht aus einer Nutzereingabe eine sichere FTS5-Abfrage: jedes Wort wird
+    als Phrase gequotet (keine Syntaxfehler durch Sonderzeichen), alle Wörter
+    müssen vorkommen. Ein * am Wortende bleibt als Präfixsuche erhalten.
+    phrases=False (für Indizes mit detail=column): Wörter wie "abc-123" werden
+    in ihre Tokens zerlegt, die einzeln vorkommen müssen.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        parts = [word] if phrases else _TOKEN_RE.findall(word)
+        for i, part in enumerate(parts):
+            part = part.replace('"', '""')
+            if part:
+                terms.append(f'"{part}"' + ("*" if prefix and i == len(parts) - 1 else ""))
+    return " ".join(terms)
+
+
+def _fold(token: str) -> str:
+    """
+    Normalisiert ein Token wie unicode61 mit remove_diacritics: klein, ohne Akzente.
+    """
+    decomposed = unicodedata.normalize("NFKD", token)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def build_snippet(text: str, query: str, tokens: int = 16) -> str:
+    """
+    Gegenstück zu snippet() für Indizes ohne gespeicherten Text: der Ausschnitt von
+    tokens Wörtern, der die meisten verschiedenen Suchbegriffe enthält (bei Gleichstand
+    der früheste). Treffer sind mit SEARCH_MARK_START/END markiert, gekürzte Enden mit '…'.
+    """
+    terms = []
+    for word in query.split():
+        parts = [_fold(part) for part in _TOKEN_RE.findall(word)]
+        for i, part in enumerate(parts):
+            terms.append((part, word.endswith("*") and i == len(parts) - 1))
+
+    def hit_terms(token):
+        token = _fold(token)
+        return {
+            index for index, (term, prefix) in enumerate(terms)
+            if (token.startswith(term) if prefix else token == term)
+        }
+
+    matches = list(_TOKEN_RE.finditer(text))
+    hits = [(i, found) for i, found in ((i, hit_terms(m.group())) for i, m in enumerate(matches)) if found]
+    hit_positions = [i for i, _ in hits]
+    start, best = 0, 0
+    for position in hit_positions:
+        candidate = max(0, min(position - tokens // 4, len(matches) - tokens))
+        inside = hits[bisect.bisect_left(hit_positions, candidate):
+                      bisect.bisect_left(hit_positions, candidate + tokens)]
+        covered = set().union(*(found for _, found in inside))
+        if len(covered) > best:
+            start, best = candidate, len(covered)
+            if best == len(terms):
+                break
+    window = matches[start:start + tokens]
+    if not window:
+        return ""
+    hit_positions = set(hit_positions)
+    parts = []
+    position = window[0].start()
+    for i, match in enumerate(window, start):
+        parts.append(text[position:match.start()])
+        if i in hit_positions:
+            parts.append(SEARCH_MARK_START + match.group() + SEARCH_MARK_END)
+        else:
+            parts.append(match.group())
+        position = match.end()
+    return ("…" if start > 0 else "") + "".join(parts) + ("…" if start + tokens < len(matches) else "")
+
+
+_shared_async_db = None
+_shared_db_lock = threading.Lock()
+
+
+def get_async_database():
+    """
+    Liefert die prozessweit geteilte AsyncDatabase-Instanz für die Cogs und on_ready.
+    """
+    global _shared_async_db
+    with _shared_db_lock:
+        if _shared_async_db is None:
+            _shared_async_db = AsyncDatabase()
+        return _shared_async_db
+
+
+class Database:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = connect(path)
+        self._in_batch = False
+
+        # Schema-Migrationen (nur einmal pro Prozess und Datei)
+        with self._lock:
+            ensure_migrated(self._conn, path)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Führt den Block in einer Transaktion auf der langlebigen Verbindung aus
+        (Commit bei Erfolg, Rollback bei Exception).
+        Innerhalb von batch() wird stattdessen ein SAVEPOINT verwendet,
+        damit ein fehlschlagender Auftrag die übrigen nicht mitreißt.
         """
-        Versuche, per ALTER TABLE eine Spalte admin_message_id hinzuzufügen.
-        Falls es sie schon gibt, ignorieren wir den Fehler.
+        with self._lock:
+            if self._in_batch:
+                self._conn.execute("SAVEPOINT op")
+                try:
+                    yield self._conn
+                except BaseException:
+                    self._conn.execute("ROLLBACK TO op")
+                    self._conn.execute("RELEASE op")
+                    raise
+                self._conn.execute("RELEASE op")
+            else:
+                with self._conn:
+                    yield self._conn
+
+    @contextmanager
+    def batch(self):
+        """
+        Fasst alle Schreibvorgänge im Block zu einer einzigen Transaktion
+        mit nur einem Commit zusammen (Group Commit).
         """
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._in_batch = True
             try:
-                conn.execute("ALTER TABLE tickets ADD COLUMN admin_message_id TEXT")
-                conn.commit()
-                print("[DB] Spalte admin_message_id erfolgreich hinzugefügt.")
-            except sqlite3.OperationalError:
-                # Wahrscheinlich existiert die Spalte schon
-                pass
+                yield self
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            finally:
+                self._in_batch = False
+
+    def _fetchone(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
 
     ########################################################################
     # Bot-Settings: key-value
     ########################################################################
     def save_bot_setting(self, key: str, value: str):
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "INSERT OR REPLACE INTO bot_settings (key, value) VALUES (?, ?)",
                 (key, value)
             )
-            conn.commit()
 
     def get_bot_setting(self, key: str):
-        with sqlite3.connect("tickets.sqlite") as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT value FROM bot_settings WHERE key=?", (key,))
-            row = cur.fetchone()
-            if row:
-                return row[0]
+        row = self._fetchone("SELECT value FROM bot_settings WHERE key=?", (key,))
+        if row:
+            return row[0]
         return None
 
+    ########################################################################
+    # Rollen-Auszug für das Web-Panel
+    ########################################################################
+    def set_member_roles(self, user_id: int, roles):
+        """
+        Speichert die Panel-Rollen eines Mitglieds; ohne Rollen wird es entfernt.
+        """
+        roles = sorted(str(role) for role in roles)
+        with self._transaction() as conn:
+            if roles:
+                conn.execute(
+                    "INSERT INTO member_roles (user_id, roles, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP) "
+                    "ON CONFLICT(user_id) DO UPDATE SET roles=excluded.roles, updated_at=excluded.updated_at "
+                    "WHERE roles IS NOT excluded.roles",
+                    (str(user_id), ",".join(roles))
+                )
+            else:
+                conn.execute("DELETE FROM member_roles WHERE user_id=?", (str(user_id),))
+
+    def replace_member_roles(self, members):
+        """
+        Vollständiger Abgleich: members = [(user_id, roles), ...] ersetzt den ganzen
+        Auszug in einer Transaktion und vermerkt den Zeitpunkt in bot_settings.
+        """
+        rows = [
+            (str(user_id), ",".join(sorted(str(role) for role in roles)))
+            for user_id, roles in members if roles
+        ]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM member_roles")
+            conn.executemany("INSERT INTO member_roles (user_id, roles) VALUES (?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO bot_settings (key, value) VALUES (?, CURRENT_TIMESTAMP)",
+                (MEMBER_ROLES_SYNCED_KEY,)
+            )
+        print(f"[DB] Rollen-Auszug abgeglichen: {len(rows)} Mitglieder mit Panel-Rollen.")
+
+    def get_member_roles(self, user_id):
+        """
+        Panel-Rollen eines Mitglieds laut Auszug. Liefert None, solange der Bot noch
+        keinen vollständigen Abgleich geschrieben hat (dann ist der Auszug nicht aussagekräftig).
+        """
+        with self._lock:
+            if not self._conn.execute(
+                "SELECT 1 FROM bot_settings WHERE key=?", (MEMBER_ROLES_SYNCED_KEY,)
+            ).fetchone():
+                return None
+            row = self._conn.execute(
+                "SELECT roles FROM member_roles WHERE user_id=?", (str(user_id),)
+            ).fetchone()
+        return row[0].split(",") if row else []
+
+    ########################################################################
+    # OCR-Cache
+    ########################################################################
+    def get_ocr_cache(self, url: str = None, sha256: str = None):
+        """
+        Sucht einen Cache-Eintrag über die URL oder den SHA-256 des Bildes.
+        Liefert {"sha256", "ocr_text", "summary"} oder None.
+        """
+        with self._lock:
+            if sha256 is None:
+                row = self._conn.execute(
+                    "SELECT sha256 FROM ocr_cache_urls WHERE url=?", (url,)
+                ).fetchone()
+                if row is None:
+                    return None
+                sha256 = row[0]
+            row = self._conn.execute(
+                "SELECT sha256, ocr_text, summary FROM ocr_cache WHERE sha256=?", (sha256,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"sha256": row[0], "ocr_text": row[1], "summary": row[2]}
+
+    def touch_ocr_cache(self, sha256: str, url: str = None):
+        """
+        Markiert einen Eintrag als gerade benutzt (LRU) und merkt sich ggf. eine weitere URL.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE ocr_cache SET last_used_at={_NOW_MS} WHERE sha256=?", (sha256,)
+            )
+            if url:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache_urls (url, sha256) VALUES (?, ?)", (url, sha256)
+                )
+
+    def put_ocr_cache(self, url: str, sha256: str, ocr_text: str, summary, max_chars: int):
+        """
+        Speichert OCR-Text (und, falls vorhanden, die Zusammenfassung) und verdrängt
+        danach die am längsten nicht benutzten Einträge, bis der Cache wieder unter
+        max_chars Zeichen liegt.
+        """
+        size = len(ocr_text) + len(summary or "")
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO ocr_cache (sha256, ocr_text, summary, size, last_used_at) "
+                f"VALUES (?, ?, ?, ?, {_NOW_MS}) "
+                "ON CONFLICT(sha256) DO UPDATE SET ocr_text=excluded.ocr_text, "
+                "summary=COALESCE(excluded.summary, summary), "
+                "size=length(excluded.ocr_text) + length(COALESCE(excluded.summary, summary, '')), "
+                "last_used_at=excluded.last_used_at",
+                (sha256, ocr_text, summary, size)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache_urls (url, sha256) VALUES (?, ?)", (url, sha256)
+            )
+            evicted = conn.execute("""
+                DELETE FROM ocr_cache WHERE sha256 IN (
+                    SELECT sha256 FROM (
+                        SELECT sha256, SUM(size) OVER (ORDER BY last_used_at DESC, sha256) AS total
+                        FROM ocr_cache
+                    ) WHERE total > ?
+                )
+            """, (max_chars,)).rowcount
+            if evicted:
+                conn.execute(
+                    "DELETE FROM ocr_cache_urls WHERE sha256 NOT IN (SELECT sha256 FROM ocr_cache)"
+                )
+        if evicted:
+            print(f"[DB] OCR-Cache: {evicted} alte Einträge verdrängt.")
+
+    ########################################################################
+    # Ban-Details (Cache der Ban-API)
+    ########################################################################
+    def get_ban_detail(self, pid: str):
+        """
+        Liefert (data, restliche Gültigkeit in Sekunden) für einen noch gültigen
+        Eintrag - data ist None, wenn die ID der API unbekannt war - oder None,
+        wenn nichts gecacht ist.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, (julianday(expires_at) - julianday('now')) * 86400 "
+                "FROM ban_details WHERE pid=? AND expires_at > CURRENT_TIMESTAMP",
+                (pid,)
+            ).fetchone()
+        if row is None:
+            return None
+        return (json.loads(row[0]) if row[0] is not None else None), row[1]
+
+    def put_ban_detail(self, pid: str, data, ttl: float):
+        """
+        Speichert eine API-Antwort (None = unbekannte ID) für ttl Sekunden
+        und räumt dabei abgelaufene Einträge weg.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ban_details (pid, data, expires_at) "
+                "VALUES (?, ?, datetime('now', ?))",
+                (pid, json.dumps(data) if data is not None else None, f"+{int(ttl)} seconds")
+            )
+            conn.execute("DELETE FROM ban_details WHERE expires_at <= CURRENT_TIMESTAMP")
+
     ########################################################################
     # Ticket-Logik
     ########################################################################
-    def get_next_ticket_id(self):
-        with sqlite3.connect("tickets.sqlite") as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT COALESCE(MAX(id), 0) FROM tickets")
-            row = cur.fetchone()
-            max_id = row[0] if row else 0
-            return max_id + 1
+    def reserve_ticket(self, user_id: int, user_name: str) -> int:
+        """
+        Reserviert atomar eine neue Ticket-ID (Status 'pending'), noch bevor
+        der Discord-Kanal existiert. Parallele Aufrufe bekommen garantiert
+        unterschiedliche IDs, da SQLite sie im selben INSERT vergibt.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "INSERT INTO tickets (user_id, user_name, channel_id, status) "
+                "VALUES (?, ?, '', 'pending') RETURNING id",
+                (str(user_id), user_name)
+            ).fetchone()
+        print(f"[DB] Ticket-ID #{row[0]} reserviert für UserID={user_id}.")
+        return row[0]
 
-    def insert_ticket(self, ticket_id, user_id, user_name, channel_id):
-        with sqlite3.connect("tickets.sqlite") as conn:
+    def attach_ticket_channel(self, ticket_id: int, channel_id: int):
+        """
+        Verknüpft ein reserviertes Ticket mit seinem Kanal und öffnet es.
+        """
+        with self._transaction() as conn:
             conn.execute(
-                "INSERT INTO tickets (id, user_id, user_name, channel_id) VALUES (?, ?, ?, ?)",
-                (ticket_id, str(user_id), user_name, str(channel_id))
+                "UPDATE tickets SET channel_id=?, status='open' WHERE id=?",
+                (str(channel_id), ticket_id)
             )
-            conn.commit()
+        print(f"[DB] Ticket erstellt - ID={ticket_id}, Channel={channel_id}")
 
-    def log_ticket_created(self, ticket_id: int, user_id: int, user_name: str, channel_id: int):
-        self.insert_ticket(ticket_id, user_id, user_name, channel_id)
-        print(f"[DB] Ticket erstellt - ID={ticket_id}, UserID={user_id}, Name='{user_name}', Channel={channel_id}")
+    def release_ticket(self, ticket_id: int):
+        """
+        Markiert eine Reservierung als fehlgeschlagen (z. B. Kanal konnte nicht erstellt werden).
+        Die ID wird bewusst nicht wiederverwendet.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tickets SET status='failed' WHERE id=? AND status='pending'",
+                (ticket_id,)
+            )
+        print(f"[DB] Reservierung für Ticket #{ticket_id} verworfen.")
 
     def log_ticket_admin_message(self, ticket_id: int, admin_message_id: int):
         """
         Speichert die Nachricht, in der die Admin-Buttons sind,
         damit wir sie nach einem Neustart wieder anhängen können.
         """
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "UPDATE tickets SET admin_message_id=? WHERE id=?",
                 (str(admin_message_id), ticket_id)
             )
-            conn.commit()
         print(f"[DB] Ticket #{ticket_id}: admin_message_id={admin_message_id} hinterlegt.")
 
     def log_ticket_claimed(self, ticket_id: int, supporter_id: int):
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "UPDATE tickets SET status='claimed', claimed_by=? WHERE id=?",
                 (str(supporter_id), ticket_id)
             )
-            conn.commit()
         print(f"[DB] Ticket #{ticket_id} wurde von Supporter {supporter_id} beansprucht.")
 
     def log_ticket_closed(self, ticket_id: int):
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "UPDATE tickets SET status='closed' WHERE id=?",
                 (ticket_id,)
             )
-            conn.commit()
         print(f"[DB] Ticket #{ticket_id} wurde geschlossen.")
 
     def log_ticket_deleted(self, ticket_id: int):
-        with sqlite3.connect("tickets.sqlite") as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "UPDATE tickets SET status='deleted' WHERE id=?",
                 (ticket_id,)
             )
-            conn.commit()
         print(f"[DB] Ticket #{ticket_id} wurde gelöscht.")
 
-    def save_transcript(self, ticket_id: int, transcript_content: str):
-        print(f"[DB] Speichere Transkript für Ticket #{ticket_id} in der DB ...")
-        with sqlite3.connect("tickets.sqlite") as conn:
+    def append_transcript_messages(self, ticket_id: int, messages, checkpoint: int = None) -> int:
+        """
+        Hängt Nachrichten an das Transkript eines Tickets an.
+        messages: Iterable aus (message_id, author_id, author_name, created_at, content).
+        Bereits gespeicherte message_ids werden übersprungen. Liefert die Anzahl neuer Zeilen.
+        checkpoint: Ist das Transkript bis zu dieser message_id lückenlos, wird das vermerkt,
+        damit spätere Abgleiche erst ab dort die Kanal-History laden müssen.
+        """
+        messages = list(messages)
+        with self._transaction() as conn:
+            # rowcount statt total_changes: zählt keine Zeilen, die Trigger (FTS, updated_at) schreiben
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO transcript_messages "
+                "(message_id, ticket_id, author_id, author_name, created_at, content) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (message_id, ticket_id, str(author_id), author_name, created_at, content)
+                    for message_id, author_id, author_name, created_at, content in messages
+                )
+            ).rowcount
+            if added:
+                latest = max(row[3] for row in messages)
+                conn.execute(
+                    "UPDATE tickets SET last_transcript_at=? "
+                    "WHERE id=? AND (last_transcript_at IS NULL OR last_transcript_at < ?)",
+                    (latest, ticket_id, latest)
+                )
+            if checkpoint is not None:
+                conn.execute(
+                    "UPDATE tickets SET transcript_checkpoint=? "
+                    "WHERE id=? AND (transcript_checkpoint IS NULL OR transcript_checkpoint < ?)",
+                    (checkpoint, ticket_id, checkpoint)
+                )
+        return added
+
+    def get_transcript_checkpoint(self, ticket_id: int):
+        row = self._fetchone("SELECT transcript_checkpoint FROM tickets WHERE id=?", (ticket_id,))
+        return row[0] if row else None
+
+    def update_transcript_message(self, message_id: int, content: str, edited_at: str):
+        with self._transaction() as conn:
             conn.execute(
-                "INSERT INTO transcripts (ticket_id, transcript_content) VALUES (?, ?)",
-                (ticket_id, transcript_content)
+                "UPDATE transcript_messages SET content=?, edited_at=? WHERE message_id=?",
+                (content, edited_at, message_id)
+            )
+
+    def mark_transcript_messages_deleted(self, message_ids, deleted_at: str):
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE transcript_messages SET deleted_at=? WHERE message_id=? AND deleted_at IS NULL",
+                ((deleted_at, message_id) for message_id in message_ids)
             )
-            conn.commit()
 
     def get_transcript_by_ticket_id(self, ticket_id: int) -> str:
-        with sqlite3.connect("tickets.sqlite") as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT transcript_content FROM transcripts WHERE ticket_id=? ORDER BY transcript_id DESC LIMIT 1",
+        """
+        Liefert das Transkript als Text (eine Zeile pro Nachricht).
+        Tickets aus der Zeit vor transcript_messages fallen auf den letzten Snapshot zurück.
+        """
+        return "\n".join(self.iter_transcript_lines(ticket_id))
+
+    def iter_transcript_lines(self, ticket_id: int, start: int = 0, stop: int = None,
+                              batch_size: int = TRANSCRIPT_LINE_BATCH):
+        """
+        Liefert die Zeilen start..stop (0-basiert, stop exklusiv) des Transkripts
+        nacheinander, ohne den ganzen Text im Speicher aufzubauen.
+
+        Einzelnachrichten werden blockweise per message_id gelesen; der Lock wird nur
+        pro Block gehalten, ein langsamer Client blockiert also keine anderen Abfragen.
+        Alt-Snapshots werden gestreamt entpackt.
+        """
+        remaining = None if stop is None else max(stop - start, 0)
+        if remaining == 0:
+            return
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message_id, line FROM transcript_lines WHERE ticket_id=? "
+                "ORDER BY message_id LIMIT ? OFFSET ?",
+                (ticket_id, batch_size, start)
+            ).fetchall()
+            snapshot_chain = None
+            if not rows and not self._conn.execute(
+                "SELECT 1 FROM transcript_lines WHERE ticket_id=? LIMIT 1", (ticket_id,)
+            ).fetchone():
+                row = self._conn.execute(
+                    "SELECT transcript_id FROM transcripts WHERE ticket_id=? "
+                    "ORDER BY transcript_id DESC LIMIT 1",
+                    (ticket_id,)
+                ).fetchone()
+                if row:
+                    snapshot_chain = _load_snapshot_chain(self._conn, row[0])
+
+        if snapshot_chain is not None:
+            lines = iter_lines(iter_snapshot_text(snapshot_chain))
+            yield from itertools.islice(lines, start, stop)
+            return
+
+        while rows:
+            for _, line in rows:
+                yield line
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+            if len(rows) < batch_size:
+                return
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT message_id, line FROM transcript_lines WHERE ticket_id=? AND message_id > ? "
+                    "ORDER BY message_id LIMIT ?",
+                    (ticket_id, rows[-1][0], batch_size)
+                ).fetchall()
+
+    def get_ticket(self, ticket_id: int):
+        """
+        Alle Felder eines Tickets als dict oder None.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT id, user_id, user_name, channel_id, status, claimed_by, "
+                "created_at, last_transcript_at, updated_at FROM tickets WHERE id=?",
                 (ticket_id,)
             )
-            row = cur.fetchone()
-            if row:
-                return row[0]
-        return ""
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip((column[0] for column in cursor.description), row))
+
+    def iter_transcript_messages(self, ticket_id: int, after: int = 0, limit: int = None,
+                                 batch_size: int = TRANSCRIPT_LINE_BATCH):
+        """
+        Liefert die (nicht gelöschten) Nachrichten eines Tickets als dicts, aufsteigend
+        nach message_id und nur die nach after - ein Client kann also mit der letzten
+        gesehenen message_id gezielt nur Neues abholen.
+        Tickets, die nur als Alt-Snapshot vorliegen, liefern {"message_id": None,
+        "content": <Zeile>} pro Textzeile (after wird dort ignoriert).
+        """
+        columns = ("message_id", "author_id", "author_name", "created_at", "edited_at", "content")
+        remaining = limit
+        first = True
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(columns)} FROM transcript_messages "
+                    "WHERE ticket_id=? AND message_id > ? AND deleted_at IS NULL "
+                    "ORDER BY message_id LIMIT ?",
+                    (ticket_id, after, size)
+                ).fetchall()
+            if first and not rows and not after:
+                lines = itertools.islice(self.iter_transcript_lines(ticket_id), limit)
+                for line in lines:
+                    yield {"message_id": None, "content": line}
+                return
+            first = False
+
+            for row in rows:
+                yield dict(zip(columns, row))
+            if len(rows) < size:
+                return
+            after = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def iter_ticket_conversations(self, batch_size: int = 100):
+        """
+        Gespeicherte Verläufe aller Tickets, z. B. für das Offline-Training des
+        Kooperations-Klassifikators. Liefert pro Ticket (ticket_id, [{"role", "content"}, ...]);
+        "user" ist der Ticket-Ersteller, alle anderen (Bot, Support) gelten als "assistant".
+        Tickets, die nur als Alt-Snapshot vorliegen, fehlen (dort sind keine Autoren bekannt).
+        """
+        after = 0
+        while True:
+            with self._lock:
+                tickets = self._conn.execute(
+                    "SELECT id, user_id FROM tickets WHERE id > ? ORDER BY id LIMIT ?",
+                    (after, batch_size)
+                ).fetchall()
+            for ticket_id, user_id in tickets:
+                messages = [
+                    {"role": "user" if row["author_id"] == user_id else "assistant", "content": row["content"]}
+                    for row in self.iter_transcript_messages(ticket_id)
+                    if row["message_id"] is not None
+                ]
+                if messages:
+                    yield ticket_id, messages
+            if len(tickets) < batch_size:
+                return
+            after = tickets[-1][0]
+
+    def get_last_change(self, ticket_id: int = None):
+        """
+        Zeitpunkt der letzten Änderung (tickets.updated_at) eines Tickets bzw. ohne
+        ticket_id über alle Tickets. Dient dem Web-Panel als ETag/Last-Modified-Grundlage.
+        """
+        if ticket_id is None:
+            row = self._fetchone("SELECT MAX(updated_at) FROM tickets")
+        else:
+            row = self._fetchone("SELECT updated_at FROM tickets WHERE id=?", (ticket_id,))
+        return row[0] if row else None
+
+    def list_tickets(self, limit: int = 50, before=None, status: str = None, user: str = None,
+                     date_from: str = None, date_to: str = None):
+        """
+        Eine Seite der Ticket-Übersicht (nur Tickets mit Transkript), neueste zuerst.
+
+        Keyset-Pagination: before ist (last_transcript_at, id) der letzten Zeile der
+        vorherigen Seite. Dadurch kostet jede Seite gleich viel, egal wie viele Tickets
+        es insgesamt gibt. date_from/date_to sind Zeitstempel im selben Format wie
+        last_transcript_at (date_to exklusiv).
+        Liefert (Zeilen, before-Wert für die nächste Seite oder None).
+        """
+        where = ["last_transcript_at IS NOT NULL"]
+        params = []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if user:
+            if user.isdigit():
+                where.append("user_id = ?")
+                params.append(user)
+            else:
+                where.append("user_name LIKE ?")
+                params.append(f"%{user}%")
+        if date_from:
+            where.append("last_transcript_at >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("last_transcript_at < ?")
+            params.append(date_to)
+        if before:
+            where.append("(last_transcript_at, id) < (?, ?)")
+            params.extend(before)
+
+        rows = self._fetchall(f"""
+            SELECT id, user_id, user_name, status, last_transcript_at
+            FROM tickets
+            WHERE {" AND ".join(where)}
+            ORDER BY last_transcript_at DESC, id DESC
+            LIMIT ?
+        """, params + [limit + 1])
+
+        next_before = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_before = (rows[-1][4], rows[-1][0])
+        return rows, next_before
+
+    def search_transcripts(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Volltextsuche über alle Transkripte, beste Treffer zuerst (bm25).
+        Treffer-Stellen sind im Snippet mit SEARCH_MARK_START/SEARCH_MARK_END markiert,
+        damit der Aufrufer den Text selbst escapen kann.
+        Liefert (Trefferliste, ob es weitere Treffer gibt, ob nach Relevanz sortiert wurde).
+        """
+        match = build_fts_query(query)
+        if not match:
+            return [], False, True
+
+        # bm25 muss für jeden Treffer berechnet werden. Bei sehr allgemeinen Begriffen
+        # (zehntausende Treffer) sortieren wir stattdessen nach Aktualität,
+        # das kann FTS5 direkt über die Rowid (= message_id) liefern.
+        match_count = self._fetchone(
+            "SELECT COUNT(*) FROM transcript_fts WHERE transcript_fts MATCH ?", (match,)
+        )[0]
+        ranked = match_count <= SEARCH_RANK_LIMIT
+        order = "f.rank" if ranked else "f.rowid DESC"
+
+        # Beide Indizes getrennt abfragen (jeweils mit LIMIT), danach mischen
+        wanted = offset + limit + 1
+        params = (SEARCH_MARK_START, SEARCH_MARK_END, match, wanted)
+        message_hits = self._fetchall(f"""
+            SELECT f.rank, m.ticket_id, t.user_name, t.status, m.message_id,
+                   m.author_name, m.created_at,
+                   snippet(transcript_fts, 0, ?, ?, '…', 16)
+            FROM transcript_fts f
+            JOIN transcript_messages m ON m.message_id = f.rowid
+            JOIN tickets t ON t.id = m.ticket_id
+            WHERE transcript_fts MATCH ? AND m.deleted_at IS NULL
+            ORDER BY {order}
+            LIMIT ?
+        """, params)
+        # Der Snapshot-Index speichert keinen Text: Snippets erst für die angezeigte Seite
+        snapshot_match = build_fts_query(query, phrases=False)
+        snapshot_hits = self._fetchall("""
+            SELECT f.rank, f.rowid, t.user_name, t.status, NULL,
+                   NULL, NULL, NULL
+            FROM transcript_snapshot_fts f
+            JOIN tickets t ON t.id = f.rowid
+            WHERE transcript_snapshot_fts MATCH ?
+            ORDER BY f.rank
+            LIMIT ?
+        """, (snapshot_match, wanted)) if snapshot_match else []
+
+        if ranked:
+            merged = sorted(message_hits + snapshot_hits, key=lambda row: row[0])
+        else:
+            merged = message_hits + snapshot_hits
+        page = merged[offset:offset + limit]
+        results = []
+        for _, ticket_id, user_name, status, message_id, author_name, created_at, snippet in page:
+            if message_id is None:
+                snippet = self._snapshot_snippet(ticket_id, query)
+            results.append({
+                "ticket_id": ticket_id,
+                "user_name": user_name,
+                "status": status,
+                "message_id": message_id,
+                "author_name": author_name,
+                "created_at": created_at,
+                "snippet": snippet
+            })
+        return results, len(merged) > offset + limit, ranked
+
+    def _snapshot_snippet(self, ticket_id: int, query: str) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript_id FROM transcripts WHERE ticket_id=? "
+                "ORDER BY transcript_id DESC LIMIT 1",
+                (ticket_id,)
+            ).fetchone()
+            if row is None:
+                return ""
+            text, _ = _load_snapshot(self._conn, row[0])
+        return build_snippet(text, query)
+
+    def get_ticket_id_by_channel(self, channel_id: int):
+        row = self._fetchone(
+            "SELECT id FROM tickets WHERE channel_id=? ORDER BY id DESC LIMIT 1",
+            (str(channel_id),)
+        )
+        return row[0] if row else None
 
     def get_ticket_user(self, ticket_id: int):
-        with sqlite3.connect("tickets.sqlite") as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT user_id FROM tickets WHERE id=?", (ticket_id,))
-            row = cur.fetchone()
-            if row:
-                return int(row[0])
+        row = self._fetchone("SELECT user_id FROM tickets WHERE id=?", (ticket_id,))
+        if row:
+            return int(row[0])
         return None
 
     def get_open_or_claimed_tickets(self):
@@ -173,20 +1272,184 @@ class Database:
         Liefert alle Tickets, die nicht 'closed' und nicht 'deleted' sind.
         Also Status = 'open' oder 'claimed'.
         """
-        with sqlite3.connect("tickets.sqlite") as conn:
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT id, channel_id, admin_message_id, status
-                FROM tickets
-                WHERE status IN ('open', 'claimed')
-            """)
-            rows = cur.fetchall()
+        rows = self._fetchall("""
+            SELECT id, channel_id, admin_message_id, status
+            FROM tickets
+            WHERE status IN ('open', 'claimed')
+        """)
+        results = []
+        for row in rows:
+            results.append({
+                "ticket_id": row[0],
+                "channel_id": row[1],
+                "admin_message_id": row[2],
+                "status": row[3]
+            })
+        return results
+
+
+class AsyncDatabase:
+    """
+    Nicht-blockierende Variante von Database für Coroutinen.
+
+    Schreibzugriffe landen in einer Queue, die ein eigener Writer-Thread abarbeitet.
+    Alles, was bis dahin in der Queue liegt (z. B. mehrere Aufrufe aus demselben
+    Event-Loop-Tick), wird in einer einzigen Transaktion committet.
+    Lesezugriffe laufen über eine separate Verbindung in einem eigenen Thread,
+    damit sie nicht hinter Schreibvorgängen warten müssen (WAL).
+    """
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._writer = Database(path)
+        self._reader = Database(path)
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-reader")
+        self._queue = queue.Queue()
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="db-writer", daemon=True
+        )
+        self._writer_thread.start()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer_thread.join()
+        self._read_executor.shutdown(wait=True)
+        self._writer.close()
+        self._reader.close()
+
+    async def _write(self, func, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((func, args, future, loop))
+        return await future
+
+    async def _read(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, func, self._reader, *args)
+
+    def _writer_loop(self):
+        running = True
+        while running:
+            job = self._queue.get()
+            if job is None:
+                break
+            jobs = [job]
+            while len(jobs) < MAX_GROUP_COMMIT:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                jobs.append(job)
+
             results = []
-            for row in rows:
-                results.append({
-                    "ticket_id": row[0],
-                    "channel_id": row[1],
-                    "admin_message_id": row[2],
-                    "status": row[3]
-                })
-            return results
+            try:
+                with self._writer.batch():
+                    for func, args, _, _ in jobs:
+                        try:
+                            results.append((True, func(self._writer, *args)))
+                        except Exception as e:
+                            results.append((False, e))
+            except Exception as e:
+                print(f"[DB] Group-Commit fehlgeschlagen ({len(jobs)} Aufträge): {e}")
+                results = [(False, e)] * len(jobs)
+
+            for (_, _, future, loop), (ok, value) in zip(jobs, results):
+                loop.call_soon_threadsafe(_resolve_future, future, ok, value)
+
+    ########################################################################
+    # Bot-Settings
+    ########################################################################
+    async def save_bot_setting(self, key: str, value: str):
+        return await self._write(Database.save_bot_setting, key, value)
+
+    async def get_bot_setting(self, key: str):
+        return await self._read(Database.get_bot_setting, key)
+
+    ########################################################################
+    # Rollen-Auszug für das Web-Panel
+    ########################################################################
+    async def set_member_roles(self, user_id: int, roles):
+        return await self._write(Database.set_member_roles, user_id, list(roles))
+
+    async def replace_member_roles(self, members):
+        return await self._write(Database.replace_member_roles, list(members))
+
+    ########################################################################
+    # OCR-Cache
+    ########################################################################
+    async def get_ocr_cache(self, url: str = None, sha256: str = None):
+        return await self._read(Database.get_ocr_cache, url, sha256)
+
+    async def touch_ocr_cache(self, sha256: str, url: str = None):
+        return await self._write(Database.touch_ocr_cache, sha256, url)
+
+    async def put_ocr_cache(self, url: str, sha256: str, ocr_text: str, summary, max_chars: int):
+        return await self._write(Database.put_ocr_cache, url, sha256, ocr_text, summary, max_chars)
+
+    ########################################################################
+    # Ban-Details (Cache der Ban-API)
+    ########################################################################
+    async def get_ban_detail(self, pid: str):
+        return await self._read(Database.get_ban_detail, pid)
+
+    async def put_ban_detail(self, pid: str, data, ttl: float):
+        return await self._write(Database.put_ban_detail, pid, data, ttl)
+
+    ########################################################################
+    # Ticket-Logik
+    ########################################################################
+    async def reserve_ticket(self, user_id: int, user_name: str) -> int:
+        return await self._write(Database.reserve_ticket, user_id, user_name)
+
+    async def attach_ticket_channel(self, ticket_id: int, channel_id: int):
+        return await self._write(Database.attach_ticket_channel, ticket_id, channel_id)
+
+    async def release_ticket(self, ticket_id: int):
+        return await self._write(Database.release_ticket, ticket_id)
+
+    async def log_ticket_admin_message(self, ticket_id: int, admin_message_id: int):
+        return await self._write(Database.log_ticket_admin_message, ticket_id, admin_message_id)
+
+    async def log_ticket_claimed(self, ticket_id: int, supporter_id: int):
+        return await self._write(Database.log_ticket_claimed, ticket_id, supporter_id)
+
+    async def log_ticket_closed(self, ticket_id: int):
+        return await self._write(Database.log_ticket_closed, ticket_id)
+
+    async def log_ticket_deleted(self, ticket_id: int):
+        return await self._write(Database.log_ticket_deleted, ticket_id)
+
+    async def append_transcript_messages(self, ticket_id: int, messages, checkpoint: int = None) -> int:
+        return await self._write(Database.append_transcript_messages, ticket_id, list(messages), checkpoint)
+
+    async def get_transcript_checkpoint(self, ticket_id: int):
+        return await self._read(Database.get_transcript_checkpoint, ticket_id)
+
+    async def update_transcript_message(self, message_id: int, content: str, edited_at: str):
+        return await self._write(Database.update_transcript_message, message_id, content, edited_at)
+
+    async def mark_transcript_messages_deleted(self, message_ids, deleted_at: str):
+        return await self._write(Database.mark_transcript_messages_deleted, list(message_ids), deleted_at)
+
+    async def get_transcript_by_ticket_id(self, ticket_id: int) -> str:
+        return await self._read(Database.get_transcript_by_ticket_id, ticket_id)
+
+    async def get_ticket_id_by_channel(self, channel_id: int):
+        return await self._read(Database.get_ticket_id_by_channel, channel_id)
+
+    async def get_ticket_user(self, ticket_id: int):
+        return await self._read(Database.get_ticket_user, ticket_id)
+
+    async def get_open_or_claimed_tickets(self):
+        return await self._read(Database.get_open_or_claimed_tickets)
+
+
+def _resolve_future(future: asyncio.Future, ok: bool, value):
+    if future.cancelled():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
@@ -0,0 +1,94 @@
+# utils/http.py
+
+import asyncio
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+class HttpClient:
+    """
+    Gemeinsamer HTTP-Client für alle ausgehenden Anfragen eines Cogs
+    (Ban-API, Bild-Downloads).
+
+    - Eine aiohttp-Session für die ganze Laufzeit: Verbindungen bleiben offen
+      (Keep-Alive), DNS-Antworten werden zwischengespeichert.
+    - Höchstens limit_per_host gleichzeitige Verbindungen pro Host.
+    - Feste Zeitlimits für Verbindungsaufbau und jedes Lesen vom Socket.
+    - Pro Host werden Anfragen, Statusklassen, Fehler, Timeouts und die
+      Gesamtdauer gezählt (stats / format_stats).
+    """
+
+    def __init__(self, connect_timeout: float, read_timeout: float, total_timeout: float,
+                 limit: int = 100, limit_per_host: int = 8, dns_ttl: int = 300,
+                 keepalive_timeout: float = 30):
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout,
+            sock_connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.stats = defaultdict(Counter)
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Erst beim ersten Aufruf angelegt: aiohttp braucht dafür einen laufenden Event-Loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """
+        Wie session.request(), zählt aber Dauer (bis der Aufrufer die Antwort
+        fertig gelesen hat), Statusklasse und Fehler pro Host.
+        """
+        stats = self.stats[urlsplit(url).hostname]
+        stats["requests"] += 1
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, url, **kwargs) as resp:
+                stats[f"status_{resp.status // 100}xx"] += 1
+                yield resp
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            raise
+        except aiohttp.ClientError:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["latency_ms"] += int((time.perf_counter() - start) * 1000)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def format_stats(self) -> str:
+        """
+        Zähler als eine Log-Zeile pro Host, inkl. mittlerer Dauer.
+        """
+        lines = []
+        for host, stats in sorted(self.stats.items()):
+            counts = ", ".join(
+                f"{key}={value}" for key, value in sorted(stats.items()) if key != "latency_ms"
+            )
+            average = stats["latency_ms"] / stats["requests"] if stats["requests"] else 0
+            lines.append(f"{host}: {counts}, avg={average:.0f}ms")
+        return "\n".join(lines)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
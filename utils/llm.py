@@ -0,0 +1,175 @@
+# utils/llm.py
+
+import asyncio
+import datetime
+import email.utils
+import random
+import time
+from collections import Counter
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, Timeout
+
+# Statuscodes, bei denen ein erneuter Versuch sinnvoll ist
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Retry-After in Sekunden: Zahl oder HTTP-Datum (RFC 9110), ein Datum in der
+    Vergangenheit ergibt 0. None, wenn der Wert fehlt oder nicht lesbar ist.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        # HTTP-Daten sind immer GMT, auch ohne (oder mit "-0000" als) Zonenangabe
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class LlmGateway:
+    """
+    Einziger Zugang des Bots zur OpenAI-API, komplett asynchron (kein Thread pro Anfrage).
+
+    - Ein Client und damit ein gemeinsamer HTTP-Verbindungspool für alle Aufrufe.
+    - Höchstens max_concurrency Anfragen (und damit Verbindungen) gleichzeitig,
+      weitere warten auf einen Platz.
+    - 429/5xx/Verbindungsfehler werden bis zu max_retries mal wiederholt: Wartezeit laut
+      Retry-After (Sekunden oder HTTP-Datum), sonst exponentiell mit Zufallsanteil (Full Jitter). Verlangt der
+      Server länger als max_retry_wait, wird sofort aufgegeben.
+    - Jeder Versuch hat ein eigenes Zeitlimit.
+    - complete() liefert die ganze Antwort, stream() die Antwort stückweise.
+    - stats zählt Aufrufe, Wiederholungen, Fehler, Wartezeit auf einen Platz, Dauer
+      und bei Streams die Zeit bis zum ersten Token.
+    """
+
+    def __init__(self, api_key: str, model: str, base_url: str = None,
+                 max_concurrency: int = 4, timeout: float = 30, connect_timeout: float = 5,
+                 max_retries: int = 3, backoff_base: float = 0.5, max_retry_wait: float = 20):
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_retry_wait = max_retry_wait
+        self.stats = Counter()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            # Wiederholungen übernimmt der Gateway selbst (mit Semaphore und Statistik)
+            max_retries=0,
+            timeout=Timeout(timeout, connect=connect_timeout)
+        )
+
+    def _retry_delay(self, attempt: int, error) -> float:
+        """
+        Wartezeit vor dem nächsten Versuch (None = nicht wiederholen).
+        """
+        if isinstance(error, APIStatusError) and error.status_code not in RETRY_STATUS:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        retry_after = None
+        if isinstance(error, APIStatusError):
+            retry_after = parse_retry_after(error.response.headers.get("retry-after"))
+        if retry_after is not None:
+            if retry_after > self.max_retry_wait:
+                return None
+            # Kleiner Zufallsanteil, damit wartende Aufrufe nicht gleichzeitig wiederkommen
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.max_retry_wait, self.backoff_base * 2 ** attempt))
+
+    async def _call(self, create, keep_slot: bool = False, **kwargs):
+        """
+        create(**kwargs) mit Platz im Semaphore und Wiederholungen.
+        keep_slot=True (Streams): der Platz bleibt nach Erfolg belegt, bis der
+        Aufrufer ihn mit self._slots.release() freigibt.
+        """
+        attempt = 0
+        while True:
+            queued = time.perf_counter()
+            await self._slots.acquire()
+            started = time.perf_counter()
+            self.stats["wait_ms"] += int((started - queued) * 1000)
+            self.stats["requests"] += 1
+            try:
+                response = await create(model=self.model, **kwargs)
+            except (APIStatusError, APIConnectionError) as e:
+                error = e
+            except BaseException:
+                self._slots.release()
+                raise
+            else:
+                if not keep_slot:
+                    self._slots.release()
+                return response
+            finally:
+                self.stats["latency_ms"] += int((time.perf_counter() - started) * 1000)
+            self._slots.release()
+
+            delay = self._retry_delay(attempt, error)
+            if delay is None:
+                self.stats["errors"] += 1
+                raise error
+            attempt += 1
+            self.stats["retries"] += 1
+            print(f"[WARN] [LLM] {type(error).__name__}, Versuch {attempt + 1} in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+    async def complete(self, messages: list, **kwargs) -> str:
+        """
+        Chat-Completion; liefert den Antworttext (ohne Leerraum am Rand).
+        kwargs gehen unverändert an die API (max_tokens, temperature, response_format, ...).
+        """
+        self.stats["calls"] += 1
+        response = await self._call(self.client.chat.completions.create, messages=messages, **kwargs)
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages: list, **kwargs):
+        """
+        Chat-Completion als Stream: liefert die Textstücke, sobald sie ankommen.
+        Wiederholt wird nur der Verbindungsaufbau; bricht der Stream danach ab,
+        geht der Fehler an den Aufrufer. Der Platz im Semaphore bleibt belegt,
+        bis der Stream gelesen oder geschlossen ist; Aufrufer, die vorzeitig aussteigen
+        (oder abgebrochen werden), lesen ihn daher in contextlib.aclosing(...).
+        """
+        self.stats["calls"] += 1
+        self.stats["streams"] += 1
+        started = time.perf_counter()
+        response = await self._call(
+            self.client.chat.completions.create, keep_slot=True, messages=messages, stream=True, **kwargs
+        )
+        first = True
+        try:
+            async for chunk in response:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if first:
+                    self.stats["first_token_ms"] += int((time.perf_counter() - started) * 1000)
+                    first = False
+                yield chunk.choices[0].delta.content
+        except (APIStatusError, APIConnectionError):
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._slots.release()
+            await response.close()
+
+    def format_stats(self) -> str:
+        stats = self.stats
+        requests = stats["requests"] or 1
+        return (
+            f"Aufrufe {stats['calls']}, Anfragen {stats['requests']}, Wiederholungen {stats['retries']}, "
+            f"Fehler {stats['errors']}, Ø Wartezeit {stats['wait_ms'] / requests:.0f}ms, "
+            f"Ø Dauer {stats['latency_ms'] / requests:.0f}ms, "
+            f"Streams {stats['streams']} (Ø erstes Token {stats['first_token_ms'] / (stats['streams'] or 1):.0f}ms)"
+        )
+
+    async def close(self):
+        await self.client.close()
@@ -0,0 +1,250 @@
+# utils/ocr.py
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Sprache für Tesseract (Paket tesseract-ocr-deu)
+OCR_LANG = "deu"
+
+# Zusätzliche Wartezeit über das Tesseract-Zeitlimit hinaus, bevor ein Auftrag
+# auch auf Python-Seite als abgelaufen gilt (Bild dekodieren, Prozessstart)
+TIMEOUT_GRACE = 5.0
+
+
+class OcrError(Exception):
+    """OCR konnte nicht ausgeführt werden."""
+
+
+class OcrQueueFull(OcrError):
+    """Zu viele Bilder warten bereits auf OCR."""
+
+
+class OcrTimeout(OcrError):
+    """Tesseract hat das Zeitlimit überschritten."""
+
+
+class ImageTooLarge(OcrError):
+    """Bild überschreitet die erlaubte Datei- oder Pixelgröße."""
+
+
+def _otsu_threshold(histogram: list) -> int:
+    """
+    Schwellwert nach Otsu für ein 256-stufiges Graustufen-Histogramm.
+    """
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 127
+    for i, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+
+def preprocess_image(img, max_side: int, regions=()) -> list:
+    """
+    Bereitet einen Screenshot für Tesseract vor und liefert die zu lesenden Ausschnitte:
+    - nur das erste Bild bei animierten GIF/WebP/APNG
+    - Zuschneiden auf regions (relative Koordinaten x0, y0, x1, y1), falls angegeben
+    - Verkleinern, bis die längste Seite höchstens max_side Pixel hat
+    - Graustufen + Binarisierung (Otsu), dunkler Hintergrund (Discord-Darkmode)
+      wird invertiert, da Tesseract dunklen Text auf hellem Grund erwartet
+    """
+    from PIL import Image
+
+    img.seek(0)
+    img = img.convert("L")
+    width, height = img.size
+    boxes = [
+        (int(x0 * width), int(y0 * height), int(x1 * width), int(y1 * height))
+        for x0, y0, x1, y1 in regions
+    ] or [None]
+
+    parts = []
+    for box in boxes:
+        part = img.crop(box) if box else img
+        scale = max_side / max(part.size)
+        if scale < 1:
+            part = part.resize(
+                (max(int(part.width * scale), 1), max(int(part.height * scale), 1)),
+                Image.LANCZOS
+            )
+        histogram = part.histogram()
+        threshold = _otsu_threshold(histogram)
+        dark_background = sum(histogram[:threshold + 1]) > sum(histogram[threshold + 1:])
+        if dark_background:
+            part = part.point(lambda v: 0 if v > threshold else 255)
+        else:
+            part = part.point(lambda v: 255 if v > threshold else 0)
+        parts.append(part.convert("1"))
+    return parts
+
+
+def _ocr_worker(image_bytes: bytes, lang: str, timeout: float,
+                max_pixels: int, max_side: int, regions: tuple) -> str:
+    """
+    Läuft im Worker-Prozess: Bild prüfen, vorverarbeiten und Tesseract ausführen.
+    pytesseract beendet den Tesseract-Prozess selbst, wenn timeout überschritten wird.
+    """
+    import pytesseract
+    from PIL import Image
+
+    # Schutz vor Dekompressionsbomben: Image.open liest nur den Header,
+    # die Pixelzahl wird geprüft, bevor irgendetwas dekodiert wird
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            if img.width * img.height > max_pixels:
+                raise ImageTooLarge(f"{img.width}x{img.height} Pixel, erlaubt sind {max_pixels}.")
+            parts = preprocess_image(img, max_side, regions)
+        return "\n".join(
+            pytesseract.image_to_string(part, lang=lang, timeout=timeout) for part in parts
+        )
+    except OcrError:
+        raise
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from None
+    except RuntimeError as e:
+        # pytesseract meldet Zeitüberschreitungen als RuntimeError
+        if "timeout" in str(e).lower():
+            raise OcrTimeout(str(e)) from None
+        raise OcrError(f"{type(e).__name__}: {e}") from None
+    except Exception as e:
+        # Nicht jede Fremd-Exception lässt sich zurück in den Bot-Prozess übertragen
+        # (z. B. TesseractNotFoundError) - ein Pickle-Fehler würde den ganzen Pool zerstören
+        raise OcrError(f"{type(e).__name__}: {e}") from None
+
+
+class OcrEngine:
+    """
+    Führt OCR in einem Prozess-Pool aus, damit Tesseract den Event-Loop des Bots
+    nie blockiert.
+
+    - Höchstens workers Bilder laufen gleichzeitig, weitere warten (ohne den Pool
+      zu belegen) in einer auf max_pending begrenzten Warteschlange.
+    - Jeder Auftrag hat ein Zeitlimit; wird der aufrufende Task abgebrochen,
+      bevor sein Bild an der Reihe ist, wird es gar nicht erst verarbeitet.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float, lang: str = OCR_LANG,
+                 max_pixels: int = 40_000_000, max_side: int = 2000, regions=()):
+        self.workers = max(workers, 1)
+        self.max_pending = max(max_pending, self.workers)
+        self.timeout = timeout
+        self.lang = lang
+        self.max_pixels = max_pixels
+        self.max_side = max_side
+        self.regions = tuple(regions)
+        self._pool = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self._pending = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn": der Bot hat bereits Threads (DB-Writer), fork wäre dann nicht sicher
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(self, func, *args, timeout: float):
+        """
+        Führt func(*args) im Pool aus und wartet höchstens timeout Sekunden.
+        """
+        if self._pending >= self.max_pending:
+            raise OcrQueueFull(f"{self._pending} OCR-Aufträge warten bereits.")
+
+        self._pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                pool = self._get_pool()
+                try:
+                    future = loop.run_in_executor(pool, func, *args)
+                except BrokenProcessPool:
+                    # Pool ging schon vor diesem Auftrag kaputt (z. B. Worker im Leerlauf
+                    # beendet): der Auftrag lief noch nicht, also neuer Pool und erneut einreichen
+                    self._discard_pool(pool)
+                    pool = self._get_pool()
+                    future = loop.run_in_executor(pool, func, *args)
+                try:
+                    return await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    raise OcrTimeout(f"OCR nach {timeout:.0f}s abgebrochen.") from None
+                except BrokenProcessPool as e:
+                    # Ein Worker ist abgestürzt -> beim nächsten Auftrag neuen Pool anlegen
+                    self._discard_pool(pool)
+                    raise OcrError(f"OCR-Worker abgestürzt: {e}") from None
+        finally:
+            self._pending -= 1
+
+    async def extract(self, image_bytes: bytes) -> str:
+        """
+        Erkennt den Text eines Bildes (PNG/JPEG/... als Bytes).
+        """
+        return await self.run(
+            _ocr_worker, image_bytes, self.lang, self.timeout,
+            self.max_pixels, self.max_side, self.regions,
+            timeout=self.timeout + TIMEOUT_GRACE
+        )
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        # Nur den kaputten Pool verwerfen, nicht einen inzwischen neu angelegten
+        if self._pool is pool:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_engine = None
+
+
+def get_engine() -> OcrEngine:
+    """
+    Die gemeinsame OCR-Engine des Bot-Prozesses (wird beim ersten Aufruf angelegt).
+    """
+    global _engine
+    if _engine is None:
+        # Erst hier importiert: die Worker-Prozesse laden dieses Modul neu und
+        # brauchen die Bot-Konfiguration nicht
+        from utils import config
+        _engine = OcrEngine(
+            workers=config.OCR_WORKERS,
+            max_pending=config.OCR_QUEUE_MAX,
+            timeout=config.OCR_TIMEOUT,
+            max_pixels=config.OCR_MAX_PIXELS,
+            max_side=config.OCR_MAX_SIDE,
+            regions=config.OCR_REGIONS
+        )
+    return _engine
+
+
+async def extract(image_bytes: bytes) -> str:
+    """
+    Kurzform für get_engine().extract(image_bytes).
+    """
+    return await get_engine().extract(image_bytes)
+
+
+def shutdown():
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+        _engine = None
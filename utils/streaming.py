@@ -0,0 +1,151 @@
+# utils/streaming.py
+
+import asyncio
+import time
+
+import discord
+
+# Höchstlänge einer Discord-Nachricht
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Wird während des Schreibens ans Ende gehängt bzw. steht im Platzhalter
+CURSOR = " ▌"
+PLACEHOLDER = "✍️ …"
+
+# Platz für den Cursor bleibt frei, damit sich die Aufteilung beim Abschluss nicht verschiebt
+PAGE_LIMIT = DISCORD_MESSAGE_LIMIT - len(CURSOR)
+
+
+def split_message(text: str, limit: int = PAGE_LIMIT) -> list:
+    """
+    Teilt text in Stücke von höchstens limit Zeichen: bevorzugt an Absätzen,
+    dann an Zeilen, Satzenden und Leerzeichen, nur notfalls mitten im Wort.
+    Ein Trennpunkt hängt nur von den ersten limit Zeichen ab, volle Stücke
+    ändern sich also nicht mehr, wenn weiterer Text dazukommt.
+    """
+    parts = []
+    while len(text) > limit:
+        window = text[:limit]
+        cut = limit
+        for separator in ("\n\n", "\n", ". ", " "):
+            pos = window.rfind(separator)
+            if pos >= limit // 2:
+                cut = pos + len(separator)
+                break
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    parts.append(text)
+    return parts
+
+
+class StreamingReply:
+    """
+    Zeigt eine gestreamte Antwort schrittweise in einem Discord-Kanal an.
+
+    - Sofort ein Platzhalter (parallel zur LLM-Anfrage gesendet), der dann
+      bearbeitet wird, sobald Text ankommt.
+    - Das erste Textstück wird sofort angezeigt, danach höchstens alle
+      edit_interval Sekunden eine Bearbeitung (Discord begrenzt Bearbeitungen pro Kanal).
+    - Passt der Text nicht mehr in eine Nachricht, wird die volle Nachricht
+      abgeschlossen und in einer neuen weitergeschrieben.
+    - first_visible: Sekunden vom Start bis das erste Token im Kanal zu sehen war
+      (None, solange nichts gestreamt wurde).
+
+    Als async-Kontextmanager: endet der Block mit einem Fehler oder Abbruch, bevor
+    Text zu sehen war oder finish() aufgerufen wurde, wird der Platzhalter wieder gelöscht
+    (auch wenn der Task währenddessen ein weiteres Mal abgebrochen wird).
+    """
+
+    def __init__(self, channel, edit_interval: float, prefix: str = ""):
+        self.channel = channel
+        self.edit_interval = edit_interval
+        self.text = prefix
+        self._prefix_len = len(prefix)
+        self.messages = []
+        self.edits = 0
+        self.first_visible = None
+        self.finished = False
+        self._contents = []
+        self._started = time.perf_counter()
+        self._last_render = 0.0
+        self._placeholder = None
+
+    @property
+    def visible(self) -> bool:
+        return self.first_visible is not None
+
+    async def __aenter__(self):
+        self._placeholder = asyncio.ensure_future(self.channel.send(PLACEHOLDER))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and not self.visible and not self.finished:
+            # Ein überholter Zug wird evtl. erneut abgebrochen, das Löschen läuft trotzdem zu Ende
+            await asyncio.shield(self.discard())
+        return False
+
+    async def feed(self, delta: str):
+        self.text += delta
+        if not self.visible or time.perf_counter() - self._last_render >= self.edit_interval:
+            await self._render(final=False)
+
+    async def finish(self, text: str = None):
+        """
+        Letzte Bearbeitung ohne Cursor; text ersetzt auf Wunsch den bisherigen Inhalt.
+        """
+        if text is not None:
+            self.text = text
+        await self._render(final=True)
+        self.finished = True
+
+    async def discard(self):
+        """
+        Löscht alle bisher gesendeten Nachrichten (inkl. Platzhalter).
+        """
+        try:
+            await self._await_placeholder()
+        except discord.HTTPException:
+            return
+        for msg in self.messages:
+            try:
+                await msg.delete()
+            except discord.HTTPException:
+                pass
+        self.messages = []
+        self._contents = []
+
+    async def _await_placeholder(self):
+        if self._placeholder is not None:
+            placeholder, self._placeholder = self._placeholder, None
+            self.messages.append(await placeholder)
+            self._contents.append(PLACEHOLDER)
+
+    async def _render(self, final: bool):
+        await self._await_placeholder()
+        pages = split_message(self.text)
+        for i, page in enumerate(pages):
+            if not page.strip():
+                content = PLACEHOLDER
+            elif final or i < len(pages) - 1:
+                content = page
+            else:
+                content = page + CURSOR
+            if i < len(self.messages):
+                if self._contents[i] != content:
+                    await self.messages[i].edit(content=content)
+                    self.edits += 1
+            else:
+                self.messages.append(await self.channel.send(content))
+                self._contents.append(content)
+            self._contents[i] = content
+        # Endtext kürzer als das Gestreamte (z. B. Fehlertext): überzählige Nachrichten weg
+        while final and len(self.messages) > len(pages):
+            self._contents.pop()
+            try:
+                await self.messages.pop().delete()
+            except discord.HTTPException:
+                pass
+        self._last_render = time.perf_counter()
+        # Nur gestreamter Text zählt, nicht Präfix oder ein fertig gesetzter Ersatztext
+        if not self.visible and not final and self.text[self._prefix_len:].strip():
+            self.first_visible = self._last_render - self._started
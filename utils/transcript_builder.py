@@ -0,0 +1,80 @@
+# utils/transcript_builder.py
+
+from datetime import datetime
+
+import discord
+
+# Anzahl Nachrichten, die pro Transaktion geschrieben werden.
+# Mehr als das wird nie gleichzeitig im Speicher gehalten.
+TRANSCRIPT_CHUNK_SIZE = 500
+
+# Einheitliches Zeitformat (UTC) für created_at, edited_at und deleted_at:
+# Zeitstempel werden in SQL als Text verglichen und sortiert
+TRANSCRIPT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_transcript_time(value=None) -> str:
+    """
+    datetime oder ISO-8601-Text (z. B. edited_timestamp aus dem Gateway) im
+    Transkript-Format; ohne Wert die aktuelle Zeit.
+    """
+    if value is None:
+        value = discord.utils.utcnow()
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime(TRANSCRIPT_TIME_FORMAT)
+
+
+def message_to_transcript_row(msg: discord.Message) -> tuple:
+    """
+    Wandelt eine Discord-Nachricht in eine Zeile für transcript_messages um.
+    """
+    return (
+        msg.id,
+        msg.author.id,
+        msg.author.display_name,
+        format_transcript_time(msg.created_at),
+        msg.content
+    )
+
+
+async def iter_history_chunks(channel, after=None, chunk_size: int = TRANSCRIPT_CHUNK_SIZE):
+    """
+    Liest die Kanal-History (älteste zuerst) und liefert sie in Blöcken von
+    höchstens chunk_size formatierten Zeilen.
+    """
+    chunk = []
+    async for msg in channel.history(limit=None, after=after, oldest_first=True):
+        chunk.append(message_to_transcript_row(msg))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def sync_transcript(db, channel, ticket_id: int, chunk_size: int = TRANSCRIPT_CHUNK_SIZE):
+    """
+    Gleicht das gespeicherte Transkript mit der Kanal-History ab.
+
+    Startet hinter dem Checkpoint des Tickets und schreibt jeden Block in einer
+    eigenen Transaktion, die den Checkpoint mitzieht. Bricht der Lauf ab
+    (Absturz, Rate-Limit, Kanal zwischendurch gelöscht), setzt der nächste Aufruf
+    per after= genau dort wieder an.
+
+    Liefert (Anzahl neuer Nachrichten, ob die History vollständig gelesen wurde).
+    """
+    checkpoint = await db.get_transcript_checkpoint(ticket_id)
+    after = discord.Object(id=checkpoint) if checkpoint else None
+
+    added = 0
+    try:
+        async for chunk in iter_history_chunks(channel, after=after, chunk_size=chunk_size):
+            added += await db.append_transcript_messages(ticket_id, chunk, checkpoint=chunk[-1][0])
+    except discord.HTTPException as e:
+        print(f"[WARN] Transkript #{ticket_id}: Abgleich nach {added} Nachrichten unterbrochen: {e}")
+        return added, False
+
+    if added:
+        print(f"[LOG] Transkript #{ticket_id}: {added} Nachrichten aus der History nachgeladen.")
+    return added, True
@@ -0,0 +1,133 @@
+# utils/transcript_codec.py
+
+import codecs
+import itertools
+import zlib
+
+# Codec-Kennungen in transcripts.codec
+# NULL           -> Klartext in transcript_content (Altbestand)
+# "zlib-d1"      -> kompletter Text, zlib mit Wörterbuch v1
+# "zlib-d1-delta"-> nur der neue Teil gegenüber dem Vorgänger-Snapshot (base_transcript_id),
+#                   die ersten prefix_len Zeichen stammen aus dem Vorgänger
+CODEC_FULL = "zlib-d1"
+CODEC_DELTA = "zlib-d1-delta"
+
+# Nach so vielen Deltas in Folge wird wieder ein vollständiger Snapshot gespeichert,
+# damit das Lesen nicht beliebig lange Ketten auflösen muss.
+MAX_DELTA_CHAIN = 8
+
+# Höchstens so viele Bytes werden beim gestreamten Entpacken auf einmal erzeugt
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Gemeinsames Wörterbuch: Textbausteine, die in fast jedem Transkript vorkommen.
+# zlib nutzt es als "Vorwissen", was vor allem kurze Transkripte deutlich kleiner macht.
+# ACHTUNG: Niemals ändern - für ein neues Wörterbuch eine neue Codec-Kennung anlegen.
+_ZDICT_V1 = (
+    "Hallo, ich bin Sekretärin Siegrid. "
+    "Bitte teile mir zuerst deine **ID** mit, damit ich deinen Banngrund nachschauen kann. "
+    "Bitte teile mir zuerst deine **ID** mit, damit ich deinen Banngrund prüfen kann. "
+    "Diese ID ist mir nicht bekannt. Bitte überprüfe sie oder nenne mir eine andere ID. "
+    "Bitte gib jetzt deinen **Entbannungsantrag** dazu ab: "
+    "Warum möchtest du entbannt werden und wie siehst du dein Verhalten? "
+    "Ein Supporter oder Administrator ist jetzt anwesend. Ich beende meine Antworten. "
+    "Danke für deine ausführliche Erklärung. Ich gebe das nun an "
+    "Ticket wird geschlossen. Bitte hier nichts mehr schreiben. "
+    "Transkript wurde automatisch erstellt und gespeichert. "
+    "Ticket ist nun geschlossen. Ticket-Kanal wird gelöscht... "
+    "Willkommen! Bitte schildere kurz dein Anliegen. "
+    "Ticket #"
+).encode("utf-8")
+
+
+def compress_text(text: str) -> bytes:
+    compressor = zlib.compressobj(level=9, zdict=_ZDICT_V1)
+    return compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def decompress_text(blob: bytes) -> str:
+    decompressor = zlib.decompressobj(zdict=_ZDICT_V1)
+    return (decompressor.decompress(blob) + decompressor.flush()).decode("utf-8")
+
+
+def iter_decompressed(blob: bytes, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Entpackt stückweise und liefert Text-Blöcke, ohne den ganzen Text aufzubauen.
+    """
+    decompressor = zlib.decompressobj(zdict=_ZDICT_V1)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    data = blob
+    while data:
+        out = decompressor.decompress(data, chunk_size)
+        data = decompressor.unconsumed_tail
+        if out:
+            yield decoder.decode(out)
+    yield decoder.decode(decompressor.flush(), final=True)
+
+
+def _take_chars(chunks, count: int):
+    for chunk in chunks:
+        if count <= 0:
+            return
+        if len(chunk) > count:
+            chunk = chunk[:count]
+        count -= len(chunk)
+        yield chunk
+
+
+def iter_snapshot_text(chain):
+    """
+    Gestreamtes Gegenstück zu database._load_snapshot.
+    chain: (transcript_content, content_blob, codec, prefix_len) vom letzten
+    vollständigen Snapshot bis zum gewünschten, d. h. ältester zuerst.
+    Liefert Text-Blöcke; Deltas übernehmen die ersten prefix_len Zeichen ihres Vorgängers.
+    """
+    chunks = iter(())
+    for content, blob, codec, prefix_len in chain:
+        if codec is None:
+            chunks = iter((content,))
+        elif codec == CODEC_FULL:
+            chunks = iter_decompressed(blob)
+        else:
+            chunks = itertools.chain(_take_chars(chunks, prefix_len), iter_decompressed(blob))
+    return chunks
+
+
+def iter_lines(chunks):
+    """
+    Zerlegt einen Strom von Text-Blöcken in Zeilen (ohne Zeilenumbruch).
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """
+    Länge des gemeinsamen Anfangs zweier Strings (binäre Suche über Slices,
+    damit lange Transkripte nicht Zeichen für Zeichen in Python verglichen werden).
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def encode_snapshot(text: str, previous_text=None, previous_depth: int = 0):
+    """
+    Kodiert einen neuen Snapshot. Liefert (codec, blob, prefix_len, depth).
+    Ist der Vorgänger bekannt und teilt einen nennenswerten Anfang mit dem neuen Text,
+    wird nur der Rest als Delta gespeichert.
+    """
+    if previous_text is not None and previous_depth < MAX_DELTA_CHAIN:
+        prefix_len = common_prefix_length(previous_text, text)
+        if prefix_len and prefix_len >= len(text) // 2:
+            return CODEC_DELTA, compress_text(text[prefix_len:]), prefix_len, previous_depth + 1
+    return CODEC_FULL, compress_text(text), None, 0
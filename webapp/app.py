@@ -1,36 +1,118 @@
 # webapp/app.py
 
 from flask import (
-    Flask, render_template, request, redirect,
-    url_for, flash, g, session
+    Flask, Response, jsonify, make_response, render_template, request, redirect,
+    url_for, flash, session, stream_template, stream_with_context
 )
-import sqlite3
+from markupsafe import Markup, escape
+import base64
+import binascii
+import hashlib
+import itertools
+import json
 import os
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 import requests
 
+try:
+    import brotli  # optional; ohne das Paket wird nur gzip angeboten
+except ImportError:
+    brotli = None
+
 from utils import config
+from utils.database import Database, MEMBER_ROLES_SYNCED_KEY, SEARCH_MARK_START, SEARCH_MARK_END
+from webapp import discord_api
 
 app = Flask(__name__)
 app.secret_key = config.FLASK_SECRET_KEY
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "..", "tickets.sqlite")
 
+# Treffer pro Seite in der Volltextsuche
+SEARCH_PAGE_SIZE = 20
+OVERVIEW_PAGE_SIZE = 50
+OVERVIEW_STATUSES = ("open", "claimed", "closed", "deleted")
+# Zeilen pro Seite in der Transkriptansicht (weitere werden beim Scrollen nachgeladen)
+TRANSCRIPT_PAGE_LINES = 500
+
+# JSON-API: Standard- und Höchstzahl Tickets pro Seite
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+API_TICKET_LIST_FIELDS = ("id", "user_id", "user_name", "status", "last_transcript_at")
+API_TICKET_FIELDS = (
+    "id", "user_id", "user_name", "channel_id", "status", "claimed_by",
+    "created_at", "last_transcript_at", "updated_at",
+)
+API_MESSAGE_FIELDS = ("message_id", "author_id", "author_name", "created_at", "edited_at", "content")
+
+# So lange (Sekunden) gilt eine Rollenprüfung gegen member_roles als aktuell.
+# Entzogene Rollen sperren also spätestens nach dieser Zeit aus.
+ROLE_CACHE_TTL = 30
+ROLE_CACHE_MAX = 1024
+
+# Antwortkompression: kleinere Antworten lohnen den Aufwand nicht
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_MIMETYPES = (
+    "text/html", "text/plain", "text/css", "text/javascript",
+    "application/javascript", "application/json", "application/x-ndjson",
+)
+# Statische Dateien mit Fingerprint (?v=<hash>) dürfen ein Jahr im Browser-Cache bleiben
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+_db = None
+_db_lock = threading.Lock()
+
 def get_db():
-    if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE_PATH)
-    return g.db
+    """
+    Eine langlebige Database-Instanz pro Worker-Prozess
+    (entpackt komprimierte Transkripte transparent).
+    """
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = Database(DATABASE_PATH)
+        return _db
+
+_role_cache = {}
+_role_cache_lock = threading.Lock()
+
+def has_panel_access(user_id, use_cache: bool = True):
+    """
+    Prüft anhand des vom Bot gepflegten Rollen-Auszugs (member_roles), ob der User
+    eine Rolle aus ALLOWED_ROLES hat. Ergebnisse werden ROLE_CACHE_TTL Sekunden
+    zwischengespeichert. Liefert None, solange der Bot noch keinen Auszug geschrieben hat.
+    """
+    now = time.monotonic()
+    with _role_cache_lock:
+        cached = _role_cache.get(user_id)
+        if use_cache and cached and cached[0] > now:
+            return cached[1]
 
-@app.teardown_appcontext
-def close_db(error):
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
+    roles = get_db().get_member_roles(user_id)
+    allowed = None if roles is None else any(r in config.ALLOWED_ROLES for r in roles)
+
+    with _role_cache_lock:
+        if len(_role_cache) >= ROLE_CACHE_MAX:
+            _role_cache.clear()
+        _role_cache[user_id] = (now + ROLE_CACHE_TTL, allowed)
+    return allowed
 
 def is_logged_in():
     """
     Prüft, ob der User eingeloggt ist (session["discord_id"]) und 'roles_ok' True ist.
+    Die Rollen werden laufend gegen member_roles nachgeprüft, damit ein Entzug
+    auch bestehende Sitzungen beendet.
     """
-    return session.get("discord_id") and session.get("roles_ok")
+    if not (session.get("discord_id") and session.get("roles_ok")):
+        return False
+    if has_panel_access(session["discord_id"]) is False:
+        session.clear()
+        return False
+    return True
 
 def login_required(f):
     """
@@ -43,6 +125,165 @@ def login_required(f):
     wrapper.__name__ = f.__name__  # Fix für Flask-Decorator
     return wrapper
 
+def _template_build_id() -> str:
+    """
+    Hash über alle Templates. Geht in jeden ETag ein, damit nach einem Deploy
+    mit geänderten Templates keine veralteten Seiten als "unverändert" gelten.
+    """
+    digest = hashlib.sha1()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(template_dir)):
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(template_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+TEMPLATE_BUILD_ID = _template_build_id()
+
+def conditional(get_version):
+    """
+    Decorator: ETag/Last-Modified für Seiten, die nur von der Datenbank abhängen.
+    get_version(**view_args) liefert tickets.updated_at (bzw. None = nicht cachebar).
+    Hat der Client die aktuelle Version schon, gibt es sofort ein 304 -
+    ohne weitere Abfragen und ohne Template-Rendering.
+    """
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            version = get_version(**kwargs)
+            # Flash-Meldungen gehören zu genau einer Antwort und dürfen nicht im Cache landen
+            if version is None or session.get("_flashes"):
+                return f(*args, **kwargs)
+
+            etag = hashlib.sha1(
+                f"{TEMPLATE_BUILD_ID}|{request.full_path}|{version}".encode("utf-8")
+            ).hexdigest()
+            last_modified = datetime.strptime(version[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            else:
+                fresh = bool(request.if_modified_since and last_modified <= request.if_modified_since)
+
+            if fresh:
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Schwacher ETag, da die Antwort je nach Accept-Encoding komprimiert wird
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        wrapper.__name__ = f.__name__
+        return wrapper
+    return decorator
+
+def last_change(**_):
+    return get_db().get_last_change()
+
+def last_ticket_change(ticket_id, **_):
+    return get_db().get_last_change(ticket_id)
+
+@lru_cache(maxsize=None)
+def static_fingerprint(filename: str):
+    try:
+        with open(os.path.join(app.static_folder, filename), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return None
+
+@app.url_defaults
+def add_static_fingerprint(endpoint, values):
+    """
+    url_for('static', ...) hängt automatisch ?v=<Inhalts-Hash> an.
+    Ändert sich die Datei, ändert sich die URL - der Browser-Cache kann also ewig halten.
+    """
+    if endpoint == "static" and "filename" in values:
+        values.setdefault("v", static_fingerprint(values["filename"]))
+
+def _compressor(encoding: str):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip-Format
+    return compressor.compress, compressor.flush
+
+def _compress_stream(chunks, encoding: str):
+    compress, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+def _negotiate_encoding():
+    if brotli is not None and request.accept_encodings["br"]:
+        return "br"
+    if request.accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+def _weaken_etag(response):
+    """
+    Ein starker ETag (statische Dateien) gilt nur für die unkomprimierten Bytes;
+    komprimierte Antworten bekommen ihn als schwachen (If-None-Match vergleicht schwach).
+    """
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+@app.after_request
+def cache_static_files(response):
+    if (request.endpoint == "static"
+            and request.args.get("v")
+            and request.args.get("v") == static_fingerprint(request.view_args.get("filename", ""))):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    Komprimiert Text-Antworten (brotli, sonst gzip). Gestreamte Antworten
+    (Transkripte) werden unterwegs komprimiert, ohne sie zu puffern.
+    """
+    encoding = _negotiate_encoding()
+    if response.status_code == 304 and encoding:
+        # 304 (ohne Inhalt und Mimetype) mit demselben Validator wie die komprimierte 200
+        _weaken_etag(response)
+        return response
+    if (response.status_code != 200
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        compress, finish = _compressor(encoding)
+        response.set_data(compress(data) + finish())
+    response.headers["Content-Encoding"] = encoding
+    _weaken_etag(response)
+    return response
+
 @app.route("/login")
 def login():
     """
@@ -50,7 +291,7 @@ def login():
     """
     scope = "identify%20guilds.members.read"
     url = (
-        f"https://discord.com/api/oauth2/authorize"
+        f"{config.DISCORD_API_BASE}/oauth2/authorize"
         f"?client_id={config.DISCORD_CLIENT_ID}"
         f"&redirect_uri={config.DISCORD_REDIRECT_URI}"
         f"&response_type=code"
@@ -69,28 +310,28 @@ def callback():
         flash("Discord-Login abgebrochen (kein code).")
         return redirect(url_for("login"))
 
-    data = {
-        "client_id": config.DISCORD_CLIENT_ID,
-        "client_secret": config.DISCORD_CLIENT_SECRET,
-        "grant_type": "authorization_code",
-        "code": code,
-        "redirect_uri": config.DISCORD_REDIRECT_URI,
-        "scope": "identify guilds.members.read"
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    token_res = requests.post("https://discord.com/api/oauth2/token", data=data, headers=headers)
-    if token_res.status_code != 200:
-        flash("Fehler beim Tokenabruf.")
-        return redirect(url_for("login"))
+    try:
+        token_res = discord_api.exchange_code(code)
+        if token_res.status_code != 200:
+            flash("Fehler beim Tokenabruf.")
+            return redirect(url_for("login"))
 
-    token_json = token_res.json()
-    access_token = token_json["access_token"]
-    token_type = token_json["token_type"]  # "Bearer"
+        token_json = token_res.json()
+        access_token = token_json["access_token"]
+        token_type = token_json["token_type"]  # "Bearer"
+
+        authorization = f"{token_type} {access_token}"
+        if get_db().get_bot_setting(MEMBER_ROLES_SYNCED_KEY):
+            # Rollen kommen aus dem Auszug des Bots, Discord liefert nur noch die User-ID
+            user_res, member_res = discord_api.fetch_user(authorization), None
+        else:
+            # Noch kein Auszug vorhanden: Nutzer und Mitgliedschaft gleichzeitig abfragen
+            user_res, member_res = discord_api.fetch_user_and_member(authorization, config.GUILD_ID)
+    except requests.RequestException as e:
+        print(f"[WARN] Discord-Login: Discord nicht erreichbar: {e}")
+        flash("Discord ist gerade nicht erreichbar. Bitte versuche es gleich noch einmal.")
+        return redirect(url_for("login"))
 
-    user_res = requests.get(
-        "https://discord.com/api/users/@me",
-        headers={"Authorization": f"{token_type} {access_token}"}
-    )
     if user_res.status_code != 200:
         flash("Fehler beim Abruf der Nutzerinformationen.")
         return redirect(url_for("login"))
@@ -98,18 +339,15 @@ def callback():
     user_data = user_res.json()
     user_id = user_data["id"]
 
-    guild_id = config.GUILD_ID
-    member_url = f"https://discord.com/api/users/@me/guilds/{guild_id}/member"
-    member_res = requests.get(member_url, headers={"Authorization": f"{token_type} {access_token}"})
-
-    if member_res.status_code != 200:
-        flash("Du bist nicht auf dem Discord-Server oder keine Berechtigung.")
-        return redirect(url_for("login"))
-
-    member_data = member_res.json()
-    user_roles = member_data.get("roles", [])
+    if member_res is None:
+        roles_ok = bool(has_panel_access(user_id, use_cache=False))
+    else:
+        if member_res.status_code != 200:
+            flash("Du bist nicht auf dem Discord-Server oder keine Berechtigung.")
+            return redirect(url_for("login"))
+        user_roles = member_res.json().get("roles", [])
+        roles_ok = any(r in user_roles for r in config.ALLOWED_ROLES)
 
-    roles_ok = any(r in user_roles for r in config.ALLOWED_ROLES)
     if not roles_ok:
         flash("Du hast keine der erforderlichen Rollen. Zugriff verweigert.")
         return redirect(url_for("login"))
@@ -121,41 +359,285 @@ def callback():
 
 @app.route("/")
 @login_required
+@conditional(last_change)
 def index():
-    con = get_db()
-    cur = con.cursor()
-    # Neu: user_name (Index 2) wird mit ausgewählt
-    cur.execute("""
-        SELECT t.id, t.user_id, t.user_name, t.status, tr.created_at
-        FROM tickets t
-        JOIN transcripts tr ON t.id = tr.ticket_id
-        GROUP BY t.id
-        ORDER BY tr.created_at DESC
-    """)
-    rows = cur.fetchall()
-    return render_template("index.html", tickets=rows)
+    """
+    Ticket-Übersicht, seitenweise per Cursor und serverseitig gefiltert.
+    """
+    status = request.args.get("status", "").strip()
+    user = request.args.get("user", "").strip()
+    date_from = parse_date(request.args.get("from", ""))
+    date_to = parse_date(request.args.get("to", ""))
+    before = decode_cursor(request.args.get("cursor", ""))
+
+    rows, next_before = get_db().list_tickets(
+        limit=OVERVIEW_PAGE_SIZE,
+        before=before,
+        status=status or None,
+        user=user or None,
+        date_from=date_from.isoformat() if date_from else None,
+        # "bis" ist inklusive: alles vor Beginn des Folgetags
+        date_to=(date_to + timedelta(days=1)).isoformat() if date_to else None
+    )
+
+    filters = {
+        "status": status,
+        "user": user,
+        "from": date_from.isoformat() if date_from else "",
+        "to": date_to.isoformat() if date_to else "",
+    }
+    return render_template("index.html",
+                           tickets=rows,
+                           filters=filters,
+                           filter_args={k: v for k, v in filters.items() if v},
+                           statuses=OVERVIEW_STATUSES,
+                           first_page=before is None,
+                           next_cursor=encode_cursor(next_before) if next_before else None)
+
+def parse_date(value: str):
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+def encode_cursor(before) -> str:
+    """
+    (last_transcript_at, id) der letzten Zeile -> undurchsichtiger URL-Parameter.
+    """
+    last_transcript_at, ticket_id = before
+    raw = f"{last_transcript_at}|{ticket_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        last_transcript_at, ticket_id = raw.rsplit("|", 1)
+        return last_transcript_at, int(ticket_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        # Kaputter Cursor -> einfach wieder bei der neuesten Seite anfangen
+        return None
 
 @app.route("/transcript/<int:ticket_id>")
 @login_required
+@conditional(last_ticket_change)
 def show_transcript(ticket_id):
-    con = get_db()
-    cur = con.cursor()
-    cur.execute("""
-        SELECT transcript_content
-        FROM transcripts
-        WHERE ticket_id=?
-        ORDER BY transcript_id DESC
-        LIMIT 1
-    """, (ticket_id,))
-    row = cur.fetchone()
-    if not row:
+    """
+    Transkriptansicht: rendert nur den Zeilenbereich ?from=&to= (Zeilennummern ab 1)
+    und streamt ihn, statt das ganze Transkript als einen String zu übergeben.
+    """
+    first, last = line_range(TRANSCRIPT_PAGE_LINES)
+    lines = get_db().iter_transcript_lines(ticket_id, first - 1, last)
+    head = next(lines, None)
+    if head is None and first == 1:
         flash(f"Kein Transkript für Ticket {ticket_id} gefunden.")
         return redirect(url_for("index"))
 
-    transcript_content = row[0]
-    return render_template("transcript_detail.html",
+    return stream_template("transcript_detail.html",
                            ticket_id=ticket_id,
-                           transcript=transcript_content)
+                           lines=itertools.chain([head], lines) if head is not None else [],
+                           first=first,
+                           last=last,
+                           page_size=TRANSCRIPT_PAGE_LINES)
+
+@app.route("/transcript/<int:ticket_id>.txt")
+@login_required
+@conditional(last_ticket_change)
+def transcript_text(ticket_id):
+    """
+    Transkript als Textdatei, direkt aus der Datenbank gestreamt.
+    Mit ?from=&to= nur der Ausschnitt (so lädt die Detailansicht weitere Seiten nach).
+    """
+    ranged = "from" in request.args or "to" in request.args
+    first, last = line_range(None)
+    lines = get_db().iter_transcript_lines(ticket_id, first - 1, last)
+    head = next(lines, None)
+    if head is None and not ranged:
+        return Response("Kein Transkript gefunden.\n", status=404, mimetype="text/plain")
+
+    def generate():
+        if head is None:
+            return
+        batch = [head]
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= TRANSCRIPT_PAGE_LINES:
+                yield "\n".join(batch) + "\n"
+                batch = []
+        if batch:
+            yield "\n".join(batch) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="text/plain")
+    if not ranged:
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="ticket_{ticket_id}_transcript.txt"'
+        )
+    return response
+
+def line_range(page_size):
+    """
+    ?from=&to= (ab 1, inklusive) -> (erste Zeile, letzte Zeile oder None für "bis zum Ende").
+    Ohne to= wird page_size Zeilen weit gelesen.
+    """
+    first = max(request.args.get("from", 1, type=int), 1)
+    last = request.args.get("to", type=int)
+    if last is None and page_size:
+        last = first + page_size - 1
+    if last is not None:
+        last = max(last, first - 1)
+    return first, last
+
+def highlight_snippet(snippet: str) -> Markup:
+    """
+    Escaped das Snippet und ersetzt erst danach die Treffer-Markierungen durch <mark>.
+    """
+    return Markup(
+        str(escape(snippet))
+        .replace(SEARCH_MARK_START, "<mark>")
+        .replace(SEARCH_MARK_END, "</mark>")
+    )
+
+@app.route("/search")
+@login_required
+@conditional(last_change)
+def search():
+    """
+    Volltextsuche über alle Transkripte (SQLite FTS5), seitenweise.
+    """
+    query = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    results, has_more, ranked = [], False, True
+    if query:
+        results, has_more, ranked = get_db().search_transcripts(
+            query, limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE
+        )
+        for result in results:
+            result["snippet"] = highlight_snippet(result["snippet"])
+
+    return render_template("search.html",
+                           query=query,
+                           results=results,
+                           page=page,
+                           has_more=has_more,
+                           ranked=ranked)
+
+########################################################################
+# JSON-API (nur lesend, gleiche Anmeldung wie das Panel)
+########################################################################
+def api_login_required(f):
+    """
+    Wie login_required, aber mit 401 + JSON statt Umleitung auf die Login-Seite.
+    """
+    def wrapper(*args, **kwargs):
+        if not is_logged_in():
+            return api_error(401, "Nicht angemeldet oder keine Berechtigung.")
+        return f(*args, **kwargs)
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+def api_error(status: int, message: str):
+    return jsonify(error=message), status
+
+def selected_fields(available):
+    """
+    ?fields=a,b,c -> Tupel der gewünschten Felder (Standard: alle).
+    Unbekannte Felder -> ValueError mit passender Meldung.
+    """
+    requested = request.args.get("fields", "").strip()
+    if not requested:
+        return available
+    fields = tuple(field.strip() for field in requested.split(",") if field.strip())
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(f"Unbekannte Felder: {', '.join(unknown)}. Erlaubt: {', '.join(available)}")
+    return fields
+
+@app.route("/api/tickets")
+@api_login_required
+@conditional(last_change)
+def api_tickets():
+    """
+    Tickets mit Transkript, neueste zuerst. Filter wie in der Übersicht
+    (status, user, from, to), Seiten per ?cursor= aus next_cursor der Vorseite.
+    """
+    try:
+        fields = selected_fields(API_TICKET_LIST_FIELDS)
+    except ValueError as e:
+        return api_error(400, str(e))
+    limit = min(max(request.args.get("limit", API_PAGE_SIZE, type=int), 1), API_MAX_PAGE_SIZE)
+    date_from = parse_date(request.args.get("from", ""))
+    date_to = parse_date(request.args.get("to", ""))
+
+    rows, next_before = get_db().list_tickets(
+        limit=limit,
+        before=decode_cursor(request.args.get("cursor", "")),
+        status=request.args.get("status", "").strip() or None,
+        user=request.args.get("user", "").strip() or None,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=(date_to + timedelta(days=1)).isoformat() if date_to else None
+    )
+    tickets = [
+        {field: value for field, value in zip(API_TICKET_LIST_FIELDS, row) if field in fields}
+        for row in rows
+    ]
+    return jsonify(
+        tickets=tickets,
+        next_cursor=encode_cursor(next_before) if next_before else None
+    )
+
+@app.route("/api/tickets/<int:ticket_id>")
+@api_login_required
+@conditional(last_ticket_change)
+def api_ticket(ticket_id):
+    try:
+        fields = selected_fields(API_TICKET_FIELDS)
+    except ValueError as e:
+        return api_error(400, str(e))
+    ticket = get_db().get_ticket(ticket_id)
+    if ticket is None:
+        return api_error(404, f"Ticket {ticket_id} nicht gefunden.")
+    return jsonify({field: ticket[field] for field in fields})
+
+@app.route("/api/transcripts/<int:ticket_id>")
+@api_login_required
+@conditional(last_ticket_change)
+def api_transcript(ticket_id):
+    """
+    Nachrichten eines Tickets als NDJSON (ein JSON-Objekt pro Zeile), gestreamt.
+    ?after=<message_id> liefert nur neuere Nachrichten, ?limit= begrenzt die Anzahl.
+    """
+    try:
+        fields = selected_fields(API_MESSAGE_FIELDS)
+    except ValueError as e:
+        return api_error(400, str(e))
+    after = max(request.args.get("after", 0, type=int), 0)
+    limit = request.args.get("limit", type=int)
+    if limit is not None:
+        limit = max(limit, 0)
+
+    messages = get_db().iter_transcript_messages(ticket_id, after=after, limit=limit)
+    head = next(messages, None)
+    if head is None and not after and get_db().get_ticket(ticket_id) is None:
+        return api_error(404, f"Ticket {ticket_id} nicht gefunden.")
+
+    def generate():
+        if head is None:
+            return
+        batch = []
+        for message in itertools.chain([head], messages):
+            batch.append(json.dumps(
+                {field: message[field] for field in fields if field in message},
+                ensure_ascii=False
+            ))
+            if len(batch) >= TRANSCRIPT_PAGE_LINES:
+                yield "\n".join(batch) + "\n"
+                batch = []
+        if batch:
+            yield "\n".join(batch) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 if __name__ == "__main__":
     # Nur für lokalen Test
@@ -0,0 +1,130 @@
+# webapp/discord_api.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import config
+
+# Höchstens so lange wird auf einen Retry-After von Discord gewartet (Sekunden).
+# Längere Sperren brechen den Login ab, statt einen Worker zu blockieren.
+MAX_RETRY_AFTER = 3.0
+
+# Verbindungen pro Host, die die Session offen hält (Keep-Alive)
+POOL_SIZE = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+# Für parallele Abfragen innerhalb eines Logins (User + Mitgliedschaft)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="discord-api")
+
+
+class _BoundedRetry(Retry):
+    """Retry, der Retry-After respektiert, aber nie länger als MAX_RETRY_AFTER wartet."""
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        # Discord schickt teils Sekundenbruchteile ("0.35"), urllib3 erwartet ganze Sekunden
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            return super().parse_retry_after(retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+def _timeout():
+    return config.DISCORD_CONNECT_TIMEOUT, config.DISCORD_READ_TIMEOUT
+
+
+def get_session() -> requests.Session:
+    """
+    Eine gemeinsame Session pro Worker-Prozess: Verbindungen zu Discord
+    werden wiederverwendet statt für jeden Aufruf neu aufgebaut.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # GET-Abfragen sind idempotent: bei 429 und 5xx mit Backoff wiederholen
+            session.mount("https://", HTTPAdapter(
+                pool_connections=POOL_SIZE,
+                pool_maxsize=POOL_SIZE,
+                max_retries=_BoundedRetry(
+                    total=2,
+                    backoff_factor=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset({"GET"}),
+                    raise_on_status=False,
+                ),
+            ))
+            session.mount("http://", session.get_adapter("https://"))
+            # Den Code-Tausch nur bei 429 wiederholen: der OAuth-Code gilt genau einmal,
+            # nach einem 5xx ist unklar, ob Discord ihn schon verbraucht hat.
+            session.mount(f"{config.DISCORD_API_BASE}/oauth2/token", HTTPAdapter(
+                max_retries=_BoundedRetry(
+                    total=2,
+                    read=0,
+                    backoff_factor=0.3,
+                    status_forcelist=(429,),
+                    allowed_methods=frozenset({"POST"}),
+                    raise_on_status=False,
+                ),
+            ))
+            _session = session
+        return _session
+
+
+def exchange_code(code: str) -> requests.Response:
+    """
+    Tauscht den OAuth2-Code gegen ein Access-Token.
+    """
+    return get_session().post(
+        f"{config.DISCORD_API_BASE}/oauth2/token",
+        data={
+            "client_id": config.DISCORD_CLIENT_ID,
+            "client_secret": config.DISCORD_CLIENT_SECRET,
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": config.DISCORD_REDIRECT_URI,
+            "scope": "identify guilds.members.read"
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=_timeout()
+    )
+
+
+def fetch_user(authorization: str) -> requests.Response:
+    """
+    Fragt /users/@me ab (nur die Discord-ID wird gebraucht).
+    """
+    return get_session().get(
+        f"{config.DISCORD_API_BASE}/users/@me",
+        headers={"Authorization": authorization},
+        timeout=_timeout()
+    )
+
+
+def fetch_user_and_member(authorization: str, guild_id: int):
+    """
+    Fragt /users/@me und die Server-Mitgliedschaft gleichzeitig ab.
+    Liefert (user_response, member_response); Netzwerkfehler werden weitergereicht.
+    """
+    session = get_session()
+    headers = {"Authorization": authorization}
+    user_future = _executor.submit(
+        session.get, f"{config.DISCORD_API_BASE}/users/@me",
+        headers=headers, timeout=_timeout()
+    )
+    member_future = _executor.submit(
+        session.get, f"{config.DISCORD_API_BASE}/users/@me/guilds/{guild_id}/member",
+        headers=headers, timeout=_timeout()
+    )
+    return user_future.result(), member_future.result()